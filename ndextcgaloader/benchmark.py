@@ -0,0 +1,368 @@
+#! /usr/bin/env python
+
+"""Times conversion of network files to CX with each engine, or stage by stage."""
+
+import argparse
+import sys
+import os
+import json
+import time
+import shutil
+import tempfile
+
+import ndextcgaloader
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import synthetic
+from ndextcgaloader import metrics
+
+DEFAULT_SCALING_SIZES = [100, 1000, 10000, 100000]
+"""
+Default edge counts of synthetic networks timed by --scaling
+"""
+
+DEFAULT_THRESHOLD = 0.2
+"""
+Default fraction by which a stage may get slower than
+--baseline before it counts as a regression
+"""
+
+MIN_REGRESSION_SECS = 0.005
+"""
+Stages whose total time grows by less than this many seconds
+never count as regressions, so timer noise on tiny inputs is ignored
+"""
+
+
+def get_sample_networks_dir():
+    """
+    Gets directory of network files the tests use
+    :return: path to directory
+    :rtype: string
+    """
+    return os.path.join(ndexloadtcga.get_testsdir(), 'sample_networks')
+
+
+def _parse_arguments(desc, args):
+    """
+    Parses command line arguments
+    :param desc: description of program
+    :param args: arguments to parse
+    :return: parsed arguments
+    """
+    help_fm = argparse.RawDescriptionHelpFormatter
+    parser = argparse.ArgumentParser(description=desc,
+                                     formatter_class=help_fm)
+    parser.add_argument('--datadir', help='Directory containing network files in '
+                                          '--networklistfile',
+                        default=ndexloadtcga.get_networksdir())
+    parser.add_argument('--networklistfile', help='File containing a list of '
+                                                  'network files to convert',
+                        default=ndexloadtcga.get_networksfile())
+    parser.add_argument('--loadplan', help='Use alternate load plan file',
+                        default=ndexloadtcga.get_load_plan())
+    parser.add_argument('--engine', choices=ndexloadtcga.ENGINES, action='append',
+                        help='Engine to time, can be set multiple times '
+                             '(default all engines)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times each engine converts all '
+                             'networks, the fastest run is reported (default 3)')
+    parser.add_argument('--scaling', nargs='?', const=','.join(str(s) for s in DEFAULT_SCALING_SIZES),
+                        help='Instead of the networks in --datadir, time synthetic '
+                             'networks with these comma delimited edge counts '
+                             '(default ' + ','.join(str(s) for s in DEFAULT_SCALING_SIZES) +
+                             ' when set without value)')
+    parser.add_argument('--stages', nargs='?', const=get_sample_networks_dir(),
+                        help='Instead of timing engines, time each stage of conversion '
+                             'of every .txt network file in this directory (default ' +
+                             get_sample_networks_dir() + ' when set without value)')
+    parser.add_argument('--output', help='With --stages, write results as JSON to this file')
+    parser.add_argument('--baseline', help='With --stages, compare results with this JSON file '
+                                           'written by --output and exit with status 1 if any '
+                                           'stage got slower by more than --threshold')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Fraction by which a stage may get slower than --baseline '
+                             '(default ' + str(DEFAULT_THRESHOLD) + ')')
+    parser.add_argument('--tcgaversion', default='1.0', help=argparse.SUPPRESS)
+    parser.add_argument('--version', action='version',
+                        version=('%(prog)s ' +
+                                 ndextcgaloader.__version__))
+    return parser.parse_args(args)
+
+
+def get_loader(theargs, engine, datadir):
+    """
+    Creates loader that converts networks with **engine**
+    without connecting to NDEx
+
+    :param theargs: parsed command line arguments
+    :param engine: one of :py:const:`~ndextcgaloader.ndexloadtcga.ENGINES`
+    :param datadir: directory containing network files
+    :return: loader with load plan parsed
+    :rtype: :py:class:`~ndextcgaloader.ndexloadtcga.NDExNdextcgaloaderLoader`
+    """
+    args = argparse.Namespace(conf=None, profile=None, tcgaversion=theargs.tcgaversion,
+                              networklistfile=theargs.networklistfile,
+                              datadir=datadir, dataurl=None, offline=True,
+                              downloadworkers=None, loadplan=theargs.loadplan,
+                              uploadworkers=None, engine=engine, prettycx=False,
+                              gzipcx=False, forceupload=False,
+                              workers=None, pipeline=False, force=False,
+                              cachedir=None, cachesize=None, namecachettl=None,
+                              reportformat=None, style=ndexloadtcga.get_style(),
+                              stylemap=None, stylecache=None, metricsfile=None)
+    loader = ndexloadtcga.NDExNdextcgaloaderLoader(args)
+    loader.parse_load_plan()
+    return loader
+
+
+def time_engine(loader, list_of_network_files):
+    """
+    Converts every network in **list_of_network_files** to CX
+
+    :param loader: loader set up by :py:func:`get_loader`
+    :param list_of_network_files: names of network files in --datadir
+    :return: elapsed seconds
+    :rtype: float
+    """
+    loader.prepare_report_directory()
+    start = time.perf_counter()
+    for network_file in list_of_network_files:
+        network = loader._generate_network(network_file)
+        if network is not None:
+            network.to_cx()
+    return time.perf_counter() - start
+
+
+def run_scaling_benchmark(theargs, sizes, out=sys.stdout):
+    """
+    Times conversion of synthetic networks of increasing size with
+    each engine. Conversion time per edge should stay flat as networks
+    grow, a growing time per edge points at quadratic behaviour
+
+    :param theargs: parsed command line arguments
+    :param sizes: edge counts of synthetic networks
+    :type sizes: list
+    :param out: stream results are written to
+    :return: (engine, edge count) => time in seconds
+    :rtype: dict
+    """
+    engines = theargs.engine or ndexloadtcga.ENGINES
+    cwd = os.getcwd()
+    tmpdir = tempfile.mkdtemp()
+    results = {}
+    try:
+        os.chdir(tmpdir)
+        datadir = os.path.join(tmpdir, 'networks')
+        os.makedirs(datadir)
+        for size in sizes:
+            synthetic.write_synthetic_pathway(os.path.join(datadir, 'Synthetic-' + str(size) + '.txt'), size)
+
+        for engine in engines:
+            loader = get_loader(theargs, engine, datadir)
+            for size in sizes:
+                secs = time_engine(loader, ['Synthetic-' + str(size) + '.txt'])
+                results[(engine, size)] = secs
+                out.write('{engine}\t{edges} edges\t{secs:.3f}s\t'
+                          '{usecs:.1f}us/edge\n'.format(engine=engine, edges=size, secs=secs,
+                                                        usecs=secs * 1000000 / size))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+    return results
+
+
+def run_benchmark(theargs, out=sys.stdout):
+    """
+    Times each engine, reports and TSV files are written to a
+    temporary directory so --datadir is left untouched
+
+    :param theargs: parsed command line arguments
+    :param out: stream results are written to
+    :return: engine => fastest time in seconds
+    :rtype: dict
+    """
+    with open(theargs.networklistfile, 'r') as networks:
+        list_of_network_files = networks.read().splitlines()
+
+    engines = theargs.engine or ndexloadtcga.ENGINES
+    srcdir = os.path.abspath(theargs.datadir)
+    cwd = os.getcwd()
+    tmpdir = tempfile.mkdtemp()
+    results = {}
+    try:
+        os.chdir(tmpdir)
+        datadir = os.path.join(tmpdir, 'networks')
+        os.makedirs(datadir)
+        for network_file in list_of_network_files:
+            shutil.copy(os.path.join(srcdir, network_file), datadir)
+
+        for engine in engines:
+            loader = get_loader(theargs, engine, datadir)
+            timings = []
+            for i in range(max(theargs.repeat, 1)):
+                timings.append(time_engine(loader, list_of_network_files))
+            results[engine] = min(timings)
+            out.write('{engine}\t{networks} networks\t{secs:.3f}s\n'.format(engine=engine,
+                                                                            networks=len(list_of_network_files),
+                                                                            secs=results[engine]))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+    return results
+
+
+def get_stage_loader(theargs, datadir):
+    """
+    Creates loader, with the pandas engine, that converts
+    networks without connecting to NDEx
+
+    :param theargs: parsed command line arguments
+    :param datadir: directory containing network files
+    :return: loader with load plan and style parsed
+    :rtype: :py:class:`~ndextcgaloader.ndexloadtcga.NDExNdextcgaloaderLoader`
+    """
+    loader = get_loader(theargs, ndexloadtcga.PANDAS_ENGINE, datadir)
+    loader._load_style_template()
+    loader._style_map.load_all()
+    return loader
+
+
+def time_stages(loader, network_file):
+    """
+    Converts **network_file** to CX the way the loader does, returning
+    the time of each stage as timed by the loader itself, see
+    :py:const:`~ndextcgaloader.metrics.CONVERSION_STAGES`
+
+    :param loader: loader set up by :py:func:`get_stage_loader`
+    :param network_file: name of network file in --datadir
+    :return: stage => seconds
+    :rtype: dict
+    """
+    loader._convert_file(network_file)
+    times = loader._get_stage_timer().get_times()
+    return dict((stage, times.get(stage, 0.0)) for stage in metrics.CONVERSION_STAGES)
+
+
+def run_stage_benchmark(theargs, out=sys.stdout):
+    """
+    Times each stage of conversion of every ``.txt`` network file in
+    the --stages directory, fastest of --repeat runs. Files are copied
+    to a temporary directory so the --stages directory is left untouched
+
+    :param theargs: parsed command line arguments
+    :param out: stream results are written to
+    :return: results as written by --output, with keys ``repeat``,
+             ``networks``, holding network file => stage => seconds,
+             and ``stages``, holding stage => seconds of all networks
+    :rtype: dict
+    """
+    srcdir = os.path.abspath(theargs.stages)
+    list_of_network_files = sorted(name for name in os.listdir(srcdir) if name.endswith('.txt'))
+
+    cwd = os.getcwd()
+    tmpdir = tempfile.mkdtemp()
+    networks = {}
+    try:
+        os.chdir(tmpdir)
+        datadir = os.path.join(tmpdir, 'networks')
+        os.makedirs(datadir)
+        for network_file in list_of_network_files:
+            shutil.copy(os.path.join(srcdir, network_file), datadir)
+
+        loader = get_stage_loader(theargs, datadir)
+        loader.prepare_report_directory()
+        for i in range(max(theargs.repeat, 1)):
+            for network_file in list_of_network_files:
+                times = time_stages(loader, network_file)
+                fastest = networks.setdefault(network_file, times)
+                for stage in metrics.CONVERSION_STAGES:
+                    fastest[stage] = min(fastest[stage], times[stage])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+    stages = dict((stage, sum(times[stage] for times in networks.values()))
+                  for stage in metrics.CONVERSION_STAGES)
+    for stage in metrics.CONVERSION_STAGES:
+        out.write('{stage}\t{networks} networks\t{secs:.4f}s\n'.format(stage=stage,
+                                                                       networks=len(networks),
+                                                                       secs=stages[stage]))
+    return {'version': ndextcgaloader.__version__,
+            'repeat': max(theargs.repeat, 1),
+            'networks': networks,
+            'stages': stages}
+
+
+def compare_stage_results(results, baseline, threshold=DEFAULT_THRESHOLD, out=sys.stdout):
+    """
+    Compares total time of each stage in **results** with **baseline**.
+    A stage regressed if it got slower by more than **threshold** and
+    by more than :py:const:`MIN_REGRESSION_SECS`
+
+    :param results: results of :py:func:`run_stage_benchmark`
+    :param baseline: earlier results of :py:func:`run_stage_benchmark`
+    :param threshold: fraction by which a stage may get slower
+    :param out: stream comparison is written to
+    :return: stages that regressed
+    :rtype: list
+    """
+    regressions = []
+    for stage in metrics.CONVERSION_STAGES:
+        if stage not in baseline['stages']:
+            continue
+        baseline_secs = baseline['stages'][stage]
+        secs = results['stages'][stage]
+        regressed = secs > baseline_secs * (1 + threshold) and \
+            secs - baseline_secs > MIN_REGRESSION_SECS
+        if regressed:
+            regressions.append(stage)
+        change = '' if baseline_secs == 0 else '{:+.1%}'.format(secs / baseline_secs - 1)
+        out.write('{stage}\t{baseline:.4f}s\t{secs:.4f}s\t{change}{regressed}\n'.format(
+            stage=stage, baseline=baseline_secs, secs=secs, change=change,
+            regressed='\tREGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(args):
+    """
+    Main entry point for program
+    :param args: command line arguments, program name first
+    :return: exit code
+    """
+    desc = """
+    Version {version}
+
+    Times conversion of the networks in --networklistfile, found in
+    --datadir, into CX with each engine selectable via --engine of
+    ndexloadtcga.py. Nothing is uploaded to NDEx.
+
+    With --scaling, synthetic networks of growing size are timed
+    instead so the time per edge shows how conversion scales.
+
+    With --stages, each stage of conversion with the pandas engine,
+    {stages}, is timed for every network file in a
+    directory, by default the networks the tests use. --output saves
+    the results as JSON, --baseline compares them with saved results
+    and exits with status 1 if a stage got slower than --threshold allows.
+
+    """.format(version=ndextcgaloader.__version__, stages=', '.join(metrics.CONVERSION_STAGES))
+    theargs = _parse_arguments(desc, args[1:])
+    if theargs.stages:
+        results = run_stage_benchmark(theargs)
+        if theargs.output:
+            with open(theargs.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if theargs.baseline:
+            with open(theargs.baseline, 'r') as f:
+                baseline = json.load(f)
+            if compare_stage_results(results, baseline, threshold=theargs.threshold):
+                return 1
+    elif theargs.scaling:
+        run_scaling_benchmark(theargs, [int(s) for s in theargs.scaling.split(',')])
+    else:
+        run_benchmark(theargs)
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main(sys.argv))
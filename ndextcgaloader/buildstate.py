@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""Fingerprints of converted networks used to skip unchanged rebuilds."""
+
+import os
+import json
+import logging
+import threading
+
+from ndextcgaloader.manifest import get_sha256
+from ndextcgaloader.reports import check_report_rows
+from ndextcgaloader.cxwriter import COMPACT_SEPARATORS
+
+logger = logging.getLogger(__name__)
+
+BUILD_STATE_FILE = '.build_state.json'
+"""
+Name of build state file written to the data directory
+"""
+
+BUILD_STATE_VERSION = 2
+"""
+Format version of build state file. Files of any other
+version are ignored
+"""
+
+VERSION = 'version'
+ENTRIES = 'entries'
+FINGERPRINT = 'fingerprint'
+CONVERTED = 'converted'
+REPORTS = 'reports'
+
+
+def get_file_sha256(path):
+    """
+    Gets hex digest of sha256 hash of content of file **path**
+    :param path: path to file
+    :return: hex digest
+    :rtype: string
+    """
+    with open(path, 'rb') as f:
+        return get_sha256(f.read())
+
+
+def get_fingerprint(input_sha256, loadplan_sha256, style_sha256,
+                    tcga_version, package_version, options=None):
+    """
+    Gets fingerprint of everything a converted network depends on
+
+    :param input_sha256: hash of network file
+    :param loadplan_sha256: hash of load plan file
+    :param style_sha256: hash of style file applied to network
+    :param tcga_version: value of --tcgaversion
+    :param package_version: version of this package
+    :param options: other settings that change output, such as
+                    --prettycx, as a dict
+    :return: hex digest
+    :rtype: string
+    """
+    return get_sha256(json.dumps([input_sha256, loadplan_sha256, style_sha256,
+                                  tcga_version, package_version, options],
+                                 sort_keys=True,
+                                 separators=COMPACT_SEPARATORS).encode('utf-8'))
+
+
+class BuildState(object):
+    """
+    Keeps, per network file in a directory, the fingerprint it was
+    last converted with, the result of the conversion and the report
+    rows it produced, so later runs can skip converting files whose
+    fingerprint is unchanged and still report them
+    """
+
+    def __init__(self, directory):
+        """
+        Constructor
+
+        :param directory: data directory the network files are in
+        :type directory: string
+        """
+        self._path = os.path.join(directory, BUILD_STATE_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_path(self):
+        """
+        Gets path to build state file
+        :return: path to build state file
+        :rtype: string
+        """
+        return self._path
+
+    def load(self):
+        """
+        Loads build state from disk. A missing or unreadable
+        file, or one of another :py:const:`BUILD_STATE_VERSION`,
+        results in an empty state
+        :return: None
+        """
+        self._entries = {}
+        if not os.path.isfile(self._path):
+            return
+        try:
+            with open(self._path, 'r') as f:
+                state = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning('Ignoring unreadable build state ' +
+                           self._path + ' : ' + str(e))
+            return
+        if not isinstance(state, dict) or state.get(VERSION) != BUILD_STATE_VERSION or \
+                not isinstance(state.get(ENTRIES), dict):
+            logger.info('Ignoring build state of another version ' + self._path)
+            return
+        self._entries = state[ENTRIES]
+
+    def save(self):
+        """
+        Writes build state to disk, replacing the previous
+        copy atomically
+        :return: None
+        """
+        tmp_path = self._path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump({VERSION: BUILD_STATE_VERSION, ENTRIES: self._entries},
+                          f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    def get_entry(self, file_name, fingerprint):
+        """
+        Gets build state entry for **file_name** if it was
+        converted with **fingerprint** and its report rows pass
+        :py:func:`~ndextcgaloader.reports.check_report_rows`
+        :param file_name: name of network file
+        :param fingerprint: fingerprint from :py:func:`get_fingerprint`
+        :return: dict with converted and reports keys or None
+        :rtype: dict
+        """
+        with self._lock:
+            entry = self._entries.get(file_name)
+        if not isinstance(entry, dict) or entry.get(FINGERPRINT) != fingerprint:
+            return None
+        try:
+            checked_reports = check_report_rows(entry.get(REPORTS))
+        except ValueError as e:
+            logger.warning('Ignoring build state of ' + file_name + ' : ' + str(e))
+            return None
+        return {FINGERPRINT: fingerprint,
+                CONVERTED: entry.get(CONVERTED),
+                REPORTS: checked_reports}
+
+    def update_entry(self, file_name, fingerprint, converted, reports):
+        """
+        Records conversion of **file_name** with **fingerprint**
+        :param file_name: name of network file
+        :param fingerprint: fingerprint from :py:func:`get_fingerprint`
+        :param converted: result of conversion, which must be JSON
+                          serializable
+        :param reports: report rows written for **file_name**, as
+                        list of (report name, network name, rows)
+        :return: None
+        """
+        with self._lock:
+            self._entries[file_name] = {FINGERPRINT: fingerprint,
+                                        CONVERTED: converted,
+                                        REPORTS: reports}
+
+    def remove_entry(self, file_name):
+        """
+        Removes build state entry for **file_name** if it exists
+        :param file_name: name of network file
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(file_name, None)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""Content addressed cache of converted networks shared between runs."""
+
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+
+from ndextcgaloader.manifest import get_sha256
+from ndextcgaloader.reports import check_report_rows
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 1024
+"""
+Default maximum size of cache, in megabytes
+"""
+
+ENTRY_FILE = 'entry.json'
+"""
+Name of file in each cache entry describing it. Its modification
+time is when the entry was last used
+"""
+
+CX_FILE = 'network.cx'
+TSV_FILE = 'network.tsv'
+
+NETWORK_NAME = 'network_name'
+CX_NAME = 'cx_name'
+NETWORK_HASH = 'network_hash'
+REPORTS = 'reports'
+
+
+def get_cache_key(file_name, fingerprint):
+    """
+    Gets key of conversion of network file **file_name**, whose
+    name ends up in the network, with **fingerprint**
+    :param file_name: name of network file
+    :param fingerprint: fingerprint of everything the conversion
+                        depends on, see
+                        :py:func:`~ndextcgaloader.buildstate.get_fingerprint`
+    :return: hex digest
+    :rtype: string
+    """
+    return get_sha256((os.path.basename(file_name) + '\n' + fingerprint).encode('utf-8'))
+
+
+def _copy_file(src, dest):
+    """
+    Copies **src** to **dest** through a temporary file, so
+    **dest** is replaced only once complete
+    """
+    tmp_path = dest + '.tmp'
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ConversionCache(object):
+    """
+    Directory of TSV and CX files and report rows of converted
+    networks, keyed by :py:func:`get_cache_key`, so runs from other
+    profiles, checkouts or hosts sharing the directory reuse each
+    other's conversions. Entries are written to a temporary directory
+    and renamed into place, so concurrent runs never see partial
+    entries. Once the cache grows past its maximum size, least
+    recently used entries are removed
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_SIZE * 1024 * 1024):
+        """
+        Constructor
+
+        :param directory: cache directory, created if needed
+        :param max_size: maximum size of cache in bytes
+        :type max_size: int
+        """
+        self._directory = directory
+        self._max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+
+    def _get_entry_dir(self, key):
+        """
+        :return: directory of cache entry **key**
+        :rtype: string
+        """
+        return os.path.join(self._directory, key[:2], key)
+
+    def get(self, key, output_directory, tsv_name):
+        """
+        Copies TSV and CX files of cache entry **key**, if any, into
+        **output_directory** and marks the entry as used. Entries
+        whose report rows do not pass
+        :py:func:`~ndextcgaloader.reports.check_report_rows`, or
+        whose files are missing, are treated as not in cache
+
+        :param key: key from :py:func:`get_cache_key`
+        :param output_directory: directory to copy files to
+        :param tsv_name: name to give the TSV file
+        :return: tuple (tuple (network name, path to CX file, content
+                 hash of network), report rows) or None if **key** is
+                 not in cache
+        :rtype: tuple
+        """
+        entry_dir = self._get_entry_dir(key)
+        entry_path = os.path.join(entry_dir, ENTRY_FILE)
+        try:
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+            if not isinstance(entry, dict):
+                raise ValueError('Entry is not an object')
+            reports = check_report_rows(entry[REPORTS])
+            for name in (NETWORK_NAME, CX_NAME, NETWORK_HASH):
+                if not isinstance(entry[name], str):
+                    raise ValueError(name + ' is not a string')
+            if os.path.basename(entry[CX_NAME]) != entry[CX_NAME] or \
+                    entry[CX_NAME] in ('', os.curdir, os.pardir):
+                raise ValueError('Invalid ' + CX_NAME + ': ' + entry[CX_NAME])
+            os.utime(entry_path, None)
+
+            path_to_cx_file = os.path.join(output_directory, entry[CX_NAME])
+            _copy_file(os.path.join(entry_dir, TSV_FILE), os.path.join(output_directory, tsv_name))
+            _copy_file(os.path.join(entry_dir, CX_FILE), path_to_cx_file)
+        except (IOError, OSError, ValueError, KeyError) as e:
+            if os.path.isdir(entry_dir):
+                logger.warning('Ignoring unusable cache entry ' + entry_dir + ' : ' + str(e))
+            return None
+
+        converted = (entry[NETWORK_NAME], path_to_cx_file, entry[NETWORK_HASH])
+        return converted, reports
+
+    def put(self, key, converted, path_to_tsv_file, reports):
+        """
+        Adds conversion of a network to the cache, unless another
+        run added it first, then evicts least recently used entries
+        if the cache is too big
+
+        :param key: key from :py:func:`get_cache_key`
+        :param converted: tuple (network name, path to CX file,
+                          content hash of network)
+        :param path_to_tsv_file: path to TSV file of network
+        :param reports: report rows of network, as list of
+                        (report name, network name, rows)
+        :return: None
+        """
+        entry_dir = self._get_entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return
+        network_name, path_to_cx_file, network_hash = converted
+
+        parent_dir = os.path.dirname(entry_dir)
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp', dir=parent_dir)
+        try:
+            shutil.copyfile(path_to_tsv_file, os.path.join(tmp_dir, TSV_FILE))
+            shutil.copyfile(path_to_cx_file, os.path.join(tmp_dir, CX_FILE))
+            with open(os.path.join(tmp_dir, ENTRY_FILE), 'w') as f:
+                json.dump({NETWORK_NAME: network_name,
+                           CX_NAME: os.path.basename(path_to_cx_file),
+                           NETWORK_HASH: network_hash,
+                           REPORTS: reports}, f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            # most likely another run added the same entry meanwhile
+            logger.debug('Unable to add cache entry ' + entry_dir + ' : ' + str(e))
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def _get_entries(self):
+        """
+        Gets entries in cache
+        :return: list of (last use time, size in bytes, entry directory)
+        :rtype: list
+        """
+        entries = []
+        for prefix in os.listdir(self._directory):
+            prefix_dir = os.path.join(self._directory, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry_dir, ENTRY_FILE))
+                    size = sum(os.path.getsize(os.path.join(entry_dir, name))
+                               for name in os.listdir(entry_dir))
+                except OSError:
+                    # entry being written or removed by another run
+                    continue
+                entries.append((last_used, size, entry_dir))
+        return entries
+
+    def get_size(self):
+        """
+        Gets size of all entries in cache
+        :return: size in bytes
+        :rtype: int
+        """
+        return sum(size for last_used, size, entry_dir in self._get_entries())
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache
+        is no bigger than its maximum size
+        :return: number of entries removed
+        :rtype: int
+        """
+        entries = sorted(self._get_entries())
+        total_size = sum(size for last_used, size, entry_dir in entries)
+        removed = 0
+        for last_used, size, entry_dir in entries:
+            if total_size <= self._max_size:
+                break
+            logger.debug('Evicting cache entry ' + entry_dir + ' last used ' +
+                         time.ctime(last_used))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            removed += 1
+        return removed
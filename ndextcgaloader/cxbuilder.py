@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+
+"""Builds NiceCX networks from network table rows as directed by a load plan."""
+
+import json
+import math
+import logging
+from array import array
+
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader.hgnc import HGNC_PREFIX
+from ndextcgaloader.hgnc import HGNCSymbolValidator
+
+logger = logging.getLogger(__name__)
+
+NODE_ID_COLUMNS = {'SOURCE': 'NODE_ID',
+                   'TARGET': 'NODE_ID_B'}
+"""
+Node name column in load plan => column holding the unique id of the
+node. Nodes are keyed by id since different nodes can share a name
+"""
+
+GENE_TYPE = 'gene'
+
+CARTESIANLAYOUT_ASPECT_NAME = 'cartesianLayout'
+"""
+Name of CX aspect that contains coordinates for nodes
+"""
+
+LIST_TYPE_PREFIX = 'list_of_'
+
+
+def data_to_type(data, data_type):
+    """
+    Converts **data** to **data_type** the way
+    :py:func:`ndexutil.tsv.tsv2nicecx2.data_to_type` does
+    :param data: string or list of strings
+    :param data_type: CX data type
+    :return: converted value or None if conversion failed
+    """
+    try:
+        if isinstance(data, str):
+            data = data.replace('[', '').replace(']', '')
+            if LIST_TYPE_PREFIX in data_type:
+                data = data.split(',')
+
+        if data_type == 'boolean':
+            if isinstance(data, str):
+                return data.lower() == 'true'
+            return bool(data)
+        if data_type == 'byte':
+            return str(data).encode()
+        if data_type in ('double', 'float'):
+            return float(data)
+        if data_type in ('integer', 'long', 'short'):
+            return int(data)
+        if data_type in ('char', 'string'):
+            return str(data)
+        if data_type == 'list_of_boolean':
+            if isinstance(data[0], str):
+                return [s.lower() == 'true' for s in data]
+            return [bool(s) for s in data]
+        if data_type == 'list_of_byte':
+            return [bytes(s) for s in data]
+        if data_type in ('list_of_double', 'list_of_float'):
+            return [float(s) for s in data]
+        if data_type in ('list_of_integer', 'list_of_long', 'list_of_short'):
+            return [int(s) for s in data]
+        if data_type in ('list_of_char', 'list_of_string'):
+            return [str(s) for s in data]
+        return str(data)
+    except Exception:
+        return None
+
+
+class CartesianLayout(object):
+    """
+    Coordinates of nodes held in two arrays of doubles indexed by
+    CX node id, which networks built here number from 0. Missing
+    coordinates are NaN
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._x = array('d')
+        self._y = array('d')
+
+    def _set(self, coords, cx_node_id, value):
+        """
+        Sets **value** at **cx_node_id** of **coords**,
+        growing both arrays as needed
+        """
+        missing = cx_node_id + 1 - len(coords)
+        if missing > 0:
+            self._x.extend([math.nan] * missing)
+            self._y.extend([math.nan] * missing)
+        coords[cx_node_id] = value
+
+    def set_x(self, cx_node_id, x):
+        """
+        Sets x coordinate of node
+        """
+        self._set(self._x, cx_node_id, x)
+
+    def set_y(self, cx_node_id, y):
+        """
+        Sets y coordinate of node
+        """
+        self._set(self._y, cx_node_id, y)
+
+    def has_node(self, cx_node_id):
+        """
+        :return: True if node has any coordinate
+        :rtype: bool
+        """
+        if cx_node_id >= len(self._x):
+            return False
+        return not (math.isnan(self._x[cx_node_id]) and math.isnan(self._y[cx_node_id]))
+
+    def to_aspect(self):
+        """
+        Gets ``cartesianLayout`` aspect elements for
+        nodes with both coordinates, in node id order
+        :return: list of dicts with node, x and y keys
+        :rtype: list
+        """
+        return [{'node': cx_node_id, 'x': x, 'y': y}
+                for cx_node_id, (x, y) in enumerate(zip(self._x, self._y))
+                if not (math.isnan(x) or math.isnan(y))]
+
+
+class LoadPlanNetworkBuilder(object):
+    """
+    Builds a :py:class:`~ndex2.nice_cx_network.NiceCXNetwork` in one pass
+    over network table rows or data frame records, following the source,
+    target and edge plans of a load plan. Nodes are keyed by NODE_ID and
+    named as they are created. The result matches what
+    :py:func:`ndexutil.tsv.tsv2nicecx2.convert_pandas_to_nice_cx_with_load_plan`
+    produces for the same rows once node ids are swapped back for names.
+    Attributes named in **layout_attributes** are put in the
+    ``cartesianLayout`` aspect instead. Edge property and citation columns
+    are not supported since the loader's load plan has none
+    """
+
+    def __init__(self, load_plan, hgnc_validator=None, layout_attributes=None):
+        """
+        Constructor
+
+        :param load_plan: parsed load plan
+        :type load_plan: dict
+        :param hgnc_validator: checks names of genes for resolvable
+                               represents, if ``None`` one with the
+                               default pattern is used
+        :type hgnc_validator: :py:class:`~ndextcgaloader.hgnc.HGNCSymbolValidator`
+        :param layout_attributes: names of node attributes holding the
+                                  x and y coordinates of nodes
+        :type layout_attributes: tuple
+        :raises ValueError: if load plan uses features not supported
+        """
+        edge_plan = load_plan['edge_plan']
+        for key in ('property_columns', 'citation_id_column'):
+            if edge_plan.get(key):
+                raise ValueError(key + ' in edge_plan is not supported')
+
+        self._context = load_plan.get('context')
+        self._node_plans = []
+        for plan_name in ('source_plan', 'target_plan'):
+            plan = load_plan[plan_name]
+            self._node_plans.append((NODE_ID_COLUMNS[plan['node_name_column']],
+                                     self._get_property_columns(plan)))
+        self._predicate_column = edge_plan.get('predicate_id_column')
+        self._default_predicate = edge_plan.get('default_predicate')
+        self._predicate_prefix = edge_plan.get('predicate_prefix')
+        if hgnc_validator is None:
+            hgnc_validator = HGNCSymbolValidator()
+        self._hgnc_validator = hgnc_validator
+        self._layout_setters = {}
+        if layout_attributes:
+            self._layout_setters = dict(zip(layout_attributes,
+                                            (CartesianLayout.set_x, CartesianLayout.set_y)))
+
+    @staticmethod
+    def _get_property_columns(plan):
+        """
+        Gets property columns of a node plan as dicts, expanding
+        ``name::type`` shorthand entries
+        :param plan: source or target plan
+        :return: list of dicts with column_name, attribute_name and
+                 optionally data_type, delimiter, value_prefix, default_value
+        :rtype: list
+        """
+        columns = []
+        for column in plan.get('property_columns', []):
+            if not isinstance(column, dict):
+                column_split = column.split('::')
+                column = {'column_name': column_split[0],
+                          'attribute_name': column_split[0]}
+                if len(column_split) > 1:
+                    column['data_type'] = column_split[1]
+            columns.append(column)
+        return columns
+
+    @staticmethod
+    def _get_attribute(column, row):
+        """
+        Gets value and type of node attribute for **column** of **row**
+        :return: tuple (value, CX data type), value is None when
+                 the row has no value for the column and False when
+                 the value cannot be converted to the column's data type
+        :rtype: tuple
+        """
+        value = row.get(column.get('column_name'))
+        if value is None and column.get('default_value'):
+            value = column['default_value']
+        if not value:
+            return None, None
+
+        data_type = column.get('data_type')
+        value_prefix = column.get('value_prefix')
+        if column.get('delimiter'):
+            value = [entry.strip() for entry in str(value).split(column['delimiter'])]
+            if data_type:
+                value = data_to_type(value, data_type)
+                if not data_type.startswith(LIST_TYPE_PREFIX):
+                    data_type = LIST_TYPE_PREFIX + data_type
+            else:
+                data_type = 'list_of_string'
+            if value_prefix:
+                value = [value_prefix + ':' + str(v) for v in value]
+        else:
+            if data_type:
+                value = data_to_type(value, data_type)
+                if value is None:
+                    return False, None
+            if value_prefix:
+                value = value_prefix + ':' + str(value)
+
+        if data_type in ('float', 'double'):
+            value = float(value)
+            data_type = 'double'
+        elif data_type in ('list_of_float', 'list_of_double'):
+            data_type = 'list_of_double'
+        elif data_type is None:
+            data_type = 'string'
+        return value, data_type
+
+    def _add_node(self, row, node_plan, network, node_lookup, node_attribute_names,
+                  node_attributes, layout, id_to_gene_dict):
+        """
+        Adds node of **row** described by **node_plan**, or finds it
+        if it was added already, and any attributes it does not have yet.
+        Coordinates go to **layout** rather than to node attributes
+        :return: id of node in network or None if row has no such node
+        :rtype: int
+        """
+        node_id_column, property_columns = node_plan
+        node_id = row.get(node_id_column)
+        if not node_id:
+            return None
+
+        cx_node_id = node_lookup.get(node_id)
+        if cx_node_id is None:
+            cx_node_id = len(node_lookup)
+            node_lookup[node_id] = cx_node_id
+            network.nodes[cx_node_id] = {'@id': cx_node_id,
+                                         'n': id_to_gene_dict[node_id],
+                                         'r': node_id}
+            node_attribute_names[cx_node_id] = set()
+
+        names = node_attribute_names[cx_node_id]
+        for column in property_columns:
+            value, data_type = LoadPlanNetworkBuilder._get_attribute(column, row)
+            if value is False:
+                # conversion failures end attributes for this row
+                break
+            attribute_name = column.get('attribute_name')
+            if value is None or not attribute_name or attribute_name in names:
+                continue
+            names.add(attribute_name)
+            layout_setter = self._layout_setters.get(attribute_name)
+            if layout_setter is not None:
+                layout_setter(layout, cx_node_id, float(value))
+                continue
+            node_attributes.append({'po': cx_node_id, 'n': attribute_name,
+                                    'v': value, 'd': data_type})
+        return cx_node_id
+
+    def _set_represents(self, network, node, layout):
+        """
+        Sets represents of gene nodes named with a valid HGNC
+        symbol to ``hgnc.symbol:<name>`` and removes represents of
+        all other nodes that have attributes or coordinates
+        :return: None
+        """
+        attributes = network.nodeAttributes.get(node['@id'])
+        if not attributes and not layout.has_node(node['@id']):
+            return
+        if not attributes:
+            del node['r']
+            return
+        for attr in attributes:
+            if attr['v'] == GENE_TYPE:
+                if self._hgnc_validator.is_valid(node['n']):
+                    node['r'] = HGNC_PREFIX + node['n']
+                    return
+                break
+        del node['r']
+
+    def build(self, rows, id_to_gene_dict):
+        """
+        Builds network from **rows**
+
+        :param rows: network table rows, dicts of column name => value
+        :type rows: list
+        :param id_to_gene_dict: node id => node name
+        :type id_to_gene_dict: dict
+        :return: network
+        :rtype: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        """
+        network = NiceCXNetwork()
+        if self._context:
+            network.add_network_attribute(name='@context', values=json.dumps(self._context))
+
+        node_lookup = {}
+        node_attribute_names = {}
+        node_attributes = []
+        layout = CartesianLayout()
+        for row in rows:
+            source_id, target_id = [self._add_node(row, node_plan, network, node_lookup,
+                                                   node_attribute_names, node_attributes,
+                                                   layout, id_to_gene_dict)
+                                    for node_plan in self._node_plans]
+            if source_id is None or target_id is None:
+                continue
+
+            predicate = None
+            if self._predicate_column:
+                predicate = row[self._predicate_column]
+            if not predicate:
+                predicate = self._default_predicate
+            if not predicate:
+                raise RuntimeError('Value for predicate string is not found in this row.')
+            if self._predicate_prefix:
+                predicate = self._predicate_prefix + ':' + predicate
+
+            edge_id = len(network.edges)
+            network.edges[edge_id] = {'@id': edge_id, 's': source_id, 't': target_id,
+                                      'i': predicate}
+
+        for attribute in node_attributes:
+            network.nodeAttributes.setdefault(attribute['po'], []).append(attribute)
+
+        for node in network.nodes.values():
+            self._set_represents(network, node, layout)
+
+        coordinates = layout.to_aspect()
+        if coordinates:
+            network.set_opaque_aspect(CARTESIANLAYOUT_ASPECT_NAME, coordinates)
+
+        network.node_int_id_generator = max(len(network.nodes), 1)
+        network.edge_int_id_generator = max(len(network.edges), 1)
+        return network
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+"""Streams NiceCX networks to CX files one aspect at a time."""
+
+import os
+import gzip
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CX_SUFFIX = '.cx'
+GZIP_SUFFIX = '.gz'
+
+NUMBER_VERIFICATION = {'numberVerification': [{'longNumber': 281474976710655}]}
+STATUS = {'status': [{'error': '', 'success': True}]}
+
+INDENT = 4
+"""
+Indent of pretty printed CX, the one ``json.dump(cx, f, indent=4)`` uses
+"""
+
+COMPACT_SEPARATORS = (',', ':')
+
+NATIVE_ASPECTS = ['nodes', 'edges', 'networkAttributes', 'nodeAttributes',
+                  'edgeAttributes']
+"""
+Aspects streamed straight from the network, in the order
+:py:meth:`~ndex2.nice_cx_network.NiceCXNetwork.to_cx` writes them
+"""
+
+GENERATED_ASPECTS = ['citations', 'nodeCitations', 'edgeCitations',
+                     'supports', 'edgeSupports']
+"""
+Aspects, written after native ones, that are assembled by
+:py:meth:`~ndex2.nice_cx_network.NiceCXNetwork.generate_aspect`
+"""
+
+
+def _get_element_count(elements):
+    """
+    Counts elements of a native aspect stored as a dict of lists
+    or single elements, or as a list
+    """
+    if isinstance(elements, dict):
+        return sum(len(e) if isinstance(e, list) else 1 for e in elements.values())
+    return len(elements)
+
+
+def _iter_elements(elements):
+    """
+    Iterates over elements of a native aspect without copying them
+    """
+    if isinstance(elements, dict):
+        for element in elements.values():
+            if isinstance(element, list):
+                for item in element:
+                    yield item
+            else:
+                yield element
+    else:
+        for element in elements:
+            yield element
+
+
+def get_aspects(network):
+    """
+    Gets aspects of **network** in the order
+    :py:meth:`~ndex2.nice_cx_network.NiceCXNetwork.to_cx` writes them,
+    updating the network's metadata just like it does. Native aspects
+    are not copied, so metadata is complete before any aspect is written
+
+    :param network: network
+    :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+    :return: list of tuples (aspect name, elements). Elements are a list,
+             tuple, dict to flatten, or bytes for opaque aspects
+    :rtype: list
+    """
+    aspects = []
+    for aspect_name in NATIVE_ASPECTS:
+        elements = getattr(network, aspect_name)
+        if not elements:
+            continue
+        element_count = _get_element_count(elements)
+        network.metadata[aspect_name] = {'name': aspect_name,
+                                         'elementCount': element_count,
+                                         'idCounter': element_count,
+                                         'version': '1.0',
+                                         'consistencyGroup': 1,
+                                         'properties': []}
+        aspects.append((aspect_name, elements))
+
+    for aspect_name in GENERATED_ASPECTS:
+        if getattr(network, aspect_name):
+            aspects.append((aspect_name, network.generate_aspect(aspect_name)[aspect_name]))
+
+    for aspect_name, elements in network.opaqueAspects.items():
+        aspect_metadata = network.metadata.get(aspect_name)
+        if aspect_metadata:
+            aspect_metadata['elementCount'] = len(elements)
+        else:
+            network.metadata[aspect_name] = {'name': aspect_name,
+                                             'elementCount': len(elements),
+                                             'idCounter': len(elements) + 1,
+                                             'properties': []}
+        aspects.append((aspect_name, elements))
+    return aspects
+
+
+class CXWriter(object):
+    """
+    Writes a network as CX to a text file handle one aspect, and one
+    element, at a time instead of building the whole CX document first.
+    Output is compact by default. Pretty printed output is identical to
+    ``json.dump(network.to_cx(), f, indent=4)``
+    """
+
+    def __init__(self, out, pretty=False):
+        """
+        Constructor
+
+        :param out: text file handle to write to
+        :param pretty: if True, indent output
+        :type pretty: bool
+        """
+        self._out = out
+        self._pretty = pretty
+        self._fragment_count = 0
+
+    def _dumps(self, value, level):
+        """
+        Serializes **value** found **level** levels deep in the document
+        :rtype: string
+        """
+        if not self._pretty:
+            return json.dumps(value, separators=COMPACT_SEPARATORS)
+        return json.dumps(value, indent=INDENT).replace('\n', '\n' + ' ' * (INDENT * level))
+
+    def _newline(self, level):
+        """
+        :return: line break and indent of **level**, or nothing if compact
+        :rtype: string
+        """
+        if not self._pretty:
+            return ''
+        return '\n' + ' ' * (INDENT * level)
+
+    def _start_fragment(self, aspect_name):
+        """
+        Writes start of aspect fragment ``{"<aspect_name>": ``
+        """
+        if self._fragment_count == 0:
+            self._out.write('[')
+        else:
+            self._out.write(',')
+        self._fragment_count += 1
+        self._out.write(self._newline(1) + '{' + self._newline(2) +
+                        json.dumps(aspect_name) + (': ' if self._pretty else ':'))
+
+    def _end_fragment(self):
+        """
+        Writes end of aspect fragment
+        """
+        self._out.write(self._newline(1) + '}')
+
+    def write_fragment(self, aspect_name, elements):
+        """
+        Writes aspect fragment holding **elements**
+        :param aspect_name: name of aspect
+        :param elements: iterable of aspect elements
+        :return: None
+        """
+        self._start_fragment(aspect_name)
+        count = 0
+        for element in elements:
+            self._out.write(('[' if count == 0 else ',') + self._newline(3) +
+                            self._dumps(element, 3))
+            count += 1
+        if count == 0:
+            self._out.write('[]')
+        else:
+            self._out.write(self._newline(2) + ']')
+        self._end_fragment()
+
+    def write_preserialized_fragment(self, aspect_name, blob):
+        """
+        Writes aspect fragment whose elements, **blob**, are
+        already serialized as a JSON list
+        :param aspect_name: name of aspect
+        :param blob: JSON list of aspect elements
+        :return: None
+        """
+        self._start_fragment(aspect_name)
+        self._out.write(blob)
+        self._end_fragment()
+
+    def write_network(self, network, preserialized=None):
+        """
+        Writes **network** as a complete CX document
+
+        :param network: network
+        :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        :param preserialized: aspect name => elements serialized as a
+                              JSON list, written as is in compact output
+                              instead of the aspect's elements
+        :type preserialized: dict
+        :return: None
+        """
+        if preserialized is None or self._pretty:
+            preserialized = {}
+        aspects = get_aspects(network)
+
+        self.write_fragment('numberVerification', NUMBER_VERIFICATION['numberVerification'])
+        if network.metadata:
+            self.write_fragment('metaData', network.metadata.values())
+
+        for aspect_name, elements in aspects:
+            if aspect_name in preserialized:
+                self.write_preserialized_fragment(aspect_name, preserialized[aspect_name])
+            elif isinstance(elements, bytes):
+                self.write_fragment(aspect_name, [elements.decode('ascii')])
+            else:
+                self.write_fragment(aspect_name, _iter_elements(elements))
+
+        if network.metadata:
+            self.write_fragment('status', STATUS['status'])
+        self._out.write(self._newline(0) + ']')
+
+
+def get_cx_path(directory, network_name, gzip_output=False):
+    """
+    Gets path of CX file of network **network_name**
+    :param directory: directory holding CX files
+    :param network_name: name of network
+    :param gzip_output: if True, path of gzip compressed CX file
+    :return: path ending in ``.cx`` or ``.cx.gz``
+    :rtype: string
+    """
+    path = os.path.join(directory, network_name + CX_SUFFIX)
+    if gzip_output:
+        path += GZIP_SUFFIX
+    return path
+
+
+def save_cx(network, path, pretty=False, gzip_output=False, preserialized=None):
+    """
+    Streams **network** as CX to **path**, optionally gzip compressed.
+    Output goes to a temporary file in the same directory that
+    replaces **path** only once it is complete
+
+    :param network: network
+    :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+    :param path: path of CX file
+    :param pretty: if True, indent output
+    :param gzip_output: if True, compress output with gzip
+    :param preserialized: see :py:meth:`CXWriter.write_network`
+    :return: **path**
+    :rtype: string
+    """
+    tmp_path = path + '.tmp'
+    try:
+        if gzip_output:
+            out = gzip.open(tmp_path, 'wt', encoding='utf-8')
+        else:
+            out = open(tmp_path, 'w')
+        with out:
+            CXWriter(out, pretty=pretty).write_network(network, preserialized=preserialized)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+"""Pandas-free conversion of parsed PathwayMapper networks into edge tables."""
+
+import csv
+import io
+import logging
+
+from ndextcgaloader.hgnc import HGNCSymbolValidator
+
+logger = logging.getLogger(__name__)
+
+# Simple dictionary mapping values in type field to
+# normalized values
+NODE_TYPE_MAPPING = {'GENE': 'gene',
+                     'FAMILY': 'proteinfamily',
+                     'COMPLEX': 'complex',
+                     'PROCESS': 'biologicalprocess',  # PROCESS is not in vocabulary, so we keep it as is
+                     'COMPARTMENT': 'compartment'  # COMPARTMENT is not in vocabulary, so we keep it as is
+                     }
+
+COMPOUND_NODE_TYPES = [NODE_TYPE_MAPPING['FAMILY'],
+                       NODE_TYPE_MAPPING['COMPLEX'],
+                       NODE_TYPE_MAPPING['COMPARTMENT']]
+"""
+Normalized types of nodes that have other nodes as members
+"""
+
+UNNAMED_NODE_TYPES = ['proteinfamily', 'compartment', 'complex']
+"""
+Normalized types of nodes that are named after their members
+when they have no name
+"""
+
+EDGE_COLUMNS = ['EDGE_ID', 'SOURCE', 'TARGET', 'EDGE_TYPE']
+SOURCE_NODE_COLUMNS = ['NODE_ID', 'NODE_TYPE', 'PARENT_ID', 'POSX', 'POSY']
+TARGET_NODE_COLUMNS = ['NODE_ID_B', 'NODE_TYPE_B', 'PARENT_ID_B', 'POSX_B', 'POSY_B']
+NETWORK_TABLE_COLUMNS = EDGE_COLUMNS + SOURCE_NODE_COLUMNS + TARGET_NODE_COLUMNS
+"""
+Columns of a network table, one row per edge plus one row per
+node kept without edges. MEMBER and MEMBER_B are appended when the
+network has family, complex or compartment nodes
+"""
+
+NAN = 'nan'
+"""
+Text a missing value becomes when the joined edge and node
+tables are converted to strings
+"""
+
+
+def get_edge_rank(edges, node_ids):
+    """
+    Gets the position of each edge in a network table. Edges are
+    grouped by source node, groups ordered by first appearance of the
+    source and edges kept in file order within a group. Edges whose
+    source is not a known node follow, grouped the same way by target.
+    This is the order networks have always been generated in, made
+    explicit so it does not depend on how a pandas release orders joins
+
+    :param edges: (edge id, source node id, target node id) tuples in file order
+    :type edges: list
+    :param node_ids: ids of nodes in the network
+    :type node_ids: set
+    :return: edge id => sort key
+    :rtype: dict
+    """
+    first_source = {}
+    first_target = {}
+    for pos, (edge_id, source, target) in enumerate(edges):
+        if source in node_ids:
+            first_source.setdefault(source, pos)
+        if target in node_ids:
+            first_target.setdefault(target, pos)
+
+    rank = {}
+    for pos, (edge_id, source, target) in enumerate(edges):
+        if source in node_ids:
+            rank[edge_id] = (0, first_source[source], pos)
+        elif target in node_ids:
+            rank[edge_id] = (1, first_target[target], pos)
+    return rank
+
+
+def get_top_level_parents(nested_nodes_map):
+    """
+    Resolves every nested node to its closest ancestor that is
+    not nested itself, however deep the nesting. Each chain of
+    parents is walked once; every node on it is then mapped straight
+    to the ancestor found (path compression), so later lookups stop
+    at the first node already resolved
+
+    :param nested_nodes_map: nested node id => parent id
+    :type nested_nodes_map: dict
+    :return: nested node id => id of top level ancestor
+    :rtype: dict
+    """
+    top_level_parents = {}
+    for node_id in nested_nodes_map:
+        path = []
+        on_path = set()
+        current = node_id
+        while current in nested_nodes_map and current not in top_level_parents:
+            if current in on_path:
+                logger.warning('Nested nodes form a cycle at node ' + str(current))
+                break
+            path.append(current)
+            on_path.add(current)
+            current = nested_nodes_map[current]
+        top_level_parent = top_level_parents.get(current, current)
+        for path_node_id in path:
+            top_level_parents[path_node_id] = top_level_parent
+    return top_level_parents
+
+
+def get_name_for_unnamed_node(node_type, member):
+    """
+    Builds name such as ``family [ A B C D ... ]`` for a family,
+    complex or compartment node from its member attribute
+    :param node_type: normalized node type
+    :param member: ``|`` delimited member attribute value
+    :return: name or None if **member** is empty
+    :rtype: string
+    """
+    member_proteins = []
+    for protein_symbol in member.split('|'):
+        protein_array = protein_symbol.split(':')
+        if len(protein_array) > 1:
+            member_proteins.append(protein_array[1])
+        else:
+            member_proteins.append(protein_array[0])
+
+    if not member_proteins:
+        return None
+
+    member_proteins.sort()
+
+    if len(member_proteins) > 4:
+        member_proteins_str = " ".join(member_proteins[0:4]) + ' ...'
+    else:
+        member_proteins_str = " ".join(member_proteins)
+
+    node_name = 'family' if (node_type == 'proteinfamily') else node_type
+
+    return node_name + ' [ ' + member_proteins_str + ' ]'
+
+
+class NetworkTable(object):
+    """
+    Plain list based network table, the pandas-free counterpart of
+    the data frame built by
+    :py:meth:`~ndextcgaloader.ndexloadtcga.NDExNdextcgaloaderLoader.get_pandas_dataframe`
+    """
+
+    def __init__(self, columns, rows):
+        """
+        Constructor
+
+        :param columns: column names
+        :type columns: list
+        :param rows: one dict of column name => string value per row
+        :type rows: list
+        """
+        self.columns = columns
+        self.rows = rows
+
+    def to_tsv(self):
+        """
+        Gets table as tab delimited text, formatted the same
+        way as :py:meth:`pandas.DataFrame.to_csv` formats the
+        data frame (leading index column included)
+        :rtype: string
+        """
+        out = io.StringIO()
+        writer = csv.writer(out, delimiter='\t', lineterminator='\n')
+        if not self.columns:
+            writer.writerow([''])
+            return out.getvalue()
+        writer.writerow([''] + self.columns)
+        for index, row in enumerate(self.rows):
+            writer.writerow([index] + [row.get(c, '') for c in self.columns])
+        return out.getvalue()
+
+
+class TableEngine(object):
+    """
+    Converts a :py:class:`~ndextcgaloader.parser.ParsedPathway` into a
+    :py:class:`NetworkTable` with plain dicts and lists. The rows match,
+    value for value, those the pandas based conversion produces
+    """
+
+    def __init__(self, hgnc_validator=None):
+        """
+        Constructor
+
+        :param hgnc_validator: checks names of genes, if ``None``
+                               one with the default pattern is used
+        :type hgnc_validator: :py:class:`~ndextcgaloader.hgnc.HGNCSymbolValidator`
+        """
+        if hgnc_validator is None:
+            hgnc_validator = HGNCSymbolValidator()
+        self._hgnc_validator = hgnc_validator
+
+    def get_invalid_protein_names(self, nodes):
+        """
+        Gets names of GENE nodes that are not valid HGNC symbols
+        :param nodes: node dicts
+        :return: sorted names
+        :rtype: list
+        """
+        names = [n['NODE'] for n in nodes
+                 if n['NODE_TYPE'] == 'GENE' and not self._hgnc_validator.is_valid(n['NODE'])]
+        names.sort()
+        return names
+
+    def get_nested_nodes(self, nodes):
+        """
+        Finds nodes other than GENE that have a parent
+
+        :param nodes: node dicts
+        :return: tuple (report rows of (name, type, parent name, parent type),
+                 dict of nested node id => parent id in node order)
+        :rtype: tuple
+        """
+        by_id = {}
+        for node in nodes:
+            by_id.setdefault(node['NODE_ID'], node)
+
+        report = []
+        nested_nodes_ids = {}
+        for node in nodes:
+            if node['NODE_TYPE'] == 'GENE' or node['PARENT_ID'] == '-1':
+                continue
+            parent = by_id.get(node['PARENT_ID'])
+            if parent is None:
+                raise TypeError('Parent ' + str(node['PARENT_ID']) + ' of nested node ' +
+                                str(node['NODE_ID']) + ' not found')
+            report.append((node['NODE'], node['NODE_TYPE'], parent['NODE'], parent['NODE_TYPE']))
+            nested_nodes_ids[node['NODE_ID']] = node['PARENT_ID']
+        return report, nested_nodes_ids
+
+    def normalize_nodes(self, nodes, nested_nodes_map):
+        """
+        Removes nested nodes and hands their children over to
+        their top level ancestor, see :py:func:`get_top_level_parents`
+        :param nodes: node dicts
+        :param nested_nodes_map: nested node id => parent id
+        :return: new list of node dicts
+        :rtype: list
+        """
+        top_level_parents = get_top_level_parents(nested_nodes_map)
+
+        normalized = []
+        for node in nodes:
+            if node['NODE_ID'] in top_level_parents:
+                continue
+            parent_id = top_level_parents.get(node['PARENT_ID'])
+            if parent_id is not None:
+                node = dict(node)
+                node['PARENT_ID'] = parent_id
+            normalized.append(node)
+        return normalized
+
+    def _get_members(self, rows):
+        """
+        Gets member attribute values keyed by the id of the
+        parent node they belong to
+        :param rows: network table rows
+        :return: parent id => set of member attribute values
+        :rtype: dict
+        """
+        members = {}
+        member_names = {}
+        for row in rows:
+            for parent_col, name_col in (('PARENT_ID', 'SOURCE'), ('PARENT_ID_B', 'TARGET')):
+                name = row[name_col]
+                if name == NAN:
+                    continue
+                parent_id = row[parent_col]
+                member_set = members.get(parent_id)
+                if member_set is None:
+                    member_set = set()
+                    members[parent_id] = member_set
+                member_name = member_names.get(name)
+                if member_name is None:
+                    member_name = self._hgnc_validator.prefix_symbol(name)
+                    member_names[name] = member_name
+                member_set.add(member_name)
+        return members
+
+    def _join_edges_and_nodes(self, edges, nodes, id_to_gene_dict):
+        """
+        Builds one row per edge holding the edge and both of its nodes
+        :return: rows
+        :rtype: list
+        """
+        nodes_by_id = {}
+        for node in nodes:
+            nodes_by_id.setdefault(node['NODE_ID'], []).append(node)
+
+        rank = get_edge_rank([(e['EDGE_ID'], e['SOURCE'], e['TARGET']) for e in edges],
+                             nodes_by_id)
+        ranked_edges = sorted([e for e in edges if e['EDGE_ID'] in rank],
+                              key=lambda e: rank[e['EDGE_ID']])
+
+        rows = []
+        for edge in ranked_edges:
+            for b in nodes_by_id[edge['TARGET']]:
+                for a in nodes_by_id.get(edge['SOURCE'], [None]):
+                    row = {'EDGE_ID': str(edge['EDGE_ID'])}
+                    if a is None:
+                        for col in ('SOURCE', 'TARGET', 'EDGE_TYPE') + tuple(SOURCE_NODE_COLUMNS):
+                            row[col] = NAN
+                    else:
+                        row['SOURCE'] = str(edge['SOURCE'])
+                        row['TARGET'] = str(edge['TARGET'])
+                        row['EDGE_TYPE'] = str(edge['EDGE_TYPE'])
+                        row['NODE_ID'] = str(a['NODE'])
+                        for col in ('NODE_TYPE', 'PARENT_ID', 'POSX', 'POSY'):
+                            row[col] = str(a[col])
+                    row['NODE_ID_B'] = str(b['NODE'])
+                    for col, b_col in zip(('NODE_TYPE', 'PARENT_ID', 'POSX', 'POSY'),
+                                          ('NODE_TYPE_B', 'PARENT_ID_B', 'POSX_B', 'POSY_B')):
+                        row[b_col] = str(b[col])
+
+                    row['NODE_TYPE'] = NODE_TYPE_MAPPING.get(row['NODE_TYPE'], 'other')
+                    row['NODE_TYPE_B'] = NODE_TYPE_MAPPING.get(row['NODE_TYPE_B'], '')
+                    row['EDGE_TYPE'] = row['EDGE_TYPE'].lower()
+
+                    # NODE_ID columns take the ids, SOURCE and TARGET the names
+                    row['NODE_ID'] = row['SOURCE']
+                    row['NODE_ID_B'] = row['TARGET']
+                    if a is None:
+                        # edges whose source is not a node get no names
+                        row['SOURCE'] = ''
+                        row['TARGET'] = ''
+                    else:
+                        row['SOURCE'] = _none_to_empty(id_to_gene_dict.get(edge['SOURCE']))
+                        row['TARGET'] = _none_to_empty(id_to_gene_dict.get(edge['TARGET']))
+                    rows.append(row)
+        return rows
+
+    def _name_unnamed_nodes(self, rows, id_to_gene_dict, sides):
+        """
+        Names family, complex and compartment nodes that have no name
+        after their members, updating **id_to_gene_dict** once all
+        nodes are named. Each node is examined once, on the first row
+        it appears in, since all its rows hold the same values
+        :param sides: tuples (node type, name, member, node id column)
+        """
+        seen = set()
+        names = {}
+        for row in rows:
+            for node_type_col, name_col, member_col, node_id_col in sides:
+                node_id = row[node_id_col]
+                if node_id in seen:
+                    continue
+                seen.add(node_id)
+                node_type = row[node_type_col]
+                if node_type not in UNNAMED_NODE_TYPES:
+                    continue
+                name = row[name_col]
+                if name and name.strip() and (name.lower() != 'undefined'):
+                    continue
+                member = row[member_col]
+                if not member:
+                    continue
+                new_name = get_name_for_unnamed_node(node_type, member)
+                if new_name is not None:
+                    names[node_id] = new_name
+        id_to_gene_dict.update(names)
+
+    def convert(self, pathway):
+        """
+        Converts **pathway** into a network table
+
+        :param pathway: parsed network
+        :type pathway: :py:class:`~ndextcgaloader.parser.ParsedPathway`
+        :return: tuple (:py:class:`NetworkTable`, id_to_gene_dict,
+                 invalid protein names, list of nested nodes report rows)
+        :rtype: tuple
+        """
+        node_fields = ['NODE' if f == 'NODE_NAME' else f for f in pathway.node_fields]
+        nodes = [dict(zip(node_fields, values)) for values in pathway.iter_nodes()]
+
+        edge_fields = ['EDGE_TYPE' if f == 'EDGE_TYPEINTERACTION_PUBMED_ID' else f
+                       for f in pathway.edge_fields]
+
+        id_to_gene_dict = dict(zip(pathway.get_node_column('NODE_ID'), pathway.node_columns[0]))
+
+        invalid_protein_names = self.get_invalid_protein_names(nodes)
+
+        # normalizing removes every nested node, so one pass is enough
+        nested_nodes, nested_nodes_map = self.get_nested_nodes(nodes)
+        if nested_nodes_map:
+            nodes = self.normalize_nodes(nodes, nested_nodes_map)
+
+        # drop duplicate edges: edges that have the same source, target and type
+        edges = []
+        seen = set()
+        for values in pathway.iter_edges():
+            edge = dict(zip(edge_fields, values))
+            key = (edge['SOURCE'], edge['TARGET'], edge['EDGE_TYPE'])
+            if key in seen:
+                continue
+            seen.add(key)
+            edges.append(edge)
+
+        rows = self._join_edges_and_nodes(edges, nodes, id_to_gene_dict)
+
+        nodes_with_edges_ids = set()
+        for row in rows:
+            nodes_with_edges_ids.add(row['NODE_ID'])
+            nodes_with_edges_ids.add(row['NODE_ID_B'])
+
+        for node in nodes:
+            if node['NODE_ID'] in nodes_with_edges_ids:
+                continue
+            row = dict.fromkeys(NETWORK_TABLE_COLUMNS, '')
+            row['NODE_ID'] = node['NODE_ID']
+            row['SOURCE'] = _none_to_empty(node['NODE'])
+            row['NODE_TYPE'] = NODE_TYPE_MAPPING.get(node['NODE_TYPE'], '')
+            for col in ('PARENT_ID', 'POSX', 'POSY'):
+                row[col] = _none_to_empty(node[col])
+            rows.append(row)
+
+        columns = list(NETWORK_TABLE_COLUMNS)
+        members = None
+        for node_type_col, node_id_col, member_col in (('NODE_TYPE', 'NODE_ID', 'MEMBER'),
+                                                       ('NODE_TYPE_B', 'NODE_ID_B', 'MEMBER_B')):
+            if not any(row[node_type_col] in COMPOUND_NODE_TYPES for row in rows):
+                continue
+            if members is None:
+                members = self._get_members(rows)
+            columns.append(member_col)
+            for row in rows:
+                member_set = None
+                if row[node_type_col] in COMPOUND_NODE_TYPES:
+                    member_set = members.get(row[node_id_col])
+                row[member_col] = '|'.join(sorted(member_set)) if member_set else ''
+
+        # keep edges and nodes without edges that are not genes and have no parent
+        rows = [row for row in rows
+                if row['EDGE_ID'] != '' or
+                (row['NODE_TYPE'] != 'gene' and row['PARENT_ID'] == '-1')]
+
+        sides = [side for side in (('NODE_TYPE', 'SOURCE', 'MEMBER', 'NODE_ID'),
+                                   ('NODE_TYPE_B', 'TARGET', 'MEMBER_B', 'NODE_ID_B'))
+                 if side[2] in columns]
+        self._name_unnamed_nodes(rows, id_to_gene_dict, sides)
+
+        return NetworkTable(columns, rows), id_to_gene_dict, invalid_protein_names, nested_nodes
+
+
+def _none_to_empty(value):
+    """
+    :return: '' if **value** is None otherwise **value**
+    """
+    if value is None:
+        return ''
+    return value
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Validation of HGNC gene symbols."""
+
+import re
+import logging
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# HGNC Symbol Identifier Pattern defined at https://www.ebi.ac.uk/miriam/main/datatypes/MIR:00000362
+HGNC_REGEX = r'^[A-Za-z-0-9_]+(\@)?$'
+
+HGNC_PREFIX = 'hgnc.symbol:'
+"""
+Prefix of represents and member values that are HGNC symbols
+"""
+
+DEFAULT_CACHE_SIZE = 8192
+"""
+Default number of symbols whose validity is remembered
+"""
+
+
+class HGNCSymbolValidator(object):
+    """
+    Checks names against the HGNC symbol pattern, compiled once.
+    Results are remembered per symbol in a bounded least recently
+    used cache, so symbols repeated across the networks of a run
+    are only matched once. Instances can be shared by threads
+    """
+
+    def __init__(self, regex=HGNC_REGEX, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Constructor
+
+        :param regex: pattern valid symbols match
+        :type regex: string
+        :param cache_size: maximum number of symbols to remember
+        :type cache_size: int
+        """
+        self._pattern = re.compile(regex)
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _get_cached(self, symbol):
+        """
+        Gets remembered validity of **symbol**, marking it
+        as most recently used. Must be called with lock held
+        :return: True, False or None if not remembered
+        """
+        valid = self._cache.get(symbol)
+        if valid is not None:
+            self._cache.move_to_end(symbol)
+            self._hits += 1
+        return valid
+
+    def _set_cached(self, symbol, valid):
+        """
+        Remembers validity of **symbol**, dropping the least
+        recently used symbol if cache is full. Must be called with lock held
+        """
+        self._misses += 1
+        if self._cache_size <= 0:
+            return
+        self._cache[symbol] = valid
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def is_valid(self, symbol):
+        """
+        Checks if **symbol** is a valid HGNC symbol
+        :param symbol: name to check
+        :type symbol: string
+        :return: True if valid
+        :rtype: bool
+        """
+        with self._lock:
+            valid = self._get_cached(symbol)
+            if valid is None:
+                valid = self._pattern.match(symbol) is not None
+                self._set_cached(symbol, valid)
+        return valid
+
+    def get_valid_mask(self, symbols):
+        """
+        Checks every value of **symbols** at once. Distinct values
+        not seen before are matched together with ``str.match`` and
+        remembered; all values are then looked up in one ``map``.
+        Missing values are not valid
+
+        :param symbols: names to check
+        :type symbols: :py:class:`pandas.Series`
+        :return: True where value is a valid HGNC symbol
+        :rtype: :py:class:`pandas.Series` of bool
+        """
+        distinct = pd.unique(symbols.dropna())
+        validity = {}
+        with self._lock:
+            unknown = []
+            for symbol in distinct:
+                valid = self._get_cached(symbol)
+                if valid is None:
+                    unknown.append(symbol)
+                else:
+                    validity[symbol] = valid
+            if unknown:
+                matches = pd.Series(unknown, dtype=object).str.match(self._pattern)
+                for symbol, valid in zip(unknown, matches):
+                    valid = bool(valid) if valid == valid else False
+                    validity[symbol] = valid
+                    self._set_cached(symbol, valid)
+        return symbols.map(validity).fillna(False).astype(bool)
+
+    def prefix_symbol(self, name):
+        """
+        Gets **name** prefixed with ``hgnc.symbol:`` if it is a valid
+        HGNC symbol, otherwise **name** as is
+        :param name: name of gene
+        :return: possibly prefixed name
+        :rtype: string
+        """
+        if self.is_valid(name):
+            return HGNC_PREFIX + name
+        return name
+
+    def get_cache_info(self):
+        """
+        Gets usage statistics of the symbol cache
+        :return: dict with hits, misses, size and maxsize keys
+        :rtype: dict
+        """
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses,
+                    'size': len(self._cache), 'maxsize': self._cache_size}
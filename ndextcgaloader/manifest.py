@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""Download manifest used to issue conditional requests for network files."""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = '.download_manifest.json'
+"""
+Name of manifest file written to the data directory
+"""
+
+ETAG = 'etag'
+LAST_MODIFIED = 'last_modified'
+SIZE = 'size'
+SHA256 = 'sha256'
+
+
+def get_sha256(data):
+    """
+    Gets hex digest of sha256 hash of **data**
+    :param data: data to hash
+    :type data: bytes
+    :return: hex digest
+    :rtype: string
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class DownloadManifest(object):
+    """
+    Keeps ETag, Last-Modified, size and sha256 of every network
+    file downloaded into a directory so later runs can send
+    conditional requests and skip files the server reports
+    as unchanged (HTTP 304)
+    """
+
+    def __init__(self, directory):
+        """
+        Constructor
+
+        :param directory: data directory the manifest describes
+        :type directory: string
+        """
+        self._directory = directory
+        self._path = os.path.join(directory, MANIFEST_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_path(self):
+        """
+        Gets path to manifest file
+        :return: path to manifest file
+        :rtype: string
+        """
+        return self._path
+
+    def load(self):
+        """
+        Loads manifest from disk. A missing or unreadable
+        manifest results in an empty manifest
+        :return: None
+        """
+        self._entries = {}
+        if not os.path.isfile(self._path):
+            return
+        try:
+            with open(self._path, 'r') as f:
+                self._entries = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning('Ignoring unreadable manifest ' +
+                           self._path + ' : ' + str(e))
+
+    def save(self):
+        """
+        Writes manifest to disk, replacing the previous
+        copy atomically
+        :return: None
+        """
+        tmp_path = self._path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    def get_entry(self, file_name):
+        """
+        Gets manifest entry for **file_name**
+        :param file_name: name of network file
+        :return: dict with etag, last_modified, size and sha256 keys or None
+        :rtype: dict
+        """
+        with self._lock:
+            return self._entries.get(file_name)
+
+    def remove_entry(self, file_name):
+        """
+        Removes manifest entry for **file_name** if it exists
+        :param file_name: name of network file
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(file_name, None)
+
+    def _is_local_copy_valid(self, file_name, entry):
+        """
+        Checks that the file on disk is the one described by **entry**
+        so a 304 response can safely reuse it
+        :return: True if file exists with matching size and hash
+        :rtype: bool
+        """
+        path = os.path.join(self._directory, file_name)
+        if not os.path.isfile(path):
+            return False
+        if os.path.getsize(path) != entry.get(SIZE):
+            return False
+        with open(path, 'rb') as f:
+            return get_sha256(f.read()) == entry.get(SHA256)
+
+    def get_conditional_headers(self, file_name):
+        """
+        Gets If-None-Match and If-Modified-Since headers for
+        **file_name**. No headers are returned if the file is not
+        in the manifest or the copy on disk no longer matches it
+        :param file_name: name of network file
+        :return: request headers
+        :rtype: dict
+        """
+        entry = self.get_entry(file_name)
+        if entry is None:
+            return {}
+
+        if not self._is_local_copy_valid(file_name, entry):
+            logger.debug('Local copy of ' + file_name +
+                         ' does not match manifest, fetching it in full')
+            return {}
+
+        headers = {}
+        if entry.get(ETAG):
+            headers['If-None-Match'] = entry[ETAG]
+        if entry.get(LAST_MODIFIED):
+            headers['If-Modified-Since'] = entry[LAST_MODIFIED]
+        return headers
+
+    def update_entry(self, file_name, response_headers, data):
+        """
+        Records validators from **response_headers** along with
+        size and hash of **data** as written to disk
+        :param file_name: name of network file
+        :param response_headers: headers of the response the file came from
+        :param data: bytes written to disk
+        :type data: bytes
+        :return: None
+        """
+        entry = {ETAG: response_headers.get('ETag'),
+                 LAST_MODIFIED: response_headers.get('Last-Modified'),
+                 SIZE: len(data),
+                 SHA256: get_sha256(data)}
+        with self._lock:
+            self._entries[file_name] = entry
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""Per network, per stage metrics of a loader run."""
+
+import os
+import json
+import time
+import logging
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_STAGE = 'download'
+PARSE_STAGE = 'parse'
+MEMBERS_STAGE = 'member_properties'
+NESTED_NODES_STAGE = 'nested_nodes'
+CX_BUILD_STAGE = 'cx_build'
+STYLE_STAGE = 'style'
+SERIALIZATION_STAGE = 'serialization'
+UPLOAD_STAGE = 'upload'
+
+CONVERSION_STAGES = [PARSE_STAGE, MEMBERS_STAGE, NESTED_NODES_STAGE, CX_BUILD_STAGE,
+                     STYLE_STAGE, SERIALIZATION_STAGE]
+"""
+Stages of conversion of a network file, in the order they run
+"""
+
+STAGES = [DOWNLOAD_STAGE] + CONVERSION_STAGES + [UPLOAD_STAGE]
+
+NETWORK = 'network'
+STAGE = 'stage'
+WALL_TIME = 'wall'
+CPU_TIME = 'cpu'
+BYTES_DOWNLOADED = 'bytes_downloaded'
+BYTES_WRITTEN = 'bytes_written'
+NODES = 'nodes'
+EDGES = 'edges'
+MEMBERS = 'members'
+LATENCY = 'latency'
+FAILED = 'failed'
+
+MEMBER_ATTRIBUTE = 'member'
+
+SUMMARY_NETWORKS = 5
+"""
+Number of slowest networks listed in summary
+"""
+
+
+class StageTimer(object):
+    """
+    Adds up wall and CPU time of the calling thread spent in named
+    stages. Time spent in a stage entered while another one runs only
+    counts towards the inner stage, so the times of all stages add up
+    to the time spent in any of them
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._times = {}
+        self._cpu_times = {}
+        self._running = []
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """
+        Times the body of a ``with`` statement as **stage**
+        :param stage: name of stage
+        """
+        # stage, start times, times spent in inner stages
+        running = [stage, time.perf_counter(), time.thread_time(), 0.0, 0.0]
+        self._running.append(running)
+        try:
+            yield
+        finally:
+            self._running.pop()
+            elapsed = time.perf_counter() - running[1]
+            cpu_elapsed = time.thread_time() - running[2]
+            self._times[stage] = self._times.get(stage, 0.0) + elapsed - running[3]
+            self._cpu_times[stage] = self._cpu_times.get(stage, 0.0) + cpu_elapsed - running[4]
+            if self._running:
+                self._running[-1][3] += elapsed
+                self._running[-1][4] += cpu_elapsed
+
+    def get_times(self):
+        """
+        Gets wall time spent in each stage
+        :return: stage => seconds
+        :rtype: dict
+        """
+        return dict(self._times)
+
+    def get_cpu_times(self):
+        """
+        Gets CPU time spent in each stage
+        :return: stage => seconds
+        :rtype: dict
+        """
+        return dict(self._cpu_times)
+
+    def reset(self):
+        """
+        Forgets times recorded so far
+        :return: None
+        """
+        self._times = {}
+        self._cpu_times = {}
+
+
+def get_network_counts(network):
+    """
+    Counts nodes, edges and members of families, complexes
+    and compartments of **network**
+    :param network: network
+    :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+    :return: dict with :py:const:`NODES`, :py:const:`EDGES`
+             and :py:const:`MEMBERS` keys
+    :rtype: dict
+    """
+    num_nodes = 0
+    num_members = 0
+    for node_id, node in network.get_nodes():
+        num_nodes += 1
+        member = network.get_node_attribute(node_id, MEMBER_ATTRIBUTE)
+        if member is not None and isinstance(member['v'], list):
+            num_members += len(member['v'])
+    return {NODES: num_nodes,
+            EDGES: sum(1 for edge in network.get_edges()),
+            MEMBERS: num_members}
+
+
+def get_record(network_name, stage, wall_time=None, cpu_time=None, **values):
+    """
+    Gets metrics record of **stage** of network **network_name**
+
+    :param network_name: name of network
+    :param stage: one of :py:const:`STAGES`
+    :param wall_time: seconds spent in stage
+    :param cpu_time: CPU seconds spent in stage or None if
+                     the stage ran alongside others
+    :param values: other metrics, such as :py:const:`BYTES_WRITTEN`
+    :return: record
+    :rtype: dict
+    """
+    record = {NETWORK: network_name, STAGE: stage,
+              WALL_TIME: wall_time, CPU_TIME: cpu_time}
+    record.update(values)
+    return record
+
+
+def get_conversion_records(network_name, timer, counts=None, bytes_written=None):
+    """
+    Gets metrics records of each conversion stage of network
+    **network_name**, as timed by **timer**
+
+    :param network_name: name of network
+    :param timer: timer of the conversion
+    :type timer: :py:class:`StageTimer`
+    :param counts: result of :py:func:`get_network_counts`,
+                   recorded with the CX build stage
+    :param bytes_written: size of files written, recorded
+                          with the serialization stage
+    :return: records
+    :rtype: list
+    """
+    times = timer.get_times()
+    cpu_times = timer.get_cpu_times()
+    records = []
+    for stage in CONVERSION_STAGES:
+        if stage not in times:
+            continue
+        values = {}
+        if stage == CX_BUILD_STAGE and counts is not None:
+            values.update(counts)
+        if stage == SERIALIZATION_STAGE and bytes_written is not None:
+            values[BYTES_WRITTEN] = bytes_written
+        records.append(get_record(network_name, stage, times[stage], cpu_times[stage], **values))
+    return records
+
+
+class MetricsRecorder(object):
+    """
+    Collects metrics records, from any thread, and writes them
+    as JSON Lines, one record per network and stage
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add_records(self, records):
+        """
+        Adds **records**
+        :param records: records from :py:func:`get_record`
+        :return: None
+        """
+        with self._lock:
+            self._records.extend(records)
+
+    def get_records(self):
+        """
+        Gets records in the order they were added
+        :return: records
+        :rtype: list
+        """
+        with self._lock:
+            return list(self._records)
+
+    def write(self, path):
+        """
+        Writes records to **path** as JSON Lines, replacing
+        the previous copy atomically
+        :param path: path to file
+        :return: None
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for record in self.get_records():
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+        os.replace(tmp_path, path)
+        logger.debug('Wrote metrics to ' + path)
+
+    def format_summary(self, num_networks=SUMMARY_NETWORKS):
+        """
+        Formats totals of each stage, and the networks that
+        took longest, as tables
+        :param num_networks: number of networks to list
+        :return: lines of tables
+        :rtype: list
+        """
+        stages = {}
+        networks = {}
+        for record in self.get_records():
+            totals = stages.setdefault(record[STAGE], [0, 0.0, 0.0, 0, None, 0.0])
+            wall_time = record[WALL_TIME] or 0.0
+            totals[0] += 1
+            totals[1] += wall_time
+            totals[2] += record[CPU_TIME] or 0.0
+            totals[3] += record.get(BYTES_DOWNLOADED, 0) + record.get(BYTES_WRITTEN, 0)
+            if wall_time >= totals[5]:
+                totals[4] = record[NETWORK]
+                totals[5] = wall_time
+            networks[record[NETWORK]] = networks.get(record[NETWORK], 0.0) + wall_time
+
+        lines = ['{:<18} {:>8} {:>10} {:>10} {:>12}  {}'.format('stage', 'networks', 'seconds',
+                                                                'cpu', 'bytes', 'slowest network')]
+        for stage in STAGES:
+            if stage not in stages:
+                continue
+            count, wall_time, cpu_time, num_bytes, slowest, slowest_time = stages[stage]
+            lines.append('{:<18} {:>8d} {:>10.2f} {:>10.2f} {:>12d}  {} ({:.2f}s)'
+                         .format(stage, count, wall_time, cpu_time, num_bytes,
+                                 slowest, slowest_time))
+
+        slowest_networks = sorted(networks.items(), key=lambda n: -n[1])[:num_networks]
+        if slowest_networks:
+            lines.append('')
+            lines.append('{:<10} {}'.format('seconds', 'network'))
+            for network_name, wall_time in slowest_networks:
+                lines.append('{:<10.2f} {}'.format(wall_time, network_name))
+        return lines
@@ -5,16 +5,35 @@ import sys
 import logging
 import json
 import os
+import collections
+import threading
+import multiprocessing
 import pandas as pd
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
 from logging import config
 from ndexutil.config import NDExUtilConfig
 import ndextcgaloader
-import ndexutil.tsv.tsv2nicecx2 as t2n
+from ndextcgaloader import sources
+from ndextcgaloader.sources import DEFAULT_DOWNLOAD_WORKERS
+from ndextcgaloader.parser import PathwayMapperParser
+from ndextcgaloader import engine
+from ndextcgaloader import hgnc
+from ndextcgaloader import style
+from ndextcgaloader import cxwriter
+from ndextcgaloader import uploader
+from ndextcgaloader import uploadstate
+from ndextcgaloader import pipeline
+from ndextcgaloader import buildstate
+from ndextcgaloader import cache
+from ndextcgaloader import resolver
+from ndextcgaloader import reports
+from ndextcgaloader import metrics
+from ndextcgaloader.uploader import DEFAULT_UPLOAD_WORKERS
+from ndextcgaloader.engine import NODE_TYPE_MAPPING
+from ndextcgaloader.cxbuilder import LoadPlanNetworkBuilder
 from ndex2.client import Ndex2
-import ndex2
-import requests
-
-import re
+from ndex2.nice_cx_network import NiceCXNetwork
 
 import numpy as np
 
@@ -28,24 +47,11 @@ LOG_FORMAT = "%(asctime)-15s %(levelname)s %(relativeCreated)dms " \
 DEFAULT_URL = 'https://raw.githubusercontent.com/iVis-at-Bilkent/pathway-mapper/master/samples'
 DEFAULT_URL_HUMAN = 'https://github.com/iVis-at-Bilkent/pathway-mapper/tree/master/samples'
 
-# Simple dictionary mapping values in type field to
-# normalized values
-NODE_TYPE_MAPPING = {'GENE': 'gene',
-                     'FAMILY': 'proteinfamily',
-                     'COMPLEX': 'complex',
-                     'PROCESS': 'biologicalprocess', # PROCESS is not in vocabulary, so we keep it as is
-                     'COMPARTMENT': 'compartment' # COMPARTMENT is not in vocabulary, so we keep it as is
-                     }
-
-# name of CX aspect that contains coordinates for nodes
-CARTESIANLAYOUT_ASPECT_NAME = 'cartesianLayout'
-
+# names of node attributes, set by the load plan, that are
+# put in the cartesianLayout aspect instead
 POSX_NODE_ATTR = 'POSX'
 POSY_NODE_ATTR = 'POSY'
 
-POSX_B_NODE_ATTR = 'POSX_B'
-POSY_B_NODE_ATTR = 'POSY_B'
-
 LOAD_PLAN = 'loadplan.json'
 """
 Name of file containing json load plan
@@ -58,6 +64,12 @@ Name of file containing CX with style
 stored within this package
 """
 
+STYLE_DARK = 'style_dark.cx'
+"""
+Name of file containing CX with dark style
+stored within this package, selectable via --stylemap
+"""
+
 NETWORKSDIR = 'networks'
 """
 Name of directory where network files will downloaded to
@@ -70,6 +82,33 @@ Name of the test directoryl; used in test_ndexloadtcga.py module
 """
 
 
+PANDAS_ENGINE = 'pandas'
+TABLE_ENGINE = 'table'
+ENGINES = [PANDAS_ENGINE, TABLE_ENGINE]
+"""
+Engines that can convert network files, selected via --engine
+"""
+
+DEFAULT_WORKERS = 1
+"""
+Default number of processes converting networks, 1 meaning
+networks are converted one after another in the main process
+"""
+
+WORKER_START_METHODS = ['forkserver', 'spawn']
+"""
+Start methods of conversion worker processes, in order of preference.
+Workers are never forked straight from the loader, since download and
+upload threads may hold locks the fork would copy in their held state
+"""
+
+DOWNLOAD_STAGE = 'download'
+CONVERT_STAGE = 'convert'
+UPLOAD_STAGE = 'upload'
+"""
+Names of stages in statistics printed by --pipeline runs
+"""
+
 NETWORKLISTFILE = 'networks.txt'
 """
 Name of file containing list of networks to be downloaded
@@ -165,9 +204,83 @@ def _parse_arguments(desc, args):
                              'logging)')
 
     parser.add_argument('--dataurl', help='Base URL to use to download networks from '
-                                          'listed in --networklistfile file (default ' + DEFAULT_URL + ')',
+                                          'listed in --networklistfile file. A file:// URL '
+                                          'copies networks from a local mirror instead '
+                                          '(default ' + DEFAULT_URL + ')',
                         default=DEFAULT_URL)
 
+    parser.add_argument('--offline', action='store_true',
+                        help='Do not download networks; use the files already '
+                             'in --datadir as-is')
+
+    parser.add_argument('--downloadworkers', type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help='Maximum number of network files to download '
+                             'concurrently from --dataurl (default ' +
+                             str(DEFAULT_DOWNLOAD_WORKERS) + ')')
+
+    parser.add_argument('--uploadworkers', type=int, default=DEFAULT_UPLOAD_WORKERS,
+                        help='Maximum number of networks to upload '
+                             'concurrently to NDEx (default ' +
+                             str(DEFAULT_UPLOAD_WORKERS) + ')')
+
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Number of processes converting networks to '
+                             'styled CX files in parallel. Reports and '
+                             'uploads stay in --networklistfile order '
+                             '(default ' + str(DEFAULT_WORKERS) + ')')
+
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Overlap downloading, converting and uploading '
+                             'networks: each network is converted once it '
+                             'and those before it are fetched, and uploaded '
+                             'while later networks are converted. Stages '
+                             'are connected by queues of at most ' +
+                             str(pipeline.DEFAULT_QUEUE_SIZE) + ' networks '
+                             'and their throughput is printed at the end')
+
+    parser.add_argument('--force', action='store_true',
+                        help='Convert every network file, even those whose '
+                             'content, load plan, style and version are the '
+                             'same as when they were last converted in '
+                             '--datadir')
+
+    parser.add_argument('--cachedir',
+                        help='Directory caching TSV and CX files of converted '
+                             'networks by the hash of their network file, '
+                             'load plan, style and version, so runs sharing '
+                             'it, from any profile or checkout, convert '
+                             'each network once (default None, meaning no '
+                             'caching)')
+
+    parser.add_argument('--cachesize', type=int, default=cache.DEFAULT_CACHE_SIZE,
+                        help='Maximum size of --cachedir in megabytes; least '
+                             'recently used networks are removed from it '
+                             'beyond that (default ' +
+                             str(cache.DEFAULT_CACHE_SIZE) + ')')
+
+    parser.add_argument('--namecachettl', type=int, default=resolver.DEFAULT_TTL,
+                        help='Number of seconds NDEx network UUIDs looked up '
+                             'by name are cached in --datadir (default ' +
+                             str(resolver.DEFAULT_TTL) + ')')
+
+    parser.add_argument('--metricsfile', '--metrics-file', dest='metricsfile',
+                        help='Write wall and CPU time of each stage of every network, '
+                             'node, edge and member counts, bytes downloaded and '
+                             'written and upload latency to this file as JSON Lines, '
+                             'and print a summary at the end of the run')
+
+    parser.add_argument('--reportformat', choices=reports.REPORT_FORMATS,
+                        default=reports.TSV_FORMAT,
+                        help='Format of reports written to reports directory; ' +
+                             reports.PARQUET_FORMAT + ' requires ' +
+                             ' or '.join(reports.PARQUET_ENGINES) +
+                             ' (default ' + reports.TSV_FORMAT + ')')
+
+    parser.add_argument('--forceupload', action='store_true',
+                        help='Upload every network, even those whose '
+                             'content has not changed since they were '
+                             'last uploaded from --datadir')
+
     parser.add_argument('--datadir', help='Directory containing data files in '
                                           '--networklistfile', default=get_networksdir())
 
@@ -180,12 +293,37 @@ def _parse_arguments(desc, args):
 
     parser.add_argument('--style', help='Path to NDEx CX file to use for styling'
                                         'networks', default=get_style())
+    parser.add_argument('--stylemap',
+                        help='File selecting style of networks, one '
+                             '<network name pattern><TAB><style CX file> '
+                             'per line. The first matching pattern wins, '
+                             'networks matching none get --style. Styles '
+                             'in this package, ' + STYLE + ' and ' + STYLE_DARK +
+                             ', can be given by name (default None)')
+    parser.add_argument('--prettycx', action='store_true',
+                        help='Indent CX files written to --datadir. By '
+                             'default they are written compactly')
+    parser.add_argument('--gzipcx', action='store_true',
+                        help='Compress CX files written to --datadir with '
+                             'gzip, naming them <network>' + cxwriter.CX_SUFFIX +
+                             cxwriter.GZIP_SUFFIX)
+    parser.add_argument('--stylecache',
+                        help='Directory where visual properties of style '
+                             'files are cached across runs (default None, '
+                             'meaning no caching)')
     parser.add_argument('--version', action='version',
                         version=('%(prog)s ' +
                                  ndextcgaloader.__version__))
 
     parser.add_argument('--tcgaversion', help='Version of NDEx TCGA Networks', default='1.0')
 
+    parser.add_argument('--engine', choices=ENGINES, default=PANDAS_ENGINE,
+                        help='Engine used to convert network files. ' +
+                             TABLE_ENGINE + ' converts with plain lists and dicts '
+                             'and builds CX directly from the load plan, producing '
+                             'the same networks without pandas (default ' +
+                             PANDAS_ENGINE + ')')
+
     return parser.parse_args(args)
 
 
@@ -219,7 +357,7 @@ class NDExNdextcgaloaderLoader(object):
     """
 
     # HGNC Symbol Identifier Pattern defined at https://www.ebi.ac.uk/miriam/main/datatypes/MIR:00000362
-    HGNC_REGEX = '^[A-Za-z-0-9_]+(\@)?$'
+    HGNC_REGEX = hgnc.HGNC_REGEX
 
     def __init__(self, args):
         """
@@ -239,21 +377,56 @@ class NDExNdextcgaloaderLoader(object):
         self._pass = None
         self._server = None
         self._ndex = None
-        self._net_summaries = None
+        self._name_resolver = None
         self._networklistfile = args.networklistfile
         self._datadir = os.path.abspath(args.datadir)
-        self._template = None
+        self._dataurl = args.dataurl
+        self._offline = args.offline
+        self._download_workers = args.downloadworkers
+        self._upload_workers = args.uploadworkers
+        self._uploader = None
+        self._failed_uploads = []
+        self._force_upload = args.forceupload
+        self._upload_state = None
+        self._pending_uploads = []
+        self._skipped_uploads = []
+        self._workers = args.workers
+        if self._workers is None or self._workers < 1:
+            self._workers = DEFAULT_WORKERS
+        # stage timer, and report rows and metrics collected by
+        # _convert_file_with_reports, of the conversion each thread runs
+        self._conversion_state = threading.local()
+        self._metrics = metrics.MetricsRecorder()
+        self._pipeline = args.pipeline
+        self._force = args.force
+        self._build_state = None
+        self._file_hashes = {}
+        self._skipped_builds = []
+        self._cache = None
+        self._cached_builds = []
+        self._style_map = None
+        self._pretty_cx = args.prettycx
+        self._gzip_cx = args.gzipcx
         self._failed_networks = []
 
         self._loadplan = None
+        self._parser = PathwayMapperParser()
+        self._engine = args.engine
+        if self._engine is None:
+            self._engine = PANDAS_ENGINE
+        self._hgnc_validator = hgnc.HGNCSymbolValidator(NDExNdextcgaloaderLoader.HGNC_REGEX)
+        self._table_engine = engine.TableEngine(hgnc_validator=self._hgnc_validator)
+        self._network_builder = None
 
         self._reportdir = 'reports'
+        self._report_sink = reports.ReportSink(self._reportdir,
+                                               report_format=args.reportformat)
 
         self._invalid_protein_names_file_path = \
-            os.path.join(os.path.abspath(self._reportdir), 'invalid_protein_names.tsv')
+            self._report_sink.get_path(reports.INVALID_PROTEIN_NAMES)
 
         self._nested_nodes_file_path = \
-            os.path.join(os.path.abspath(self._reportdir), 'nested_nodes.tsv')
+            self._report_sink.get_path(reports.NESTED_NODES)
 
 
     def _parse_config(self):
@@ -274,6 +447,7 @@ class NDExNdextcgaloaderLoader(object):
         """
         with open(self._args.loadplan, 'r') as f:
             self._loadplan = json.load(f)
+        self._network_builder = None
 
     def _get_user_agent(self):
         """
@@ -291,24 +465,29 @@ class NDExNdextcgaloaderLoader(object):
             self._ndex = Ndex2(host=self._server, username=self._user,
                                password=self._pass, user_agent=self._get_user_agent())
 
-    def _load_network_summaries_for_user(self):
+    def _create_network_name_resolver(self):
         """
-        Gets a dictionary of all networks for user account
-        <network name upper cased> => <NDEx UUID>
-        :return: dict
+        Sets up self._name_resolver, which looks up UUIDs of networks
+        of the user account by name when they are about to be uploaded,
+        caching them in --datadir for --namecachettl seconds
+        :return:
         """
-        net_summaries = self._ndex.get_network_summaries_for_user(self._user)
-        self._net_summaries = {}
-        for nk in net_summaries:
-            if nk.get('name') is not None:
-                self._net_summaries[nk.get('name').upper()] = nk.get('externalId')
+        self._name_resolver = resolver.NetworkNameResolver(
+            self._ndex, self._user,
+            cachefile=os.path.join(self._datadir, resolver.NETWORK_NAMES_FILE),
+            ttl=self._args.namecachettl, server=self._server)
+        self._name_resolver.load()
 
     def _load_style_template(self):
         """
-        Loads the CX network specified by self._args.style into self._template
+        Sets up self._style_map, which parses the style given by
+        --style, and those --stylemap selects, once each
         :return:
         """
-        self._template = ndex2.create_nice_cx_from_file(os.path.abspath(self._args.style))
+        self._style_map = style.StyleMap(self._args.style,
+                                         stylemap=self._args.stylemap,
+                                         packagedir=get_package_dir(),
+                                         cachedir=self._args.stylecache)
 
 
     def prepare_report_directory(self):
@@ -317,11 +496,7 @@ class NDExNdextcgaloaderLoader(object):
             os.makedirs(self._reportdir)
 
         # remove reports (if any) from previous run
-        if os.path.exists(self._invalid_protein_names_file_path):
-            os.remove(self._invalid_protein_names_file_path)
-
-        if os.path.exists(self._nested_nodes_file_path):
-            os.remove(self._nested_nodes_file_path)
+        self._report_sink.remove_previous()
 
 
     def run(self):
@@ -333,7 +508,7 @@ class NDExNdextcgaloaderLoader(object):
         self._parse_config()
         self.parse_load_plan()
         self._create_ndex_connection()
-        self._load_network_summaries_for_user()
+        self._create_network_name_resolver()
         self._load_style_template()
 
         self.prepare_report_directory()
@@ -343,44 +518,74 @@ class NDExNdextcgaloaderLoader(object):
             list_of_network_files = networks.read().splitlines()
             list_of_network_files.reverse()
 
-        self._download_data_files(DEFAULT_URL, list_of_network_files, self._datadir)
-
-        for network_file in list_of_network_files:
-            self._process_file(network_file)
-
+        self._upload_state = uploadstate.UploadState(self._datadir)
+        self._upload_state.load()
+        self._build_state = buildstate.BuildState(self._datadir)
+        self._build_state.load()
+        if self._args.cachedir is not None:
+            cachesize = self._args.cachesize
+            if cachesize is None:
+                cachesize = cache.DEFAULT_CACHE_SIZE
+            self._cache = cache.ConversionCache(os.path.abspath(self._args.cachedir),
+                                                max_size=cachesize * 1024 * 1024)
+        self._uploader = uploader.NetworkUploader(self._ndex, workers=self._upload_workers,
+                                                  max_pending=pipeline.DEFAULT_QUEUE_SIZE)
+
+        if self._pipeline:
+            loader_pipeline = self._run_pipeline(self._get_input_source(), list_of_network_files)
+        else:
+            loader_pipeline = None
+            self._fetch_data_files(self._get_input_source(), list_of_network_files, self._datadir)
+            list_of_network_files = [network_file for network_file in list_of_network_files
+                                     if network_file not in self._failed_networks]
+            for converted in self._convert_files(list_of_network_files):
+                if converted is not None:
+                    self._queue_upload(*converted)
+
+        # every network is converted, so reports are complete
+        self._report_sink.write()
+
+        failed_uploads = self._wait_for_uploads()
+        if loader_pipeline is not None:
+            print('\n'.join(loader_pipeline.format_stats()))
+        if self._args.metricsfile is not None:
+            self._metrics.write(self._args.metricsfile)
+            print('\n'.join(self._metrics.format_summary()))
+        if failed_uploads:
+            return 1
         return 0
 
-    def _add_coordinates_aspect_from_pos_attributes(self, network):
+    def _run_pipeline(self, input_source, list_of_network_files):
         """
-        Iterates through all nodes in network looking for
-        POSX and POSY node attributes. These values are then
-        put into the CARTESIAN_LAYOUT aspect. Finally these
-        attributes are removed from the nodes
-        :return:
+        Fetches, converts and queues upload of networks in
+        **list_of_network_files** with the three stages running at the
+        same time, connected by bounded queues. Networks are converted
+        and uploads queued in the order of **list_of_network_files**
+        :param input_source: source of network files
+        :type input_source: :py:class:`~ndextcgaloader.sources.InputSource`
+        :param list_of_network_files: names of network files
+        :return: pipeline, whose statistics are complete once
+                 :py:meth:`_wait_for_uploads` returns
+        :rtype: :py:class:`~ndextcgaloader.pipeline.Pipeline`
         """
-        coordlist = []
-        for id, node in network.get_nodes():
-            posx = network.get_node_attribute(id, POSX_NODE_ATTR)
-            if posx is None:
-                posx = network.get_node_attribute(id, POSX_B_NODE_ATTR)
-                if posx is None:
-                    logger.debug('No position attribute for node: ' + str(node))
-                    continue
-
-            posy = network.get_node_attribute(id, POSY_NODE_ATTR)
-
-            if posy is None:
-                posy = network.get_node_attribute(id, POSY_B_NODE_ATTR)
-                if posy is None:
-                    logger.debug('No position y attribute for node: ' + str(node) +
-                                 ' which is weird cause we got an X position')
-                    continue
-            coordlist.append({'node': id, 'x': float(posx['v']), 'y': float(posy['v'])})
-            network.remove_node_attribute(id, POSX_NODE_ATTR)
-            network.remove_node_attribute(id, POSY_NODE_ATTR)
-        if len(coordlist) > 0:
-            network.set_opaque_aspect(CARTESIANLAYOUT_ASPECT_NAME,
-                                      coordlist)
+        loader_pipeline = pipeline.Pipeline()
+        fetched = loader_pipeline.add_stage(DOWNLOAD_STAGE,
+                                            self._iter_fetched_files(input_source,
+                                                                     list_of_network_files,
+                                                                     self._datadir))
+        converted_networks = loader_pipeline.add_stage(CONVERT_STAGE, self._convert_files(fetched))
+
+        upload_stats = loader_pipeline.get_stats(UPLOAD_STAGE)
+        for converted in converted_networks:
+            if converted is None:
+                continue
+            future = self._queue_upload(*converted)
+            if future is not None:
+                future.add_done_callback(lambda f: upload_stats.add_item())
+                upload_stats.sample_queue_depth(self._uploader.get_pending_count())
+
+        self._print_failed_networks()
+        return loader_pipeline
 
     def _set_network_attributes(self, network, network_description):
 
@@ -421,77 +626,77 @@ class NDExNdextcgaloaderLoader(object):
 
     def _report_proteins_with_invalid_names(self, node_df, network_name):
 
-        proteins_with_invalid_names = []
-
-        for index, row in node_df.iterrows():
-            if (row['NODE_TYPE'] != 'GENE'):
-                continue
-
-            protein_name = row['NODE']
-
-            if not re.match(NDExNdextcgaloaderLoader.HGNC_REGEX, protein_name):
-                proteins_with_invalid_names.append(protein_name)
-
-        if proteins_with_invalid_names:
-            proteins_with_invalid_names.sort()
+        protein_names = node_df.loc[node_df['NODE_TYPE'] == 'GENE', 'NODE']
+        is_valid = self._hgnc_validator.get_valid_mask(protein_names)
 
-            with open(self._invalid_protein_names_file_path, 'a+') as f:
-                for protein_name in proteins_with_invalid_names:
-                    str_to_write = protein_name + '\t' + network_name + '\n'
-                    f.write(str_to_write)
-                f.write('\n')
+        proteins_with_invalid_names = sorted(protein_names[~is_valid].tolist())
+        self._write_invalid_protein_names(proteins_with_invalid_names, network_name)
 
-
-    def _get_node_name_and_type(self, node_df, node_id):
-        for index, row in node_df.iterrows():
-            if (row['NODE_ID'] == node_id):
-                return row['NODE'], row['NODE_TYPE']
-
-        return None, None
+    def _write_invalid_protein_names(self, proteins_with_invalid_names, network_name):
+        """
+        Adds **proteins_with_invalid_names** of network
+        **network_name** to invalid protein names report
+        :param proteins_with_invalid_names: sorted protein names
+        :param network_name: name of network
+        :return: None
+        """
+        self._add_report_rows(reports.INVALID_PROTEIN_NAMES, network_name,
+                              [(protein_name,) for protein_name in proteins_with_invalid_names])
 
 
     def _report_nested_nodes(self, node_df, network_name):
+        """
+        Reports nodes that are not genes, yet have a parent, to
+        nested nodes report. Parents are looked up in an index of
+        **node_df** by node id
+        :param node_df: data frame with nodes
+        :param network_name: name of network
+        :return: nested node id => parent id, in node order
+        :rtype: dict
+        """
+        # we look for nodes that are not GENE and that have a parent
+        nested_df = node_df[(node_df['NODE_TYPE'] != 'GENE') & (node_df['PARENT_ID'] != '-1')]
+        if nested_df.empty:
+            return {}
 
-        nested_nodes= []
-        nested_nodes_ids = {}
-
-        for index, row in node_df.iterrows():
-            if (row['NODE_TYPE'] == 'GENE'):
-                continue
-
-            if (row['PARENT_ID'] == '-1'):
-                continue
-
-            # we found a node that is not GENE and that has a parent
-
-            parent_node_name, parent_node_type = self._get_node_name_and_type(node_df, row['PARENT_ID'])
-
-            # get name and type of current node
-            nested_node_name = row['NODE']
-            nested_node_type = row['NODE_TYPE']
-
-            str_to_write = nested_node_name + '\t' + nested_node_type + '\t'
-            str_to_write += parent_node_name + '\t' + parent_node_type + '\t' + network_name + '\n'
-
-            nested_nodes.append(str_to_write)
-            nested_nodes_ids[row['NODE_ID']] = row['PARENT_ID']
-
-            #if (nested_node_type == 'FAMILY'):
-            #    nested_nodes_ids[row['NODE_ID']] = row['PARENT_ID']
+        node_index = node_df.drop_duplicates(subset='NODE_ID').set_index('NODE_ID')
+        parent_df = node_index.reindex(nested_df['PARENT_ID'])
 
-        if nested_nodes:
+        nested_nodes = list(zip(nested_df['NODE'], nested_df['NODE_TYPE'],
+                                parent_df['NODE'], parent_df['NODE_TYPE']))
 
-            if not os.path.exists(self._nested_nodes_file_path):
-                header = 'nested_node_name\tnested_node_type\tparent_node_name\tparent_node_type\tnetwork\n'
-                with open(self._nested_nodes_file_path, 'a+') as f:
-                    f.write(header)
+        self._write_nested_nodes(nested_nodes, network_name)
+        return dict(zip(nested_df['NODE_ID'], nested_df['PARENT_ID']))
 
-            with open(self._nested_nodes_file_path, 'a+') as f:
-                f.write('\n')
-                for node in nested_nodes:
-                    f.write(node)
+    def _write_nested_nodes(self, nested_nodes, network_name):
+        """
+        Adds **nested_nodes** of network **network_name**
+        to nested nodes report
+        :param nested_nodes: list of (nested node name, nested node type,
+                             parent node name, parent node type) tuples
+        :param network_name: name of network
+        :return: None
+        """
+        self._add_report_rows(reports.NESTED_NODES, network_name, nested_nodes)
 
-        return nested_nodes_ids
+    def _add_report_rows(self, report, network_name, rows):
+        """
+        Adds **rows** of network **network_name** to **report**, or
+        collects them if the calling thread runs
+        :py:meth:`_convert_file_with_reports`
+        :param report: name of report, such as
+                       :py:const:`~ndextcgaloader.reports.NESTED_NODES`
+        :param network_name: name of network
+        :param rows: rows, each holding the report's columns but the
+                     network name
+        :return: None
+        """
+        collected_reports = getattr(self._conversion_state, 'reports', None)
+        if collected_reports is not None:
+            if rows:
+                collected_reports.append((report, network_name, [tuple(row) for row in rows]))
+            return
+        self._report_sink.add_rows(report, network_name, rows)
 
     def save_panda_df_to_tsv(self, df, file_name):
 
@@ -505,92 +710,539 @@ class NDExNdextcgaloaderLoader(object):
             f.write(df.to_csv(sep='\t'))
 
     def generate_nice_cx_from_panda_df(self, df, file_name, network_description, id_to_gene_dict):
-        # replace node names with IDs before transforming Panda dataframe to Nice CX;
-        # this is done because as of the moment of writing convert_pandas_to_nice_cx_with_load_plan() cannot
-        # handle frames with multiple nodes with the same name; so we use unique IDs instead
-        for idx, row in df.iterrows():
-            row['SOURCE'] = row['NODE_ID']
-            row['TARGET'] = row['NODE_ID_B']
+        """
+        Generates network from **df**. Nodes are keyed by NODE_ID, since
+        different nodes can share a name, and named via **id_to_gene_dict**
+        in the same pass that creates them
+
+        :param df: data frame with edges and nodes without edges
+        :param file_name: name of network file
+        :param network_description: description of network
+        :param id_to_gene_dict: node id => node name
+        :return: network
+        :rtype: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        """
+        network = self._get_network_builder().build(df.to_dict('records'), id_to_gene_dict)
 
-        network = t2n.convert_pandas_to_nice_cx_with_load_plan(df, self._loadplan)
+        network.set_name(os.path.basename(file_name).replace('.txt', ''))
 
-        # now, replace 'name' and 'represents' in network with names;
-        # we only have represents for simple nodes (genes) whose represetns comply with NDExNdextcgaloaderLoader.HGNC_REGEX
-        for id, node in network.get_nodes():
-            node['n'] = id_to_gene_dict[node['n']]
+        self._set_network_attributes(network, network_description)
 
-            nodeId = node['@id']
+        return network
 
-            if network.nodeAttributes and network.nodeAttributes[nodeId]:
-                nodeAttributes = network.nodeAttributes[nodeId]
+    def save_network_table_to_tsv(self, table, file_name):
+        """
+        Saves **table** next to **file_name** in --datadir, in the same
+        format :py:meth:`save_panda_df_to_tsv` writes data frames in
 
-                node_resolvable = False
+        :param table: network table
+        :type table: :py:class:`~ndextcgaloader.engine.NetworkTable`
+        :param file_name: name of network file
+        :return: None
+        """
+        path_to_file = os.path.join(os.path.abspath(self._datadir), file_name)
+        path_to_tsv_file = path_to_file.replace('.txt', '.tsv')
+        with open(path_to_tsv_file, 'w') as f:
+            f.write(table.to_tsv())
 
-                for attr in nodeAttributes:
+    def _get_network_builder(self):
+        """
+        Gets builder of networks for the load plan, creating it on first use
+        :return: network builder
+        :rtype: :py:class:`~ndextcgaloader.cxbuilder.LoadPlanNetworkBuilder`
+        """
+        if self._network_builder is None:
+            self._network_builder = LoadPlanNetworkBuilder(self._loadplan,
+                                                           hgnc_validator=self._hgnc_validator,
+                                                           layout_attributes=(POSX_NODE_ATTR,
+                                                                              POSY_NODE_ATTR))
+        return self._network_builder
+
+    def generate_nice_cx_from_network_table(self, table, file_name, network_description, id_to_gene_dict):
+        """
+        Generates network from **table**, the pandas-free counterpart
+        of :py:meth:`generate_nice_cx_from_panda_df`
+
+        :param table: network table
+        :type table: :py:class:`~ndextcgaloader.engine.NetworkTable`
+        :param file_name: name of network file
+        :param network_description: description of network
+        :param id_to_gene_dict: node id => node name
+        :return: network
+        :rtype: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        """
+        network = self._get_network_builder().build(table.rows, id_to_gene_dict)
 
-                    if attr['v'] == 'gene':
-                        # only simple nodes, i.e. genes can be  resolvable
+        network.set_name(os.path.basename(file_name).replace('.txt', ''))
 
-                        if re.match(NDExNdextcgaloaderLoader.HGNC_REGEX, id_to_gene_dict[node['r']]):
-                            node['r'] = 'hgnc.symbol:' + id_to_gene_dict[node['r']]
-                            node_resolvable = True
+        self._set_network_attributes(network, network_description)
 
-                        break
+        return network
 
-                if not node_resolvable:
-                    del node['r']
+    def _generate_network(self, file_name):
+        """
+        Converts network file **file_name** into a network with the
+        engine set via --engine, saving the intermediate TSV file.
+        Stages are timed by :py:meth:`_get_stage_timer`
+        :param file_name: name of network file
+        :return: network or None if file is empty
+        :rtype: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        """
+        stage_timer = self._get_stage_timer()
+        if self._engine == TABLE_ENGINE:
+            with stage_timer.time(metrics.PARSE_STAGE):
+                table, network_description, id_to_gene_dict = self.get_network_table(file_name)
+            if table is None:
+                return None
+            with stage_timer.time(metrics.SERIALIZATION_STAGE):
+                self.save_network_table_to_tsv(table, file_name)
+            with stage_timer.time(metrics.CX_BUILD_STAGE):
+                return self.generate_nice_cx_from_network_table(table, file_name, network_description,
+                                                                id_to_gene_dict)
+
+        with stage_timer.time(metrics.PARSE_STAGE):
+            df, network_description, id_to_gene_dict = self.get_pandas_dataframe(file_name)
+        if df is None:
+            return None
 
-        self._add_coordinates_aspect_from_pos_attributes(network)
-        network.set_name(os.path.basename(file_name).replace('.txt', ''))
+        with stage_timer.time(metrics.SERIALIZATION_STAGE):
+            self.save_panda_df_to_tsv(df, file_name)
 
-        self._set_network_attributes(network, network_description)
+        with stage_timer.time(metrics.CX_BUILD_STAGE):
+            return self.generate_nice_cx_from_panda_df(df, file_name, network_description,
+                                                       id_to_gene_dict)
 
-        return network
+    def save_network_in_cx_on_disk(self, network, style_template=None):
+        """
+        Streams **network** to a CX file named after it in --datadir,
+        compact unless --prettycx is set and gzip compressed if
+        --gzipcx is set. The file appears only once fully written
+
+        :param network: network
+        :param style_template: template applied to **network**, whose
+                               pre-serialized visual properties are
+                               then written as is
+        :type style_template: :py:class:`~ndextcgaloader.style.StyleTemplate`
+        :return: path to CX file
+        :rtype: string
+        """
+        preserialized = None
+        if style_template is not None:
+            preserialized = {NiceCXNetwork.CY_VISUAL_PROPERTIES: style_template.get_blob()}
+        full_network_in_cx_path = cxwriter.get_cx_path(os.path.abspath(self._datadir),
+                                                       network.get_name(),
+                                                       gzip_output=self._gzip_cx)
+        return cxwriter.save_cx(network, full_network_in_cx_path, pretty=self._pretty_cx,
+                                gzip_output=self._gzip_cx, preserialized=preserialized)
+
+    def _convert_file(self, file_name):
+        """
+        Converts a file to a styled network and saves the network as CX,
+        recording metrics of each stage
+        :param file_name: name of network file in --datadir
+        :return: tuple (network name, path to CX file, content hash of
+                 network) or None if file is empty
+        :rtype: tuple
+        """
+        stage_timer = self._get_stage_timer()
+        stage_timer.reset()
+        network = self._generate_network(file_name)
+        if network is None:
+            return None
 
-    def save_network_in_cx_on_disk(self, network):
-        full_network_in_cx_path = os.path.join(os.path.abspath(self._datadir), network.get_name() + '.cx')
-        with open(full_network_in_cx_path, 'w') as f:
-            json.dump(network.to_cx(), f, indent=4)
+        # apply style to network
+        with stage_timer.time(metrics.STYLE_STAGE):
+            style_template = self._style_map.get_template(network.get_name())
+            style_template.apply(network)
 
+        with stage_timer.time(metrics.SERIALIZATION_STAGE):
+            path_to_cx_file = self.save_network_in_cx_on_disk(network, style_template=style_template)
 
-    def _process_file(self, file_name):
+        bytes_written = os.path.getsize(path_to_cx_file) + os.path.getsize(self._get_tsv_path(file_name))
+        conversion_records = metrics.get_conversion_records(network.get_name(), stage_timer,
+                                                            counts=metrics.get_network_counts(network),
+                                                            bytes_written=bytes_written)
+        self._record_conversion_metrics(conversion_records)
+        return network.get_name(), path_to_cx_file, uploadstate.get_network_hash(network)
 
-        """Processes  a file"""
-        df, network_description, id_to_gene_dict = self.get_pandas_dataframe(file_name)
-        if df is None:
+    def _convert_file_with_reports(self, file_name):
+        """
+        Converts a file like :py:meth:`_convert_file` does, collecting
+        report rows and metrics instead of writing them
+        :param file_name: name of network file in --datadir
+        :return: tuple (result of :py:meth:`_convert_file`,
+                 list of (report name, network name, rows),
+                 list of metrics records)
+        :rtype: tuple
+        """
+        collected_reports = []
+        collected_metrics = []
+        self._conversion_state.reports = collected_reports
+        self._conversion_state.metrics = collected_metrics
+        try:
+            converted = self._convert_file(file_name)
+            return converted, collected_reports, collected_metrics
+        finally:
+            self._conversion_state.reports = None
+            self._conversion_state.metrics = None
+
+    def _get_stage_timer(self):
+        """
+        Gets timer of the conversion stages the calling thread runs
+        :return: timer
+        :rtype: :py:class:`~ndextcgaloader.metrics.StageTimer`
+        """
+        stage_timer = getattr(self._conversion_state, 'stage_timer', None)
+        if stage_timer is None:
+            stage_timer = metrics.StageTimer()
+            self._conversion_state.stage_timer = stage_timer
+        return stage_timer
+
+    def _record_conversion_metrics(self, records):
+        """
+        Adds metrics **records** of a conversion to those written to
+        --metricsfile, or collects them if the calling thread runs
+        :py:meth:`_convert_file_with_reports`
+        :param records: records from :py:func:`~ndextcgaloader.metrics.get_record`
+        :return: None
+        """
+        collected_metrics = getattr(self._conversion_state, 'metrics', None)
+        if collected_metrics is not None:
+            collected_metrics.extend(records)
             return
+        self._metrics.add_records(records)
 
-        self.save_panda_df_to_tsv(df, file_name)
+    def _write_reports(self, reports):
+        """
+        Writes report rows collected by :py:meth:`_convert_file_with_reports`
+        :param reports: list of (report name, network name, rows)
+        :return: None
+        """
+        for report, network_name, rows in reports:
+            self._report_sink.add_rows(report, network_name, rows)
 
-        network = self.generate_nice_cx_from_panda_df(df, file_name, network_description,id_to_gene_dict)
+    def _get_file_sha256(self, path):
+        """
+        Gets hash of load plan or style file **path**, reading each once
+        :rtype: string
+        """
+        sha256 = self._file_hashes.get(path)
+        if sha256 is None:
+            sha256 = buildstate.get_file_sha256(path)
+            self._file_hashes[path] = sha256
+        return sha256
 
-        # apply style to network
-        network.apply_style_from_network(self._template)
+    def _get_build_fingerprint(self, file_name):
+        """
+        Gets fingerprint of network file **file_name**, its load plan,
+        style and version and the options changing the CX file written
+        :param file_name: name of network file in --datadir
+        :return: fingerprint
+        :rtype: string
+        """
+        path_to_file = os.path.join(os.path.abspath(self._datadir), file_name)
+        network_name = os.path.basename(file_name).replace('.txt', '')
+        return buildstate.get_fingerprint(buildstate.get_file_sha256(path_to_file),
+                                          self._get_file_sha256(self._args.loadplan),
+                                          self._get_file_sha256(self._style_map.get_style_path(network_name)),
+                                          self._tcga_version, ndextcgaloader.__version__,
+                                          options={'prettycx': bool(self._pretty_cx),
+                                                   'gzipcx': bool(self._gzip_cx)})
+
+    def _get_tsv_path(self, file_name):
+        """
+        Gets path of TSV file written for network file **file_name**
+        :param file_name: name of network file in --datadir
+        :return: path to TSV file
+        :rtype: string
+        """
+        return os.path.join(os.path.abspath(self._datadir), file_name).replace('.txt', '.tsv')
 
-        self.save_network_in_cx_on_disk(network)
+    def _get_unchanged_build(self, file_name, fingerprint):
+        """
+        Gets result and report rows of the last conversion of
+        **file_name**, if it was converted with **fingerprint** and
+        its TSV and CX files are still there
+        :param file_name: name of network file in --datadir
+        :param fingerprint: fingerprint from :py:meth:`_get_build_fingerprint`
+        :return: tuple like :py:meth:`_convert_file_with_reports`
+                 returns, without metrics, or None if file needs
+                 to be converted
+        :rtype: tuple
+        """
+        entry = self._build_state.get_entry(file_name, fingerprint)
+        if entry is None:
+            return None
 
-        network_update_key = self._net_summaries.get(network.get_name().upper())
+        converted = entry[buildstate.CONVERTED]
+        if converted is not None:
+            if not os.path.isfile(self._get_tsv_path(file_name)) or \
+                    not os.path.isfile(converted[1]):
+                return None
+            converted = tuple(converted)
+        return converted, entry[buildstate.REPORTS], []
 
-        if network_update_key is not None:
-            return network.update_to(network_update_key, self._server, self._user, self._pass,
-                                     user_agent=self._get_user_agent())
+    def _start_conversion(self, file_name, pool):
+        """
+        Starts converting **file_name**, unless its last conversion
+        is still up to date
+        :param file_name: name of network file in --datadir
+        :param pool: pool of worker processes or None to convert here
+        :return: tuple (fingerprint to record or None, future holding
+                 result of :py:meth:`_convert_file_with_reports`,
+                 key to add result to --cachedir with or None)
+        :rtype: tuple
+        """
+        fingerprint = None
+        cache_key = None
+        if self._build_state is not None or self._cache is not None:
+            fingerprint = self._get_build_fingerprint(file_name)
+
+        if self._build_state is not None and not self._force:
+            unchanged = self._get_unchanged_build(file_name, fingerprint)
+            if unchanged is not None:
+                logger.info('Skipping conversion of unchanged ' + file_name)
+                self._skipped_builds.append(file_name)
+                future = Future()
+                future.set_result(unchanged)
+                return None, future, None
+
+        if self._cache is not None:
+            cache_key = cache.get_cache_key(file_name, fingerprint)
+            if not self._force:
+                path_to_tsv_file = self._get_tsv_path(file_name)
+                cached = self._cache.get(cache_key, os.path.dirname(path_to_tsv_file),
+                                         os.path.basename(path_to_tsv_file))
+                if cached is not None:
+                    logger.info('Using cached conversion of ' + file_name)
+                    self._cached_builds.append(file_name)
+                    future = Future()
+                    future.set_result(cached + ([],))
+                    return fingerprint, future, None
+
+        if pool is not None:
+            return fingerprint, pool.submit(_convert_file_in_worker, file_name), cache_key
+        future = Future()
+        future.set_result(self._convert_file_with_reports(file_name))
+        return fingerprint, future, cache_key
+
+    def _finish_conversion(self, file_name, fingerprint, future, cache_key):
+        """
+        Waits for conversion of **file_name**, writes its reports and
+        metrics and records it in the build state and in --cachedir
+        :param file_name: name of network file in --datadir
+        :param fingerprint: fingerprint to record or None
+        :param future: future from :py:meth:`_start_conversion`
+        :param cache_key: key to add conversion to --cachedir with or None
+        :return: result of :py:meth:`_convert_file`
+        :rtype: tuple
+        """
+        converted, reports, conversion_metrics = future.result()
+        self._write_reports(reports)
+        self._metrics.add_records(conversion_metrics)
+        if fingerprint is not None and self._build_state is not None:
+            self._build_state.update_entry(file_name, fingerprint, converted, reports)
+        if cache_key is not None and converted is not None:
+            self._cache.put(cache_key, converted, self._get_tsv_path(file_name), reports)
+        return converted
+
+    def _convert_files(self, list_of_network_files):
+        """
+        Converts files in **list_of_network_files** with
+        :py:meth:`_convert_file`, one after another or, if --workers is
+        above 1, in a pool of processes that each get the load plan and
+        styles once. Files whose fingerprint matches the build state
+        are not converted again unless --force is set. Reports are
+        written here, in the order of **list_of_network_files**
+        :param list_of_network_files: names of network files in --datadir
+        :return: results of :py:meth:`_convert_file` in the order of
+                 **list_of_network_files**
+        :rtype: iterator
+        """
+        if self._workers <= 1:
+            for network_file in list_of_network_files:
+                yield self._finish_conversion(network_file,
+                                              *self._start_conversion(network_file, None))
         else:
-            upload_message = network.upload_to(self._server, self._user,
-                                               self._pass,
-                                               user_agent=self._get_user_agent())
-        return upload_message
+            self._style_map.load_all()
+            with ProcessPoolExecutor(max_workers=self._workers,
+                                     mp_context=_get_worker_context(),
+                                     initializer=_init_conversion_worker,
+                                     initargs=(self._args, self._loadplan,
+                                               self._style_map)) as pool:
+                # files are submitted as they come in, since they may still
+                # be downloading, with a few per worker kept in flight
+                pending = collections.deque()
+                for network_file in list_of_network_files:
+                    pending.append((network_file,) + self._start_conversion(network_file, pool))
+                    if len(pending) >= 2 * self._workers:
+                        yield self._finish_conversion(*pending.popleft())
+                while pending:
+                    yield self._finish_conversion(*pending.popleft())
+
+        if self._build_state is not None:
+            self._build_state.save()
+        if self._skipped_builds:
+            print('skipped conversion of {} unchanged networks'.format(len(self._skipped_builds)))
+        if self._cached_builds:
+            print('took {} networks from cache'.format(len(self._cached_builds)))
+
+    def _queue_upload(self, network_name, path_to_cx_file, network_hash):
+        """
+        Queues upload of CX file of network **network_name** to NDEx,
+        unless its content is unchanged since it was last uploaded
+        :param network_name: name of network
+        :param path_to_cx_file: path to CX file
+        :param network_hash: content hash of network
+        :return: future of the upload or None if upload is skipped
+        :rtype: :py:class:`concurrent.futures.Future`
+        """
+        network_update_key = self._name_resolver.resolve(network_name)
+        if not self._force_upload and \
+                self._upload_state.is_unchanged(network_name, network_update_key,
+                                                network_hash):
+            logger.info('Skipping upload of unchanged network ' + network_name)
+            self._skipped_uploads.append(network_name)
+            return None
+
+        # upload goes to the pool, which reads the CX file just written
+        # through the client created by _create_ndex_connection()
+        self._pending_uploads.append((network_update_key, network_hash))
+        return self._uploader.submit(network_name, path_to_cx_file,
+                                     network_id=network_update_key)
+
+    def _wait_for_uploads(self):
+        """
+        Waits for uploads queued by :py:meth:`_queue_upload` for the
+        networks :py:meth:`_convert_files` converted, recording
+        networks that could not be uploaded in self._failed_uploads
+        and printing them. Content hashes of uploaded networks are
+        saved so unchanged networks are skipped next time
+        :return: number of networks that could not be uploaded
+        :rtype: int
+        """
+        results = self._uploader.wait()
+        for (network_name, response, error, latency), (network_update_key, network_hash) in \
+                zip(results, self._pending_uploads):
+            self._metrics.add_records([metrics.get_record(network_name, metrics.UPLOAD_STAGE, latency,
+                                                          **{metrics.LATENCY: latency,
+                                                             metrics.FAILED: error is not None})])
+            if error is not None:
+                self._failed_uploads.append(network_name)
+                self._upload_state.remove_entry(network_name)
+                self._name_resolver.invalidate(network_name)
+                continue
+            if network_update_key is None:
+                network_update_key = uploadstate.get_network_id_from_url(response)
+            self._upload_state.update_entry(network_name, network_update_key, network_hash)
+            self._name_resolver.record(network_name, network_update_key)
+        self._pending_uploads = []
+        self._upload_state.save()
+        self._name_resolver.save()
+
+        if self._skipped_uploads:
+            print('skipped upload of {} unchanged networks'.format(len(self._skipped_uploads)))
+
+        if self._failed_uploads:
+            print('failed to upload {} networks:'.format(len(self._failed_uploads)))
+            for network_name in self._failed_uploads:
+                print(network_name)
+        return len(self._failed_uploads)
 
 
     def _handle_error(self, network_name):
         print('unable to get network {}'.format(network_name))
         self._failed_networks.append(network_name)
 
+    def _get_input_source(self):
+        """
+        Gets source of network files selected by --dataurl and --offline
+        :return: input source
+        :rtype: :py:class:`~ndextcgaloader.sources.InputSource`
+        """
+        dataurl = self._dataurl
+        if dataurl is None:
+            dataurl = DEFAULT_URL
+        return sources.get_input_source(dataurl, offline=self._offline,
+                                        workers=self._download_workers)
+
+    def _iter_fetched_files(self, input_source, list_of_networks, output_directory):
+        """
+        Fetches networks in **list_of_networks** into **output_directory**
+        via **input_source**, recording networks that could not be
+        fetched in self._failed_networks
+        :param input_source: source of network files
+        :type input_source: :py:class:`~ndextcgaloader.sources.InputSource`
+        :param list_of_networks: names of network files
+        :param output_directory: directory network files are read from
+        :return: names of network files fetched, as soon as each is
+                 available, in the order of **list_of_networks**
+        :rtype: iterator
+        """
+        for network, fetched in input_source.iter_fetch(list_of_networks, output_directory):
+            if fetched:
+                self._record_fetch_metrics(input_source, network)
+                yield network
+            else:
+                self._handle_error(network)
+
+    def _record_fetch_metrics(self, input_source, network):
+        """
+        Records metrics of fetching **network** via **input_source**,
+        if it was transferred from anywhere
+        :param input_source: source of network files
+        :type input_source: :py:class:`~ndextcgaloader.sources.InputSource`
+        :param network: name of network file
+        :return: None
+        """
+        fetch_stats = input_source.get_fetch_stats(network)
+        if fetch_stats is None:
+            return
+        seconds, num_bytes = fetch_stats
+        self._metrics.add_records([metrics.get_record(network.replace('.txt', ''), metrics.DOWNLOAD_STAGE,
+                                                      seconds, **{metrics.BYTES_DOWNLOADED: num_bytes})])
+
+    def _print_failed_networks(self):
+        """
+        Prints networks that could not be fetched, if any
+        :return: None
+        """
+        if (self._failed_networks):
+            print('failed to receive {} networks:'.format(len(self._failed_networks)))
+            for network_name in self._failed_networks:
+                print(network_name)
+
+    def _fetch_data_files(self, input_source, list_of_networks, output_directory):
+        """
+        Makes all networks in **list_of_networks** available in
+        **output_directory** via **input_source**, recording
+        networks that could not be fetched in self._failed_networks
+        and printing them
+        :param input_source: source of network files
+        :type input_source: :py:class:`~ndextcgaloader.sources.InputSource`
+        :param list_of_networks: names of network files
+        :param output_directory: directory network files are read from
+        :return: None
+        """
+        failed_networks = input_source.fetch(list_of_networks, output_directory)
+        for network in list_of_networks:
+            if network not in failed_networks:
+                self._record_fetch_metrics(input_source, network)
+        for network in failed_networks:
+            self._handle_error(network)
+
+        # print list of networks that we failed to download (if any)
+        self._print_failed_networks()
+
     def _download_data_files(self, tcga_github_repo_url, list_of_networks, output_directory=os.getcwd()):
         """ Downloads data files to temp directory
 
         This function takes three arguments: URL of repository, list of networks and working directory.
         It downloades all networks specified in list_of_networks from tcga_github_repo_url and
-        saves them in output_directory.
+        saves them in output_directory. Up to --downloadworkers files are fetched
+        concurrently over one shared keep-alive session. Validators of every file
+        are kept in a manifest in output_directory and sent back as conditional
+        requests, so files that did not change upstream are not transferred again.
 
         Args:
             tcga_github_repo_url (required): URL of TCGA networks, it is
@@ -610,188 +1262,110 @@ class NDExNdextcgaloaderLoader(object):
         Returns:
             none
         """
+        self._fetch_data_files(sources.HttpInputSource(tcga_github_repo_url,
+                                                       workers=self._download_workers),
+                               list_of_networks, output_directory)
 
-        if not os.path.exists(output_directory):
-            os.makedirs(output_directory)
-
-        for network in list_of_networks:
-            try:
-                response = requests.get(os.path.join(tcga_github_repo_url, network))
-
-                if response.status_code // 100 == 2:
-
-                    with open(os.path.join(output_directory, network), "w") as received_file:
-                        received_file.write(response.content.decode('utf-8-sig'))
-                else:
-                    self._handle_error(network)
-
-            except requests.exceptions.RequestException as e:
-                self._handle_error(network)
-
-        # print list of networks that we failed to download (if any)
-        if (self._failed_networks):
-            print('failed to receive {} networks:'.format(len(self._failed_networks)))
-            for network_name in self._failed_networks:
-                print(network_name)
-
-    def _generate_member_node_attributes(self, df):
-        l = df.tolist()
-        set_of_gene_names_with_prefix = set()
-        for element in l:
-            if element == 'nan':
-                continue
-
-            if bool(re.match(NDExNdextcgaloaderLoader.HGNC_REGEX, element)):
-                set_of_gene_names_with_prefix.add('hgnc.symbol:' + element)
-            else:
-                set_of_gene_names_with_prefix.add(element)
+    def _get_member_node_attributes(self, df):
+        """
+        Gets value of member attribute of every family, complex and
+        compartment node in **df** from a single grouping of the data
+        frame by parent id. Members of a node are the nodes, on either
+        side of an edge, that have it as their parent. Names that are
+        valid HGNC symbols are prefixed with ``hgnc.symbol:``
+
+        :param df: data frame with edges and nodes without edges
+        :return: parent node id => ``|`` delimited sorted member attribute values
+        :rtype: dict
+        """
+        members = pd.concat([df[['PARENT_ID', 'SOURCE']].rename(columns={'SOURCE': 'MEMBER'}),
+                             df[['PARENT_ID_B', 'TARGET']].rename(columns={'PARENT_ID_B': 'PARENT_ID',
+                                                                           'TARGET': 'MEMBER'})],
+                            ignore_index=True).dropna()
+        members = members[members['MEMBER'] != 'nan']
 
-        # lisf_of_gene_names_with_prefix = ['hgnc:' + element for element in my_df.tolist()]
-        return set_of_gene_names_with_prefix
+        is_hgnc_symbol = self._hgnc_validator.get_valid_mask(members['MEMBER'])
+        members['MEMBER'] = members['MEMBER'].where(~is_hgnc_symbol,
+                                                    hgnc.HGNC_PREFIX + members['MEMBER'])
 
+        return members.groupby('PARENT_ID', sort=False)['MEMBER'].agg(
+            lambda names: '|'.join(sorted(set(names)))).to_dict()
 
     def _add_member_properties(self, df):
-        added_parent_id_column_added = False
-        added_parent_id_column_b_added = False
+        """
+        Adds MEMBER column, if **df** has family, complex or compartment
+        nodes in NODE_TYPE, and likewise MEMBER_B column for NODE_TYPE_B
+        :param df: data frame with edges and nodes without edges, updated in place
+        :return: tuple (True if MEMBER was added, True if MEMBER_B was added)
+        :rtype: tuple
+        """
+        type_complex_or_proteinfamily = engine.COMPOUND_NODE_TYPES
 
-        type_complex_or_proteinfamily = []
-        type_complex_or_proteinfamily.append(NODE_TYPE_MAPPING['FAMILY'])
-        type_complex_or_proteinfamily.append(NODE_TYPE_MAPPING['COMPLEX'])
-        type_complex_or_proteinfamily.append(NODE_TYPE_MAPPING['COMPARTMENT'])
+        is_compound = df['NODE_TYPE'].isin(type_complex_or_proteinfamily)
+        is_compound_b = df['NODE_TYPE_B'].isin(type_complex_or_proteinfamily)
+        added_parent_id_column_added = bool(is_compound.any())
+        added_parent_id_column_b_added = bool(is_compound_b.any())
 
-        for idx, row in df.iterrows():
-            if row['NODE_TYPE'] in type_complex_or_proteinfamily:
-                if not added_parent_id_column_added:
-                    added_parent_id_column_added = True
-                    df['MEMBER'] = ''
-                    break
+        if added_parent_id_column_added or added_parent_id_column_b_added:
+            member_node_attributes = self._get_member_node_attributes(df)
 
         if added_parent_id_column_added:
-            member_node_attributes_set = set()
-
-            for idx, row in df.iterrows():
-                if row['NODE_TYPE'] in type_complex_or_proteinfamily:
-                    member_node_id = row['NODE_ID']
-
-                    my_df = df[(df['PARENT_ID'] == member_node_id)]['SOURCE']
-                    member_node_attributes = self._generate_member_node_attributes(my_df)
-                    member_node_attributes_set.update(member_node_attributes)
-
-                    my_df_b = df[(df['PARENT_ID_B'] == member_node_id)]['TARGET']
-                    member_node_attributes = self._generate_member_node_attributes(my_df_b)
-                    member_node_attributes_set.update(member_node_attributes)
-
-                    if member_node_attributes_set:
-                        row['MEMBER'] = '|'.join(sorted(member_node_attributes_set))
-
-                    member_node_attributes_set.clear()
-
-        for idx, row in df.iterrows():
-            if row['NODE_TYPE_B'] in type_complex_or_proteinfamily:
-                if not added_parent_id_column_b_added:
-                    added_parent_id_column_b_added = True
-                    df['MEMBER_B'] = ''
-                    break
+            df['MEMBER'] = df['NODE_ID'].where(is_compound).map(member_node_attributes).fillna('')
 
         if added_parent_id_column_b_added:
-            member_node_attributes_set = set()
-
-            for idx, row in df.iterrows():
-                if row['NODE_TYPE_B'] in type_complex_or_proteinfamily:
-                    member_node_id = row['NODE_ID_B']
-
-                    # get a list of all target node names with the same id as PARENT_ID_B
-                    my_df_b = df[(df['PARENT_ID_B'] == member_node_id)]['TARGET']
-                    member_node_attributes = self._generate_member_node_attributes(my_df_b)
-                    member_node_attributes_set.update(member_node_attributes)
-
-                    my_df_b = df[(df['PARENT_ID'] == member_node_id)]['SOURCE']
-                    member_node_attributes = self._generate_member_node_attributes(my_df_b)
-                    member_node_attributes_set.update(member_node_attributes)
-
-                    if member_node_attributes_set:
-                        row['MEMBER_B'] = '|'.join(sorted(member_node_attributes_set))
-
-                    member_node_attributes_set.clear()
+            df['MEMBER_B'] = df['NODE_ID_B'].where(is_compound_b).map(member_node_attributes).fillna('')
 
         return added_parent_id_column_added, added_parent_id_column_b_added
 
 
-    def _create_names_for_unnamed_nodes(self, df, id_to_gene_dict,
-                                        node_type_param, source_param, member_param, node_id_param):
-        '''
-        :param df:
-        :param id_to_gene_dict:
-        :param node_type_param: NODE_TYPE or NODE_TYPE_B
-        :param source_param: SOURCE or TARGET
-        :param member_param: MEMBER or MEMBER_B
-        :param node_id_param: NODE_ID or NODE_ID_B
-        :return:
-        '''
-
-        node_types = ['proteinfamily', 'compartment', 'complex']
-
-        for index, row in df.iterrows():
-
-            node_type = row[node_type_param]
-
-            if node_type not in node_types:
-                continue
-
-            source_or_target = row[source_param]
-            if source_or_target and source_or_target.strip() and (source_or_target.lower() != 'undefined'):
-                continue
-
-            member = row[member_param]
-            if not member:
-                continue
-
-            # get a list of proteins from member field
-            member_proteins = []
-            protein_symbols = member.split('|')
-            for protein_symbol in protein_symbols:
-                protein_array = protein_symbol.split(':')
-                if (len(protein_array) > 1):
-                    member_proteins.append(protein_array[1])
-                else:
-                    member_proteins.append(protein_array[0])
-
-            if not member_proteins:
+    def _create_names_for_unnamed_nodes(self, df, id_to_gene_dict):
+        """
+        Names family, complex and compartment nodes of **df** that
+        have no name, such as ``family [ A B C D ... ]``, after their
+        members. Source and target columns are stacked so each node
+        is named once, however many edges it has
+
+        :param df: data frame with edges and nodes without edges
+        :param id_to_gene_dict: node id => name, updated in place
+        :return: None
+        """
+        sides = []
+        for node_id_col, node_type_col, name_col, member_col in (('NODE_ID', 'NODE_TYPE', 'SOURCE', 'MEMBER'),
+                                                                 ('NODE_ID_B', 'NODE_TYPE_B', 'TARGET', 'MEMBER_B')):
+            if member_col not in df.columns:
                 continue
+            side = df[[node_id_col, node_type_col, name_col, member_col]]
+            sides.append(side.set_axis(['NODE_ID', 'NODE_TYPE', 'NAME', 'MEMBER'], axis=1))
+        if not sides:
+            return
 
-            member_proteins.sort()
-
-            if (len(member_proteins) > 4):
-                member_proteins = member_proteins[0:4]
-                member_proteins_str = " ".join(member_proteins)
-                member_proteins_str = member_proteins_str + ' ...'
-            else:
-                member_proteins_str = " ".join(member_proteins)
-
-            node_name = 'family' if (node_type == 'proteinfamily') else node_type
-
-            row[source_or_target] = node_name + ' [ ' + member_proteins_str + ' ]'
-
-            id_to_gene_dict[row[node_id_param]] = row[source_or_target]
+        nodes = pd.concat(sides, ignore_index=True)
+        is_unnamed = nodes['NODE_TYPE'].isin(engine.UNNAMED_NODE_TYPES) & \
+            ((nodes['NAME'].str.strip() == '') | (nodes['NAME'].str.lower() == 'undefined')) & \
+            (nodes['MEMBER'] != '')
+        nodes = nodes[is_unnamed].drop_duplicates('NODE_ID', keep='last')
 
-        return
+        id_to_gene_dict.update(zip(nodes['NODE_ID'],
+                                   map(engine.get_name_for_unnamed_node,
+                                       nodes['NODE_TYPE'], nodes['MEMBER'])))
 
 
     def _normalize_nodes(self, nodes_df, nested_nodes_map):
-        for key, value in nested_nodes_map.items():
-            nodes_df = nodes_df[nodes_df.NODE_ID != key]
-            nodes_df['PARENT_ID'].replace([key], value, inplace=True)
-
-        return nodes_df
-
-    def  _process_nested_nodes(self, node_df, nested_nodes_map, network_name):
-        normalized_df_nodes = node_df.copy()
+        """
+        Removes nested nodes and makes their children children
+        of their top level ancestor, whatever the depth of nesting,
+        in a single pass. Since every nested node is removed, no
+        nested nodes are left to report afterwards
+        :param nodes_df: data frame with nodes
+        :param nested_nodes_map: nested node id => parent id
+        :return: data frame without nested nodes
+        """
+        top_level_parents = engine.get_top_level_parents(nested_nodes_map)
 
-        while nested_nodes_map:
-            normalized_df_nodes = self._normalize_nodes(normalized_df_nodes, nested_nodes_map)
-            nested_nodes_map = self._report_nested_nodes(normalized_df_nodes, network_name)
+        nodes_df = nodes_df[~nodes_df['NODE_ID'].isin(top_level_parents)].copy()
+        nodes_df['PARENT_ID'] = nodes_df['PARENT_ID'].map(top_level_parents).fillna(nodes_df['PARENT_ID'])
 
-        return normalized_df_nodes
+        return nodes_df
 
     def get_pandas_dataframe(self, file_name):
         """
@@ -805,73 +1379,26 @@ class NDExNdextcgaloaderLoader(object):
             logger.error('File is empty: ' + path_to_file)
             return None, None, None
 
-        reached_header = False
-        lines = []
         logger.info('Examining file: ' + path_to_file)
-        current_line_no = 0;
-        network_description = ''
-        # read file into lines list skipping the starting
-        # lines before --NODE_NAME entry
-        with open(path_to_file, 'r') as f:
-            for line in f:
-                current_line_no += 1
-                if line.startswith('--NODE_NAME'):
-                    break
-                else:
-                    if (current_line_no > 1) and len(line.strip()) > 0:
-                        network_description += line
-
-            lines.append(line)
-            lines.extend(f.readlines())
-
-        mode = "node"
-        edge_lines = []
-        edge_rows_tuples = []
-        node_rows_tuples = []
-        node_lines = []
-        edge_fields = []
-        node_fields = []
-        for index in range(len(lines)):
-            line = lines[index]
-            if index is 0:
-                if line.startswith('--'):
-                    line = line[2:]
-                line = line.strip('\n')
-                if line.endswith('--'):
-                    line = line[0:-2]
-                node_fields = [h.strip() for h in line.split('\t')]
-            elif line == '\n':
-                mode = "edge_header"
-            elif mode is "edge_header":
-                edge_fields = [h.strip() for h in line.split('\t')]
-                mode = "edge"
-            elif mode is "node":
-                node_tuple = tuple(line.rstrip().split('\t'))
-                node_rows_tuples.append(node_tuple)
-                node_lines.append(line)
-            elif mode is "edge":
-                edge_tuple = tuple(line.rstrip().split('\t'))
-                edge_rows_tuples.append(edge_tuple)
-                edge_lines.append(line)
-
-        edge_df = pd.DataFrame.from_records(edge_rows_tuples, columns=edge_fields)
-
-        node_df = pd.DataFrame.from_records(node_rows_tuples, columns=node_fields)
-
-        id_to_gene_dict = {}
-
-        for idx, row in node_df.iterrows():
-            id_to_gene_dict[row.NODE_ID] = row[0]
+        pathway = self._parser.parse_file(path_to_file)
+        network_description = pathway.description
+
+        edge_df = pd.DataFrame(pathway.get_edge_table(), columns=pathway.edge_fields)
+
+        node_df = pd.DataFrame(pathway.get_node_table(), columns=pathway.node_fields)
+
+        # first node column holds the node name
+        id_to_gene_dict = dict(zip(pathway.get_node_column('NODE_ID'), pathway.node_columns[0]))
 
         node_df.rename(index=str, columns={'NODE_NAME': 'NODE'}, inplace=True)
-        edge_df.rename(index=str, columns={'--EDGE_ID': 'EDGE_ID'}, inplace=True)
         network_name = file_name.replace('.txt', '')
 
         self._report_proteins_with_invalid_names(node_df, network_name)
-        nested_nodes_map = self._report_nested_nodes(node_df, network_name)
+        with self._get_stage_timer().time(metrics.NESTED_NODES_STAGE):
+            nested_nodes_map = self._report_nested_nodes(node_df, network_name)
 
-        if nested_nodes_map:
-            node_df = self._process_nested_nodes(node_df, nested_nodes_map, network_name)
+            if nested_nodes_map:
+                node_df = self._normalize_nodes(node_df, nested_nodes_map)
 
         edge_df.rename(index=str,
                        columns={'EDGE_TYPEINTERACTION_PUBMED_ID': 'EDGE_TYPE'},
@@ -893,6 +1420,13 @@ class NDExNdextcgaloaderLoader(object):
         df_with_b.rename(index=str, columns={'POSY': 'POSY_B'}, inplace=True)
 
         df_with_a_b = df_with_a.join(df_with_b.set_index('EDGE_ID'), on='EDGE_ID', how='right')
+
+        # row order of joins differs between pandas releases, so put edges in
+        # the order networks have always been generated in
+        edge_rank = engine.get_edge_rank(list(zip(edge_df['EDGE_ID'], edge_df['SOURCE'], edge_df['TARGET'])),
+                                         set(node_df['NODE_ID']))
+        edge_ids = df_with_a_b['EDGE_ID'].tolist()
+        df_with_a_b = df_with_a_b.iloc[sorted(range(len(edge_ids)), key=lambda i: edge_rank[edge_ids[i]])]
         df_with_a_b = df_with_a_b.astype(str)
 
         df_with_a_b['NODE_TYPE'] = df_with_a_b['NODE_TYPE'].map(NODE_TYPE_MAPPING, na_action='ignore')
@@ -911,20 +1445,16 @@ class NDExNdextcgaloaderLoader(object):
         #df_with_a_b['NODE_TYPE_B'].fillna('other', inplace=True)
 
 
-        nodes_with_edges_ids = set()
-        for index, row in df_with_a_b.iterrows():
-            nodes_with_edges_ids.add(row['NODE_ID'])
-            nodes_with_edges_ids.add(row['NODE_ID_B'])
+        nodes_with_edges_ids = set(df_with_a_b['NODE_ID']) | set(df_with_a_b['NODE_ID_B'])
 
-        node_df_without_edges = node_df[~node_df['NODE_ID'].isin(nodes_with_edges_ids)]
+        node_df_without_edges = node_df[~node_df['NODE_ID'].isin(nodes_with_edges_ids)].rename(columns={'NODE': 'SOURCE'})
         node_df_without_edges['NODE_TYPE'] = node_df_without_edges['NODE_TYPE'].map(NODE_TYPE_MAPPING, na_action='ignore')
 
-        node_df_without_edges.rename(index=str, columns={'NODE': 'SOURCE'}, inplace=True)
-
-        for index, row in node_df_without_edges.iterrows():
-            df_with_a_b = df_with_a_b.append(row, ignore_index=True)  # Moving
+        # nodes without edges are added as rows of their own below the edges
+        df_with_a_b = pd.concat([df_with_a_b, node_df_without_edges], ignore_index=True, sort=False)
 
-        add_parent_id_column, add_parent_id_column_b = self._add_member_properties(df_with_a_b)
+        with self._get_stage_timer().time(metrics.MEMBERS_STAGE):
+            add_parent_id_column, add_parent_id_column_b = self._add_member_properties(df_with_a_b)
         df_with_a_b = df_with_a_b.replace(np.nan, '', regex=True)
 
 
@@ -936,24 +1466,91 @@ class NDExNdextcgaloaderLoader(object):
         # These nodes represent unrelated to nothing processes (for example, p53/p21 in
         #  BRCA-2012-Cell-cycle-signaling-pathway) and we need to keep them.
         #
-        # So, we iterate over df_with_a_b and add rows that satisfy our condition to the new frame, df_final
+        # So, we select rows of df_with_a_b that satisfy our condition into the new frame, df_final
 
-        df_final = pd.DataFrame()
-        for index, row in df_with_a_b.iterrows():
-            if (pd.isnull(row['EDGE_ID']) or (row['EDGE_ID']=='')):
-                if ((row['NODE_TYPE'] != 'gene') and (row['PARENT_ID'] == '-1')):
+        has_edge = df_with_a_b['EDGE_ID'].notnull() & (df_with_a_b['EDGE_ID'] != '')
+        is_kept_without_edge = (df_with_a_b['NODE_TYPE'] != 'gene') & (df_with_a_b['PARENT_ID'] == '-1')
+        df_final = df_with_a_b[has_edge | is_kept_without_edge].reset_index(drop=True)
 
-                    df_final = df_final.append(row, ignore_index=True)
 
-            else:
-                df_final = df_final.append(row, ignore_index=True)
+        self._create_names_for_unnamed_nodes(df_final, id_to_gene_dict)
 
+        return df_final, network_description, id_to_gene_dict
 
-        self._create_names_for_unnamed_nodes(df_final, id_to_gene_dict,'NODE_TYPE', 'SOURCE', 'MEMBER', 'NODE_ID')
 
-        self._create_names_for_unnamed_nodes(df_final, id_to_gene_dict,'NODE_TYPE_B', 'TARGET', 'MEMBER_B','NODE_ID_B')
+    def get_network_table(self, file_name):
+        """
+        Gets network table from file with the table engine. Reports
+        are written just like :py:meth:`get_pandas_dataframe` does
+        :param file_name: name of network file in --datadir
+        :return: tuple (network table, network description, id_to_gene_dict)
+        :rtype: tuple
+        """
+        path_to_file = os.path.join(os.path.abspath(self._datadir), file_name)
+        if os.path.getsize(path_to_file) == 0:
+            logger.error('File is empty: ' + path_to_file)
+            return None, None, None
 
-        return df_final, network_description, id_to_gene_dict
+        logger.info('Examining file: ' + path_to_file)
+        pathway = self._parser.parse_file(path_to_file)
+        network_name = file_name.replace('.txt', '')
+
+        table, id_to_gene_dict, invalid_protein_names, nested_nodes = \
+            self._table_engine.convert(pathway)
+
+        self._write_invalid_protein_names(invalid_protein_names, network_name)
+        self._write_nested_nodes(nested_nodes, network_name)
+
+        return table, pathway.description, id_to_gene_dict
+
+
+_worker_loader = None
+"""
+Loader of a conversion worker process, set by :py:func:`_init_conversion_worker`
+"""
+
+
+def _get_worker_context():
+    """
+    Gets context that starts conversion worker processes with the first
+    of :py:const:`WORKER_START_METHODS` available on this platform
+    :return: multiprocessing context
+    """
+    available = multiprocessing.get_all_start_methods()
+    for start_method in WORKER_START_METHODS:
+        if start_method in available:
+            return multiprocessing.get_context(start_method)
+    return multiprocessing.get_context()
+
+
+def _init_conversion_worker(args, loadplan, style_map):
+    """
+    Sets up loader of a conversion worker process
+    :param args: parsed command line arguments
+    :param loadplan: parsed load plan
+    :param style_map: style map with all styles parsed
+    :type style_map: :py:class:`~ndextcgaloader.style.StyleMap`
+    :return: None
+    """
+    global _worker_loader
+    _worker_loader = NDExNdextcgaloaderLoader(args)
+    _worker_loader._loadplan = loadplan
+    _worker_loader._style_map = style_map
+
+
+def _convert_file_in_worker(file_name):
+    """
+    Converts **file_name** in a conversion worker process. Report
+    rows and metrics are returned rather than written, so the main
+    process can add them in order
+    :param file_name: name of network file in --datadir
+    :return: tuple (result of
+             :py:meth:`NDExNdextcgaloaderLoader._convert_file`,
+             list of (report name, network name, rows),
+             list of metrics records)
+    :rtype: tuple
+    """
+    return _worker_loader._convert_file_with_reports(file_name)
 
 
 def main(args):
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+"""Streaming parser for PathwayMapper text files."""
+
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+NODE_HEADER_PREFIX = '--NODE_NAME'
+"""
+Start of line with names of node columns, it
+ends the network name/description section
+"""
+
+NAME = 'name'
+DESCRIPTION = 'description'
+NODE_HEADER = 'node_header'
+NODE = 'node'
+EDGE_HEADER = 'edge_header'
+EDGE = 'edge'
+"""
+Types of records yielded by :py:meth:`PathwayMapperParser.iter_records`
+"""
+
+
+def _parse_header(line):
+    """
+    Splits a header line such as ``--NODE_NAME<TAB>...<TAB>POSY--``
+    or ``--EDGE_ID<TAB>...<TAB>EDGE_TYPE`` into column names,
+    dropping the ``--`` decoration
+    :param line: header line
+    :type line: string
+    :return: column names
+    :rtype: list
+    """
+    line = line.strip('\n')
+    if line.startswith('--'):
+        line = line[2:]
+    if line.endswith('--'):
+        line = line[0:-2]
+    return [h.strip() for h in line.split('\t')]
+
+
+class ParsedPathway(object):
+    """
+    Contents of a PathwayMapper text file. Node and edge
+    sections are held column by column, one list of string
+    values per column, in the order rows appear in the file
+    """
+
+    def __init__(self, name='', description='', node_fields=None,
+                 edge_fields=None):
+        """
+        Constructor
+
+        :param name: network name from first line of file
+        :param description: network description
+        :param node_fields: names of node columns
+        :param edge_fields: names of edge columns
+        """
+        self.name = name
+        self.description = description
+        self.node_fields = []
+        self.edge_fields = []
+        self.node_columns = []
+        self.edge_columns = []
+        self.set_node_fields(node_fields or [])
+        self.set_edge_fields(edge_fields or [])
+
+    def set_node_fields(self, node_fields):
+        """
+        Sets names of node columns, clearing any node rows
+        :param node_fields: column names
+        :type node_fields: list
+        :return: None
+        """
+        self.node_fields = list(node_fields)
+        self.node_columns = [[] for f in self.node_fields]
+
+    def set_edge_fields(self, edge_fields):
+        """
+        Sets names of edge columns, clearing any edge rows
+        :param edge_fields: column names
+        :type edge_fields: list
+        :return: None
+        """
+        self.edge_fields = list(edge_fields)
+        self.edge_columns = [[] for f in self.edge_fields]
+
+    @staticmethod
+    def _append_row(columns, values, section):
+        """
+        Appends **values** to **columns**. Missing trailing
+        values are stored as None
+        :raises ValueError: if row has more values than there are columns
+        """
+        if len(values) > len(columns):
+            raise ValueError(section + ' row ' + str(values) + ' has ' +
+                             str(len(values)) + ' fields, but header only defines ' +
+                             str(len(columns)))
+        for column, value in zip(columns, values):
+            column.append(value)
+        for column in columns[len(values):]:
+            column.append(None)
+
+    def add_node_row(self, values):
+        """
+        Appends a node row
+        :param values: values of node row in column order
+        :return: None
+        """
+        ParsedPathway._append_row(self.node_columns, values, 'Node')
+
+    def add_edge_row(self, values):
+        """
+        Appends an edge row
+        :param values: values of edge row in column order
+        :return: None
+        """
+        ParsedPathway._append_row(self.edge_columns, values, 'Edge')
+
+    def get_node_count(self):
+        """
+        :return: number of node rows
+        :rtype: int
+        """
+        if not self.node_columns:
+            return 0
+        return len(self.node_columns[0])
+
+    def get_edge_count(self):
+        """
+        :return: number of edge rows
+        :rtype: int
+        """
+        if not self.edge_columns:
+            return 0
+        return len(self.edge_columns[0])
+
+    def get_node_column(self, field):
+        """
+        Gets values of node column named **field**
+        :param field: column name, for example NODE_ID
+        :raises ValueError: if there is no such column
+        :return: values in file order
+        :rtype: list
+        """
+        return self.node_columns[self.node_fields.index(field)]
+
+    def get_edge_column(self, field):
+        """
+        Gets values of edge column named **field**
+        :param field: column name, for example SOURCE
+        :raises ValueError: if there is no such column
+        :return: values in file order
+        :rtype: list
+        """
+        return self.edge_columns[self.edge_fields.index(field)]
+
+    def get_node_table(self):
+        """
+        Gets node section as column name => values, suitable
+        for :py:class:`pandas.DataFrame`
+        :rtype: :py:class:`collections.OrderedDict`
+        """
+        return OrderedDict(zip(self.node_fields, self.node_columns))
+
+    def get_edge_table(self):
+        """
+        Gets edge section as column name => values, suitable
+        for :py:class:`pandas.DataFrame`
+        :rtype: :py:class:`collections.OrderedDict`
+        """
+        return OrderedDict(zip(self.edge_fields, self.edge_columns))
+
+    def iter_nodes(self):
+        """
+        Iterates over node rows
+        :return: tuple of values per row in column order
+        """
+        return zip(*self.node_columns)
+
+    def iter_edges(self):
+        """
+        Iterates over edge rows
+        :return: tuple of values per row in column order
+        """
+        return zip(*self.edge_columns)
+
+
+class PathwayMapperParser(object):
+    """
+    Parses PathwayMapper text files in a single pass. The format is::
+
+        <network name>
+        <zero or more lines of description>
+        --NODE_NAME<TAB>NODE_ID<TAB>NODE_TYPE<TAB>PARENT_ID<TAB>POSX<TAB>POSY--
+        <node rows>
+
+        --EDGE_ID<TAB>SOURCE<TAB>TARGET<TAB>EDGE_TYPE
+        <edge rows>
+
+    A blank line ends the node section and the line after
+    it holds the names of the edge columns
+    """
+
+    def iter_records(self, f):
+        """
+        Reads **f** line by line yielding ``(record type, value)``
+        tuples without keeping the file in memory. Record types are:
+
+        * :py:const:`NAME`: first line of file, stripped
+        * :py:const:`DESCRIPTION`: one non-blank description line, as read
+        * :py:const:`NODE_HEADER` / :py:const:`EDGE_HEADER`: list of column names
+        * :py:const:`NODE` / :py:const:`EDGE`: tuple of row values
+
+        :param f: file like object opened in text mode
+        :return: generator of (record type, value) tuples
+        """
+        line_no = 0
+        for line in f:
+            line_no += 1
+            if line.startswith(NODE_HEADER_PREFIX):
+                yield NODE_HEADER, _parse_header(line)
+                break
+            if line_no == 1:
+                yield NAME, line.strip()
+            elif len(line.strip()) > 0:
+                yield DESCRIPTION, line
+        else:
+            return
+
+        mode = NODE
+        for line in f:
+            if line == '\n':
+                mode = EDGE_HEADER
+            elif mode == EDGE_HEADER:
+                yield EDGE_HEADER, _parse_header(line)
+                mode = EDGE
+            else:
+                yield mode, tuple(line.rstrip().split('\t'))
+
+    def parse(self, f):
+        """
+        Parses **f** into columns
+
+        :param f: file like object opened in text mode
+        :raises ValueError: if a row has more values than its header has columns
+        :return: parsed network
+        :rtype: :py:class:`ParsedPathway`
+        """
+        pathway = ParsedPathway()
+        description = []
+
+        for record_type, value in self.iter_records(f):
+            if record_type == NODE:
+                pathway.add_node_row(value)
+            elif record_type == EDGE:
+                pathway.add_edge_row(value)
+            elif record_type == DESCRIPTION:
+                description.append(value)
+            elif record_type == NODE_HEADER:
+                pathway.set_node_fields(value)
+            elif record_type == EDGE_HEADER:
+                pathway.set_edge_fields(value)
+            elif record_type == NAME:
+                pathway.name = value
+
+        pathway.description = ''.join(description)
+        return pathway
+
+    def parse_file(self, path):
+        """
+        Parses PathwayMapper text file at **path**
+
+        :param path: path to file
+        :type path: string
+        :return: parsed network
+        :rtype: :py:class:`ParsedPathway`
+        """
+        with open(path, 'r') as f:
+            return self.parse(f)
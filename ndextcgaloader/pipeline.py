@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""Bounded queues connecting stages of the loader so they overlap."""
+
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 8
+"""
+Default number of items a stage can get ahead of the stage consuming them
+"""
+
+_END = object()
+"""
+Marks the end of the items in a queue
+"""
+
+
+class _Failure(object):
+    """
+    Carries an exception raised by a stage to the stage consuming it
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StageStats(object):
+    """
+    Number of items a stage finished, when it finished them and
+    how deep the queue it fills got
+    """
+
+    def __init__(self, name, start_time):
+        """
+        Constructor
+
+        :param name: name of stage
+        :param start_time: time the pipeline started, as
+                           returned by :py:func:`time.monotonic`
+        """
+        self._name = name
+        self._start_time = start_time
+        self._end_time = start_time
+        self._items = 0
+        self._depth_samples = 0
+        self._depth_total = 0
+        self._max_depth = 0
+        self._lock = threading.Lock()
+
+    def add_item(self):
+        """
+        Records that the stage finished an item
+        :return: None
+        """
+        with self._lock:
+            self._items += 1
+            self._end_time = time.monotonic()
+
+    def sample_queue_depth(self, depth):
+        """
+        Records number of items waiting in the queue the stage fills
+        :param depth: number of items waiting
+        :return: None
+        """
+        with self._lock:
+            self._depth_samples += 1
+            self._depth_total += depth
+            self._max_depth = max(self._max_depth, depth)
+
+    def get_name(self):
+        """
+        Gets name of stage
+        :rtype: string
+        """
+        return self._name
+
+    def get_items(self):
+        """
+        Gets number of items the stage finished
+        :rtype: int
+        """
+        with self._lock:
+            return self._items
+
+    def get_elapsed_time(self):
+        """
+        Gets seconds from start of the pipeline until
+        the stage finished its last item
+        :rtype: float
+        """
+        with self._lock:
+            return self._end_time - self._start_time
+
+    def get_throughput(self):
+        """
+        Gets items finished per second
+        :rtype: float
+        """
+        with self._lock:
+            elapsed = self._end_time - self._start_time
+            if elapsed <= 0:
+                return 0.0
+            return self._items / elapsed
+
+    def get_max_queue_depth(self):
+        """
+        Gets largest number of items seen waiting in the queue
+        :rtype: int
+        """
+        with self._lock:
+            return self._max_depth
+
+    def get_mean_queue_depth(self):
+        """
+        Gets mean number of items seen waiting in the queue
+        :rtype: float
+        """
+        with self._lock:
+            if self._depth_samples == 0:
+                return 0.0
+            return self._depth_total / self._depth_samples
+
+
+class Pipeline(object):
+    """
+    Runs stages of the loader at the same time. Each stage is an
+    iterator run in a thread of its own that hands what it yields to
+    the next stage through a queue of at most **queue_size** items, so
+    a fast stage waits for a slow one instead of piling up work
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Constructor
+
+        :param queue_size: maximum number of items waiting between stages
+        :type queue_size: int
+        """
+        if queue_size is None or queue_size < 1:
+            queue_size = DEFAULT_QUEUE_SIZE
+        self._queue_size = queue_size
+        self._start_time = time.monotonic()
+        self._stats = OrderedDict()
+
+    def get_stats(self, name):
+        """
+        Gets statistics of stage **name**, creating them on first use
+        :param name: name of stage
+        :return: statistics
+        :rtype: :py:class:`StageStats`
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = StageStats(name, self._start_time)
+            self._stats[name] = stats
+        return stats
+
+    def add_stage(self, name, items):
+        """
+        Starts a thread pulling **items** and returns an iterator over
+        them fed through a bounded queue. An exception raised by
+        **items** is raised again by the returned iterator
+
+        :param name: name of stage
+        :param items: iterator of the stage, usually reading the
+                      iterator returned for the previous stage
+        :return: iterator over **items**
+        :rtype: iterator
+        """
+        stats = self.get_stats(name)
+        items_queue = queue.Queue(maxsize=self._queue_size)
+
+        def _produce():
+            try:
+                for item in items:
+                    stats.add_item()
+                    items_queue.put(item)
+                    stats.sample_queue_depth(items_queue.qsize())
+            except BaseException as e:
+                items_queue.put(_Failure(e))
+            finally:
+                items_queue.put(_END)
+
+        thread = threading.Thread(target=_produce, name='pipeline-' + name)
+        thread.daemon = True
+        thread.start()
+
+        def _consume():
+            while True:
+                item = items_queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+            thread.join()
+
+        return _consume()
+
+    def format_stats(self):
+        """
+        Formats statistics of all stages as a table
+        :return: lines of table
+        :rtype: list
+        """
+        lines = ['{:<10} {:>6} {:>10} {:>8} {:>10} {:>11}'.format('stage', 'items', 'seconds',
+                                                                  'items/s', 'max queue',
+                                                                  'mean queue')]
+        for stats in self._stats.values():
+            lines.append('{:<10} {:>6d} {:>10.2f} {:>8.2f} {:>10d} {:>11.2f}'
+                         .format(stats.get_name(), stats.get_items(),
+                                 stats.get_elapsed_time(), stats.get_throughput(),
+                                 stats.get_max_queue_depth(),
+                                 stats.get_mean_queue_depth()))
+        return lines
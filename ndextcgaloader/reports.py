@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""Reports on issues found in network files, written once per run."""
+
+import os
+import logging
+import threading
+import importlib.util
+
+logger = logging.getLogger(__name__)
+
+INVALID_PROTEIN_NAMES = 'invalid_protein_names'
+NESTED_NODES = 'nested_nodes'
+
+REPORT_COLUMNS = {
+    INVALID_PROTEIN_NAMES: ['protein_name', 'network'],
+    NESTED_NODES: ['nested_node_name', 'nested_node_type', 'parent_node_name',
+                   'parent_node_type', 'network']
+}
+"""
+Columns of each report, the last one holding the network name
+"""
+
+TSV_HEADERS = {
+    INVALID_PROTEIN_NAMES: False,
+    NESTED_NODES: True
+}
+"""
+Whether TSV file of each report starts with a header line
+"""
+
+TSV_FORMAT = 'tsv'
+PARQUET_FORMAT = 'parquet'
+REPORT_FORMATS = [TSV_FORMAT, PARQUET_FORMAT]
+"""
+Formats reports can be written in; parquet needs pyarrow or fastparquet
+"""
+
+PARQUET_ENGINES = ['pyarrow', 'fastparquet']
+
+
+def check_report_rows(report_rows):
+    """
+    Checks that **report_rows**, as read back from a JSON file,
+    only hold rows of known reports, so they can be added to a
+    :py:class:`ReportSink`
+
+    :param report_rows: list of (report name, network name, rows)
+    :return: list of (report name, network name, rows) tuples,
+             each row a tuple of strings
+    :rtype: list
+    :raises ValueError: if **report_rows** are not rows of
+                        known reports
+    """
+    if not isinstance(report_rows, list):
+        raise ValueError('Report rows are not a list')
+    checked = []
+    for entry in report_rows:
+        if not isinstance(entry, (list, tuple)) or len(entry) != 3:
+            raise ValueError('Report rows entry is not (report, network, rows): ' + repr(entry))
+        report, network_name, rows = entry
+        if report not in REPORT_COLUMNS:
+            raise ValueError('Unknown report: ' + repr(report))
+        if not isinstance(network_name, str):
+            raise ValueError('Network name is not a string: ' + repr(network_name))
+        if not isinstance(rows, (list, tuple)):
+            raise ValueError('Rows of ' + report + ' are not a list')
+        num_columns = len(REPORT_COLUMNS[report]) - 1
+        for row in rows:
+            if not isinstance(row, (list, tuple)) or len(row) != num_columns or \
+                    not all(isinstance(value, str) for value in row):
+                raise ValueError('Row of ' + report + ' is not ' + str(num_columns) +
+                                 ' strings: ' + repr(row))
+        checked.append((report, network_name, [tuple(row) for row in rows]))
+    return checked
+
+
+class ReportSink(object):
+    """
+    Collects report rows in memory, from any thread, and writes
+    each report once. Rows are sorted by network name, keeping the
+    order they were added in within a network, so reports do not
+    depend on the order networks were processed in. As TSV, rows of
+    each network follow a blank line, as they always have
+    """
+
+    def __init__(self, directory, report_format=TSV_FORMAT):
+        """
+        Constructor
+
+        :param directory: directory to write reports to
+        :param report_format: one of :py:const:`REPORT_FORMATS`
+        :raises ValueError: if **report_format** is not supported
+        :raises ImportError: if **report_format** is parquet and
+                             no parquet engine is installed
+        """
+        if report_format is None:
+            report_format = TSV_FORMAT
+        if report_format not in REPORT_FORMATS:
+            raise ValueError('Unsupported report format: ' + str(report_format))
+        if report_format == PARQUET_FORMAT and \
+                not any(importlib.util.find_spec(engine) is not None
+                        for engine in PARQUET_ENGINES):
+            raise ImportError('Writing reports as ' + PARQUET_FORMAT + ' requires ' +
+                              ' or '.join(PARQUET_ENGINES) + ' to be installed')
+        self._directory = directory
+        self._report_format = report_format
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def get_path(self, report):
+        """
+        Gets path of file **report** is written to
+        :param report: name of report, such as :py:const:`NESTED_NODES`
+        :return: path
+        :rtype: string
+        """
+        return os.path.join(os.path.abspath(self._directory),
+                            report + '.' + self._report_format)
+
+    def remove_previous(self):
+        """
+        Removes reports, in any format, left by a previous run
+        :return: None
+        """
+        for report in REPORT_COLUMNS:
+            for report_format in REPORT_FORMATS:
+                path = os.path.join(os.path.abspath(self._directory),
+                                    report + '.' + report_format)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def add_rows(self, report, network_name, rows):
+        """
+        Adds **rows** of network **network_name** to **report**
+
+        :param report: name of report, such as :py:const:`NESTED_NODES`
+        :param network_name: name of network
+        :param rows: rows, each holding the report's columns but the
+                     network name
+        :return: None
+        """
+        if not rows:
+            return
+        rows = [tuple(row) + (network_name,) for row in rows]
+        with self._lock:
+            self._rows.setdefault(report, []).extend(rows)
+
+    def get_rows(self, report):
+        """
+        Gets rows of **report** sorted by network name
+        :param report: name of report
+        :return: rows, the last column holding the network name
+        :rtype: list
+        """
+        with self._lock:
+            rows = list(self._rows.get(report, []))
+        return sorted(rows, key=lambda row: row[-1])
+
+    def _write_tsv(self, report, rows, path):
+        """
+        Writes **rows** of **report** to TSV file **path**
+        """
+        with open(path, 'w') as f:
+            if TSV_HEADERS[report]:
+                f.write('\t'.join(REPORT_COLUMNS[report]) + '\n')
+            network_name = None
+            for row in rows:
+                if row[-1] != network_name:
+                    # networks are separated by a blank line
+                    if network_name is not None or TSV_HEADERS[report]:
+                        f.write('\n')
+                    network_name = row[-1]
+                f.write('\t'.join(row) + '\n')
+            if rows and not TSV_HEADERS[report]:
+                f.write('\n')
+
+    def _write_parquet(self, report, rows, path):
+        """
+        Writes **rows** of **report** to parquet file **path**
+        """
+        import pandas as pd
+        pd.DataFrame(rows, columns=REPORT_COLUMNS[report]).to_parquet(path, index=False)
+
+    def write(self):
+        """
+        Writes every report that has rows
+        :return: paths of files written
+        :rtype: list
+        """
+        paths = []
+        for report in REPORT_COLUMNS:
+            rows = self.get_rows(report)
+            if not rows:
+                continue
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory)
+            path = self.get_path(report)
+            if self._report_format == PARQUET_FORMAT:
+                self._write_parquet(report, rows, path)
+            else:
+                self._write_tsv(report, rows, path)
+            logger.debug('Wrote ' + str(len(rows)) + ' rows to ' + path)
+            paths.append(path)
+        return paths
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""Lookup of NDEx networks by name, cached on disk."""
+
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+NETWORK_NAMES_FILE = '.network_names.json'
+"""
+Name of file in the data directory caching network names
+"""
+
+DEFAULT_TTL = 3600
+"""
+Default number of seconds cached network names are trusted
+"""
+
+DEFAULT_PAGE_SIZE = 100
+"""
+Default number of networks requested from NDEx at a time
+"""
+
+NETWORK_ID = 'uuid'
+LOOKUP_TIME = 'time'
+
+
+def _get_search_string(network_name):
+    """
+    Gets NDEx search string matching networks named **network_name**,
+    quoted so its punctuation is not read as search syntax
+    :rtype: string
+    """
+    return 'name:"' + network_name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class NetworkNameResolver(object):
+    """
+    Finds UUIDs of networks of an NDEx account by name. Only the names
+    asked for are looked up, via the NDEx search, page by page, rather
+    than listing every network of the account. Networks found are
+    cached on disk for **ttl** seconds and replaced whenever a network
+    is uploaded. Names with no network are not cached, since the NDEx
+    search index may not list a network uploaded moments ago, so they
+    are searched for every time. Names compare case
+    insensitively. If several networks share a name, the most recently
+    modified one is used
+    """
+
+    def __init__(self, client, username, cachefile=None, ttl=DEFAULT_TTL,
+                 page_size=DEFAULT_PAGE_SIZE, server=None):
+        """
+        Constructor
+
+        :param client: NDEx client
+        :type client: :py:class:`~ndex2.client.Ndex2`
+        :param username: account whose networks are looked up
+        :param cachefile: path to file caching answers or ``None``
+                          to only cache them in memory
+        :param ttl: number of seconds cached answers are trusted
+        :param page_size: number of networks requested at a time
+        :param server: NDEx server, kept apart from other servers
+                       in **cachefile**
+        """
+        self._client = client
+        self._username = username
+        self._cachefile = cachefile
+        self._ttl = DEFAULT_TTL if ttl is None else ttl
+        self._page_size = page_size if page_size else DEFAULT_PAGE_SIZE
+        self._account_key = str(server) + ' ' + str(username)
+        self._accounts = {}
+        self._lock = threading.Lock()
+        self._search_failed = False
+
+    def _get_entries(self):
+        """
+        :return: cached answers of this account, network name
+                 upper cased => entry
+        :rtype: dict
+        """
+        return self._accounts.setdefault(self._account_key, {})
+
+    def load(self):
+        """
+        Loads cached answers from disk. A missing or unreadable
+        file results in an empty cache
+        :return: None
+        """
+        self._accounts = {}
+        if self._cachefile is None or not os.path.isfile(self._cachefile):
+            return
+        try:
+            with open(self._cachefile, 'r') as f:
+                self._accounts = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning('Ignoring unreadable network name cache ' +
+                           self._cachefile + ' : ' + str(e))
+
+    def save(self):
+        """
+        Writes cached answers to disk, replacing the previous
+        copy atomically, dropping those past their TTL and
+        those of names with no network
+        :return: None
+        """
+        if self._cachefile is None:
+            return
+        now = time.time()
+        with self._lock:
+            for entries in self._accounts.values():
+                for name in [name for name, entry in entries.items()
+                             if entry[NETWORK_ID] is None or
+                             now - entry[LOOKUP_TIME] > self._ttl]:
+                    del entries[name]
+            tmp_path = self._cachefile + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._accounts, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._cachefile)
+
+    def _set_entry(self, network_name, network_id, now):
+        """
+        Caches **network_id** as answer for **network_name**
+        """
+        self._get_entries()[network_name.upper()] = {NETWORK_ID: network_id,
+                                                     LOOKUP_TIME: now}
+
+    @staticmethod
+    def _pick_network(summaries):
+        """
+        Picks most recently modified of networks sharing a name
+        :return: UUID or None if **summaries** is empty
+        :rtype: string
+        """
+        if not summaries:
+            return None
+        summary = max(summaries, key=lambda s: s.get('modificationTime') or 0)
+        return summary.get('externalId')
+
+    def _search(self, network_name):
+        """
+        Searches account for networks named **network_name**
+        :return: UUID or None if there is no such network
+        :rtype: string
+        """
+        matches = []
+        start = 0
+        while True:
+            res = self._client.search_networks(search_string=_get_search_string(network_name),
+                                               account_name=self._username,
+                                               start=start, size=self._page_size)
+            summaries = res.get('networks') or []
+            matches.extend(s for s in summaries
+                           if (s.get('name') or '').upper() == network_name.upper())
+            start += 1
+            if len(summaries) < self._page_size or \
+                    start * self._page_size >= res.get('numFound', 0):
+                break
+        return NetworkNameResolver._pick_network(matches)
+
+    def load_all(self):
+        """
+        Caches every network of the account, requesting them page by page
+        :return: number of networks seen
+        :rtype: int
+        """
+        by_name = {}
+        offset = 0
+        while True:
+            summaries = self._client.get_user_network_summaries(self._username, offset=offset,
+                                                                limit=self._page_size) or []
+            for summary in summaries:
+                if summary.get('name') is not None:
+                    by_name.setdefault(summary['name'].upper(), []).append(summary)
+            offset += len(summaries)
+            if len(summaries) < self._page_size:
+                break
+
+        now = time.time()
+        with self._lock:
+            self._get_entries().clear()
+            for name, summaries in by_name.items():
+                self._set_entry(name, NetworkNameResolver._pick_network(summaries), now)
+        return offset
+
+    def resolve(self, network_name):
+        """
+        Gets UUID of network named **network_name**. If the NDEx search
+        fails, every network of the account is listed instead, once
+
+        :param network_name: name of network
+        :return: UUID or None if account has no such network
+        :rtype: string
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._get_entries().get(network_name.upper())
+        if entry is not None and entry[NETWORK_ID] is not None and \
+                now - entry[LOOKUP_TIME] <= self._ttl:
+            return entry[NETWORK_ID]
+
+        if self._search_failed:
+            return None
+
+        try:
+            network_id = self._search(network_name)
+        except Exception as e:
+            logger.warning('Unable to search for ' + network_name +
+                           ', listing all networks instead : ' + str(e))
+            self._search_failed = True
+            self.load_all()
+            with self._lock:
+                entry = self._get_entries().get(network_name.upper())
+            return None if entry is None else entry[NETWORK_ID]
+
+        if network_id is not None:
+            with self._lock:
+                self._set_entry(network_name, network_id, now)
+        return network_id
+
+    def record(self, network_name, network_id):
+        """
+        Caches **network_id** as UUID of **network_name**
+        after it was uploaded
+        :param network_name: name of network
+        :param network_id: UUID of network
+        :return: None
+        """
+        with self._lock:
+            self._set_entry(network_name, network_id, time.time())
+
+    def invalidate(self, network_name):
+        """
+        Drops cached answer for **network_name**, so it
+        is looked up again
+        :param network_name: name of network
+        :return: None
+        """
+        with self._lock:
+            self._get_entries().pop(network_name.upper(), None)
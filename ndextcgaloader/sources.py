@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+"""Sources of PathwayMapper text files for the loader."""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from ndextcgaloader.manifest import DownloadManifest
+
+logger = logging.getLogger(__name__)
+
+FILE_URL_SCHEME = 'file'
+"""
+Scheme of --dataurl values that point to a local mirror
+"""
+
+DEFAULT_DOWNLOAD_WORKERS = 4
+"""
+Default number of network files downloaded concurrently
+"""
+
+
+def _normalize_content(data):
+    """
+    Drops UTF-8 byte order mark, if any, from **data** so all
+    sources write network files the same way
+    :param data: raw file content
+    :type data: bytes
+    :return: content without byte order mark
+    :rtype: bytes
+    """
+    return data.decode('utf-8-sig').encode('utf-8')
+
+
+class InputSource(object):
+    """
+    Base class for sources of network files. Subclasses make
+    every file in a list of networks available in an output directory
+    and record how long fetching each file took
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._fetch_stats = {}
+        self._fetch_stats_lock = threading.Lock()
+
+    def _record_fetch(self, network, seconds, num_bytes):
+        """
+        Records that fetching **network** took **seconds**
+        and transferred **num_bytes**
+        """
+        with self._fetch_stats_lock:
+            self._fetch_stats[network] = (seconds, num_bytes)
+
+    def get_fetch_stats(self, network):
+        """
+        Gets how long fetching **network** took
+        :param network: name of network file
+        :return: tuple (seconds, bytes transferred) or None if
+                 **network** was not transferred from anywhere
+        :rtype: tuple
+        """
+        with self._fetch_stats_lock:
+            return self._fetch_stats.get(network)
+
+    def iter_fetch(self, list_of_networks, output_directory):
+        """
+        Makes files in **list_of_networks** available in
+        **output_directory**, reporting each file as soon as it and
+        the files before it are done, so callers can start using
+        them while later files are still being fetched
+
+        :param list_of_networks: names of network files
+        :type list_of_networks: list
+        :param output_directory: directory the loader reads network files from
+        :type output_directory: string
+        :return: tuples (name of network file, True if it was fetched)
+                 in the order of **list_of_networks**
+        :rtype: iterator
+        """
+        raise NotImplementedError('subclasses must implement iter_fetch()')
+
+    def fetch(self, list_of_networks, output_directory):
+        """
+        Makes files in **list_of_networks** available in
+        **output_directory**
+
+        :param list_of_networks: names of network files
+        :type list_of_networks: list
+        :param output_directory: directory the loader reads network files from
+        :type output_directory: string
+        :return: names of network files that could not be fetched, in
+                 the order they appear in **list_of_networks**
+        :rtype: list
+        """
+        return [network for network, fetched
+                in self.iter_fetch(list_of_networks, output_directory)
+                if not fetched]
+
+
+class HttpInputSource(InputSource):
+    """
+    Downloads network files from a base URL. Up to **workers** files
+    are fetched at a time over one shared keep-alive session and
+    conditional requests, driven by a
+    :py:class:`~ndextcgaloader.manifest.DownloadManifest` in the
+    output directory, avoid transferring files that did not change
+    """
+
+    def __init__(self, url, workers=DEFAULT_DOWNLOAD_WORKERS):
+        """
+        Constructor
+
+        :param url: base URL of network files
+        :type url: string
+        :param workers: maximum number of concurrent downloads
+        :type workers: int
+        """
+        super(HttpInputSource, self).__init__()
+        self._url = url
+        if workers is None or workers < 1:
+            workers = DEFAULT_DOWNLOAD_WORKERS
+        self._workers = workers
+
+    def _create_session(self):
+        """
+        Creates a keep-alive :py:class:`requests.Session` whose connection
+        pool is large enough to be shared by all download workers
+        :return: session
+        :rtype: :py:class:`requests.Session`
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self._workers,
+                              pool_maxsize=self._workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _download_file(self, session, network, output_directory, manifest):
+        """
+        Downloads a single network file and saves it in **output_directory**.
+        A 304 (Not Modified) response leaves the file on disk untouched
+        :param session: session used to issue the request
+        :param network: name of network file to download
+        :param output_directory: directory to write network file to
+        :param manifest: manifest of files already in **output_directory**
+        :type manifest: :py:class:`~ndextcgaloader.manifest.DownloadManifest`
+        :return: True if file was downloaded or is unchanged, False otherwise
+        :rtype: bool
+        """
+        headers = manifest.get_conditional_headers(network)
+        start = time.perf_counter()
+        try:
+            response = session.get(os.path.join(self._url, network),
+                                   headers=headers)
+            self._record_fetch(network, time.perf_counter() - start, len(response.content))
+
+            if response.status_code == 304 and headers:
+                logger.debug(network + ' is unchanged, skipping write')
+                return True
+
+            if response.status_code // 100 != 2:
+                return False
+
+            data = _normalize_content(response.content)
+            with open(os.path.join(output_directory, network), "wb") as received_file:
+                received_file.write(data)
+
+            manifest.update_entry(network, response.headers, data)
+            return True
+
+        except requests.exceptions.RequestException as e:
+            logger.debug('Unable to download ' + network + ' : ' + str(e))
+            return False
+
+    def iter_fetch(self, list_of_networks, output_directory):
+        """
+        Downloads files in **list_of_networks** into **output_directory**
+
+        :param list_of_networks: names of network files
+        :type list_of_networks: list
+        :param output_directory: directory to write network files to
+        :type output_directory: string
+        :return: tuples (name of network file, True if it was downloaded
+                 or is unchanged) in the order of **list_of_networks**
+        :rtype: iterator
+        """
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+
+        manifest = DownloadManifest(output_directory)
+        manifest.load()
+
+        session = self._create_session()
+        try:
+            with ThreadPoolExecutor(max_workers=self._workers) as executor:
+                results = executor.map(lambda network: self._download_file(session, network,
+                                                                           output_directory, manifest),
+                                       list_of_networks)
+
+                # results come in the order of list_of_networks,
+                # so they do not depend on download completion order
+                for network, downloaded in zip(list_of_networks, results):
+                    yield network, downloaded
+        finally:
+            session.close()
+            manifest.save()
+
+
+class LocalDirectoryInputSource(InputSource):
+    """
+    Uses network files already present in the output directory
+    as-is, without any network access
+    """
+
+    def iter_fetch(self, list_of_networks, output_directory):
+        """
+        Checks that every file in **list_of_networks** exists in
+        **output_directory**
+
+        :param list_of_networks: names of network files
+        :type list_of_networks: list
+        :param output_directory: directory containing network files
+        :type output_directory: string
+        :return: tuples (name of network file, True if it exists)
+        :rtype: iterator
+        """
+        for network in list_of_networks:
+            yield network, os.path.isfile(os.path.join(output_directory, network))
+
+
+class FileMirrorInputSource(InputSource):
+    """
+    Copies network files from a local mirror set via a ``file://``
+    URL. Files whose content in the output directory already matches
+    the mirror are not rewritten
+    """
+
+    def __init__(self, url):
+        """
+        Constructor
+
+        :param url: ``file://`` URL of mirror directory
+        :type url: string
+        """
+        super(FileMirrorInputSource, self).__init__()
+        self._mirror_dir = url2pathname(urlparse(url).path)
+
+    def get_mirror_directory(self):
+        """
+        Gets directory of the mirror
+        :return: path to mirror directory
+        :rtype: string
+        """
+        return self._mirror_dir
+
+    def _copy_file(self, network, output_directory):
+        """
+        Copies **network** from mirror into **output_directory** unless
+        the copy there is already identical
+        :return: True if file is available in **output_directory**
+        :rtype: bool
+        """
+        src = os.path.join(self._mirror_dir, network)
+        if not os.path.isfile(src):
+            return False
+
+        dest = os.path.join(output_directory, network)
+        if os.path.isfile(dest) and os.path.samefile(src, dest):
+            return True
+
+        with open(src, 'rb') as f:
+            data = _normalize_content(f.read())
+
+        if os.path.isfile(dest) and os.path.getsize(dest) == len(data):
+            with open(dest, 'rb') as f:
+                if f.read() == data:
+                    logger.debug(network + ' is unchanged, skipping write')
+                    return True
+
+        with open(dest, 'wb') as f:
+            f.write(data)
+        return True
+
+    def iter_fetch(self, list_of_networks, output_directory):
+        """
+        Copies files in **list_of_networks** from mirror into **output_directory**
+
+        :param list_of_networks: names of network files
+        :type list_of_networks: list
+        :param output_directory: directory to write network files to
+        :type output_directory: string
+        :return: tuples (name of network file, False if it is missing
+                 from the mirror or could not be copied)
+        :rtype: iterator
+        """
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+
+        for network in list_of_networks:
+            start = time.perf_counter()
+            try:
+                copied = self._copy_file(network, output_directory)
+            except (IOError, OSError, UnicodeDecodeError) as e:
+                logger.debug('Unable to copy ' + network + ' : ' + str(e))
+                copied = False
+            if copied:
+                path = os.path.join(output_directory, network)
+                self._record_fetch(network, time.perf_counter() - start, os.path.getsize(path))
+            yield network, copied
+
+
+def get_input_source(dataurl, offline=False, workers=DEFAULT_DOWNLOAD_WORKERS):
+    """
+    Gets input source matching the command line arguments
+
+    :param dataurl: value of --dataurl
+    :type dataurl: string
+    :param offline: if True, use files in --datadir as-is (--offline)
+    :type offline: bool
+    :param workers: maximum number of concurrent downloads (--downloadworkers)
+    :type workers: int
+    :return: input source
+    :rtype: :py:class:`InputSource`
+    """
+    if offline:
+        return LocalDirectoryInputSource()
+    if urlparse(dataurl).scheme == FILE_URL_SCHEME:
+        return FileMirrorInputSource(dataurl)
+    return HttpInputSource(dataurl, workers=workers)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""Visual style templates applied to generated networks."""
+
+import os
+import json
+import fnmatch
+import logging
+
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader.manifest import get_sha256
+from ndextcgaloader.cxwriter import COMPACT_SEPARATORS
+
+logger = logging.getLogger(__name__)
+
+STYLE_CACHE_SUFFIX = '.style.json'
+"""
+Suffix of files in the style cache directory, which are
+named after the sha256 of the CX file they were made from
+"""
+
+PROPERTIES_OF_NODES_AND_EDGES = (NiceCXNetwork.PROPS_OF_NODES,
+                                 NiceCXNetwork.PROPS_OF_EDGES)
+"""
+Visual properties specific to individual nodes and edges,
+which are not copied from a template
+"""
+
+
+def get_visual_properties(cx):
+    """
+    Gets visual properties from **cx** the way
+    :py:meth:`~ndex2.nice_cx_network.NiceCXNetwork.apply_style_from_network`
+    does, preferring ``cyVisualProperties`` over ``visualProperties``
+    and leaving out node and edge specific properties
+
+    :param cx: CX network as list of aspect fragments
+    :type cx: list
+    :raises ValueError: if **cx** has no visual properties
+    :return: visual properties aspect elements
+    :rtype: list
+    """
+    aspects = {}
+    for fragment in cx:
+        for aspect_name, elements in fragment.items():
+            if aspect_name in (NiceCXNetwork.CY_VISUAL_PROPERTIES,
+                               NiceCXNetwork.VISUAL_PROPERTIES):
+                aspects.setdefault(aspect_name, []).extend(elements)
+
+    elements = aspects.get(NiceCXNetwork.CY_VISUAL_PROPERTIES)
+    if elements is None:
+        elements = aspects.get(NiceCXNetwork.VISUAL_PROPERTIES)
+    if elements is None:
+        raise ValueError('No visual style found in network')
+    return [e for e in elements
+            if e.get(NiceCXNetwork.PROPERTIES_OF) not in PROPERTIES_OF_NODES_AND_EDGES]
+
+
+class StyleTemplate(object):
+    """
+    Visual properties of a style CX file, parsed once and kept
+    both as an immutable tuple, which every styled network shares,
+    and as a pre-serialized JSON blob that writers can copy into
+    output as is
+    """
+
+    def __init__(self, elements, blob=None):
+        """
+        Constructor
+
+        :param elements: visual properties aspect elements
+        :type elements: list
+        :param blob: **elements** serialized as JSON; if ``None``
+                     it is made with compact separators
+        :type blob: string
+        """
+        self._elements = tuple(elements)
+        if blob is None:
+            blob = json.dumps(elements, separators=COMPACT_SEPARATORS)
+        self._blob = blob
+
+    @staticmethod
+    def from_file(path, cachedir=None):
+        """
+        Creates template from CX file **path**. If **cachedir** is set,
+        the visual properties are read from, or written to, a file in it
+        named after the sha256 of **path** so later runs skip parsing
+        the whole CX file
+
+        :param path: path to CX file with style
+        :param cachedir: directory of cached templates or ``None``
+        :raises ValueError: if CX file has no visual properties
+        :return: template
+        :rtype: :py:class:`StyleTemplate`
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        cache_path = None
+        if cachedir is not None:
+            cache_path = os.path.join(cachedir, get_sha256(data) + STYLE_CACHE_SUFFIX)
+            if os.path.isfile(cache_path):
+                try:
+                    with open(cache_path, 'r') as f:
+                        blob = f.read()
+                    return StyleTemplate(json.loads(blob), blob=blob)
+                except (IOError, ValueError) as e:
+                    logger.warning('Ignoring unreadable cached style ' +
+                                   cache_path + ' : ' + str(e))
+
+        template = StyleTemplate(get_visual_properties(json.loads(data.decode('utf-8'))))
+
+        if cache_path is not None:
+            if not os.path.isdir(cachedir):
+                os.makedirs(cachedir)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(template.get_blob())
+            os.replace(tmp_path, cache_path)
+        return template
+
+    def get_elements(self):
+        """
+        Gets visual properties aspect elements
+        :return: elements, shared by all networks styled with this template
+        :rtype: tuple
+        """
+        return self._elements
+
+    def get_blob(self):
+        """
+        Gets visual properties aspect elements serialized as a JSON list
+        :return: JSON
+        :rtype: string
+        """
+        return self._blob
+
+    def apply(self, network):
+        """
+        Sets visual properties of **network** to those of this template,
+        replacing any it had. The elements are shared, not copied
+
+        :param network: network to style
+        :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+        :return: None
+        """
+        for aspect_name in (NiceCXNetwork.VISUAL_PROPERTIES,
+                            NiceCXNetwork.CY_VISUAL_PROPERTIES):
+            network.opaqueAspects.pop(aspect_name, None)
+            network.metadata.pop(aspect_name, None)
+
+        network.opaqueAspects[NiceCXNetwork.CY_VISUAL_PROPERTIES] = self._elements
+        network.metadata[NiceCXNetwork.CY_VISUAL_PROPERTIES] = {
+            'name': NiceCXNetwork.CY_VISUAL_PROPERTIES,
+            'elementCount': len(self._elements),
+            'version': '1.0',
+            'consistencyGroup': 1,
+            'properties': []
+        }
+
+
+class StyleMap(object):
+    """
+    Picks the style template of each network. A style map file lists
+    one ``<network name pattern><TAB><style CX file>`` per line; the
+    first pattern, in :py:mod:`fnmatch` syntax, matching the network
+    name selects its style. Other networks get the default style.
+    Blank lines and lines starting with ``#`` are ignored. Relative
+    style paths are resolved against the directory of the style map
+    file and then against **packagedir**. Each style file is parsed once
+    """
+
+    def __init__(self, default_style, stylemap=None, packagedir=None, cachedir=None):
+        """
+        Constructor
+
+        :param default_style: path to CX file with default style
+        :param stylemap: path to style map file or ``None``
+        :param packagedir: directory holding styles shipped with package
+        :param cachedir: directory of cached templates or ``None``
+        """
+        self._default_style = os.path.abspath(default_style)
+        self._packagedir = packagedir
+        self._cachedir = cachedir
+        self._templates = {}
+        self._patterns = []
+        if stylemap is not None:
+            self._patterns = self._parse_stylemap(stylemap)
+
+    def _resolve_style_path(self, style_path, stylemap_dir):
+        """
+        Resolves **style_path** from a style map file
+        :return: absolute path
+        :rtype: string
+        """
+        if os.path.isabs(style_path):
+            return style_path
+        candidates = [os.path.join(stylemap_dir, style_path)]
+        if self._packagedir is not None:
+            candidates.append(os.path.join(self._packagedir, style_path))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+        return os.path.abspath(candidates[0])
+
+    def _parse_stylemap(self, stylemap):
+        """
+        Parses style map file
+        :raises ValueError: if a line does not have two tab separated fields
+        :return: list of tuples (pattern, path to style file)
+        :rtype: list
+        """
+        stylemap_dir = os.path.dirname(os.path.abspath(stylemap))
+        patterns = []
+        with open(stylemap, 'r') as f:
+            for line_num, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = [field.strip() for field in line.split('\t')]
+                if len(fields) != 2 or not fields[0] or not fields[1]:
+                    raise ValueError('Expected <pattern><TAB><style> on line ' +
+                                     str(line_num) + ' of ' + stylemap)
+                patterns.append((fields[0], self._resolve_style_path(fields[1], stylemap_dir)))
+        return patterns
+
+    def get_style_path(self, network_name):
+        """
+        Gets path to style file for network **network_name**
+        :param network_name: name of network
+        :return: path to CX file with style
+        :rtype: string
+        """
+        for pattern, style_path in self._patterns:
+            if fnmatch.fnmatchcase(network_name, pattern):
+                return style_path
+        return self._default_style
+
+    def get_template(self, network_name):
+        """
+        Gets style template for network **network_name**,
+        parsing its style file on first use
+        :param network_name: name of network
+        :return: template
+        :rtype: :py:class:`StyleTemplate`
+        """
+        style_path = self.get_style_path(network_name)
+        template = self._templates.get(style_path)
+        if template is None:
+            template = StyleTemplate.from_file(style_path, cachedir=self._cachedir)
+            self._templates[style_path] = template
+        return template
+
+    def load_all(self):
+        """
+        Parses the default style and every style in the style map
+        that was not parsed yet, so copies of this map, such as those
+        sent to worker processes, need not parse them again
+        :return: None
+        """
+        style_paths = [self._default_style] + [style_path for pattern, style_path
+                                               in self._patterns]
+        for style_path in style_paths:
+            if style_path not in self._templates:
+                self._templates[style_path] = StyleTemplate.from_file(style_path,
+                                                                      cachedir=self._cachedir)
@@ -0,0 +1,205 @@
+#! /usr/bin/env python
+
+"""Generator of synthetic pathways in PathwayMapper text format."""
+
+import argparse
+import sys
+import random
+
+import ndextcgaloader
+
+EDGE_TYPES = ['ACTIVATES', 'INHIBITS', 'INDUCES', 'REPRESSES', 'BINDS']
+
+COMPOUND_NODE_TYPES = ['FAMILY', 'COMPLEX']
+
+NODE_HEADER = '--NODE_NAME\tNODE_ID\tNODE_TYPE\tPARENT_ID\tPOSX\tPOSY--\n'
+EDGE_HEADER = '--EDGE_ID\tSOURCE\tTARGET\tEDGE_TYPE\n'
+
+DEFAULT_COMPOUND_FRACTION = 0.1
+"""
+Default fraction of top level nodes that are families or complexes
+"""
+
+DEFAULT_MAX_MEMBERS = 5
+"""
+Default maximum number of member genes of a family or complex
+"""
+
+INVALID_SYMBOL_SUFFIX = '/p'
+"""
+Appended to gene names to make them invalid HGNC symbols, like ``p53/p21``
+"""
+
+
+def _get_gene_name(node_id, rand, invalid_symbol_ratio):
+    """
+    Gets name of gene **node_id**, which is an invalid
+    HGNC symbol with probability **invalid_symbol_ratio**
+    :rtype: string
+    """
+    name = 'G' + node_id
+    if rand.random() < invalid_symbol_ratio:
+        name += INVALID_SYMBOL_SUFFIX
+    return name
+
+
+def _get_node_lines(node_id, rand, compound_fraction, max_members,
+                    nesting_depth, invalid_symbol_ratio):
+    """
+    Gets node lines of top level node **node_id**: a gene or, with
+    probability **compound_fraction**, an unnamed family or complex
+    with up to **max_members** member genes. Below the top level,
+    each family or complex holds another one, **nesting_depth**
+    levels deep
+
+    :return: list of (name, id, type, parent id) tuples
+    :rtype: list
+    """
+    if rand.random() >= compound_fraction:
+        return [(_get_gene_name(node_id, rand, invalid_symbol_ratio), node_id, 'GENE', '-1')]
+
+    lines = []
+    compound_id = node_id
+    parent_id = '-1'
+    for depth in range(max(nesting_depth, 1)):
+        if depth > 0:
+            parent_id = compound_id
+            compound_id = compound_id + '_c'
+        lines.append(('', compound_id, rand.choice(COMPOUND_NODE_TYPES), parent_id))
+        for j in range(rand.randint(1, max_members)):
+            member_id = compound_id + '_' + str(j)
+            lines.append((_get_gene_name(member_id, rand, invalid_symbol_ratio),
+                          member_id, 'GENE', compound_id))
+    return lines
+
+
+def write_synthetic_pathway(path, num_edges, seed=0, num_nodes=None,
+                            compound_fraction=DEFAULT_COMPOUND_FRACTION,
+                            max_members=DEFAULT_MAX_MEMBERS, nesting_depth=1,
+                            duplicate_edge_ratio=0.0, invalid_symbol_ratio=0.0,
+                            num_process_nodes=0):
+    """
+    Writes a PathwayMapper text file with **num_edges** edges between
+    **num_nodes** top level genes, families and complexes. Member genes
+    of families and complexes, and nested families and complexes, come
+    on top of **num_nodes**. The same arguments always write the same file
+
+    :param path: path to file to write
+    :param num_edges: number of edges, duplicates included
+    :param seed: seed of random number generator
+    :param num_nodes: number of top level nodes, by default one
+                      for every two edges and at least two
+    :param compound_fraction: fraction of top level nodes that
+                              are families or complexes
+    :param max_members: maximum number of member genes of
+                        each family or complex
+    :param nesting_depth: number of levels of families and complexes
+                          nested in each other, 1 for no nesting
+    :param duplicate_edge_ratio: fraction of edges with the same source,
+                                 target and type as an earlier edge
+    :param invalid_symbol_ratio: fraction of genes whose names are
+                                 not valid HGNC symbols
+    :param num_process_nodes: number of process nodes without edges
+    :return: None
+    """
+    rand = random.Random(seed)
+    if num_nodes is None:
+        num_nodes = num_edges // 2
+    num_nodes = max(num_nodes, 2)
+
+    with open(path, 'w') as f:
+        f.write('Synthetic-' + str(num_edges) + '\n')
+        f.write('Synthetic network with ' + str(num_edges) + ' edges\n')
+        f.write(NODE_HEADER)
+        top_level_ids = []
+        for i in range(num_nodes):
+            node_id = 'n' + str(i)
+            top_level_ids.append(node_id)
+            node_lines = _get_node_lines(node_id, rand, compound_fraction, max_members,
+                                         nesting_depth, invalid_symbol_ratio)
+            for name, line_id, node_type, parent_id in node_lines:
+                f.write('\t'.join([name, line_id, node_type, parent_id,
+                                   str(rand.randint(0, 2000)), str(rand.randint(0, 2000))]) + '\t\n')
+        for i in range(num_process_nodes):
+            f.write('\t'.join(['Process ' + str(i), 'p' + str(i), 'PROCESS', '-1',
+                               str(rand.randint(0, 2000)), str(rand.randint(0, 2000))]) + '\t\n')
+        f.write('\n')
+
+        f.write(EDGE_HEADER)
+        edges = []
+        for i in range(num_edges):
+            if edges and rand.random() < duplicate_edge_ratio:
+                edge = rand.choice(edges)
+            else:
+                source, target = rand.sample(top_level_ids, 2)
+                edge = (source, target, rand.choice(EDGE_TYPES))
+                edges.append(edge)
+            f.write('\t'.join(('e' + str(i),) + edge) + '\n')
+
+
+def _parse_arguments(desc, args):
+    """
+    Parses command line arguments
+    :param desc: description of program
+    :param args: arguments to parse
+    :return: parsed arguments
+    """
+    help_fm = argparse.RawDescriptionHelpFormatter
+    parser = argparse.ArgumentParser(description=desc,
+                                     formatter_class=help_fm)
+    parser.add_argument('outputfile', help='PathwayMapper text file to write')
+    parser.add_argument('--edges', type=int, default=1000,
+                        help='Number of edges, duplicates included (default 1000)')
+    parser.add_argument('--nodes', type=int,
+                        help='Number of top level nodes (default half of --edges)')
+    parser.add_argument('--compoundfraction', type=float, default=DEFAULT_COMPOUND_FRACTION,
+                        help='Fraction of top level nodes that are families or '
+                             'complexes (default ' + str(DEFAULT_COMPOUND_FRACTION) + ')')
+    parser.add_argument('--maxmembers', type=int, default=DEFAULT_MAX_MEMBERS,
+                        help='Maximum number of member genes of each family or '
+                             'complex (default ' + str(DEFAULT_MAX_MEMBERS) + ')')
+    parser.add_argument('--nestingdepth', type=int, default=1,
+                        help='Levels of families and complexes nested in each other, '
+                             '1 for no nesting (default 1)')
+    parser.add_argument('--duplicateedgeratio', type=float, default=0.0,
+                        help='Fraction of edges duplicating an earlier edge (default 0)')
+    parser.add_argument('--invalidsymbolratio', type=float, default=0.0,
+                        help='Fraction of genes named with invalid HGNC symbols (default 0)')
+    parser.add_argument('--processnodes', type=int, default=0,
+                        help='Number of process nodes without edges (default 0)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of random number generator (default 0)')
+    parser.add_argument('--version', action='version',
+                        version=('%(prog)s ' +
+                                 ndextcgaloader.__version__))
+    return parser.parse_args(args)
+
+
+def main(args):
+    """
+    Main entry point for program
+    :param args: command line arguments, program name first
+    :return: exit code
+    """
+    desc = """
+    Version {version}
+
+    Writes a synthetic pathway in the PathwayMapper text format
+    ndexloadtcga.py converts, for profiling and scaling tests.
+    The same arguments always write the same file.
+
+    """.format(version=ndextcgaloader.__version__)
+    theargs = _parse_arguments(desc, args[1:])
+    write_synthetic_pathway(theargs.outputfile, theargs.edges, seed=theargs.seed,
+                            num_nodes=theargs.nodes,
+                            compound_fraction=theargs.compoundfraction,
+                            max_members=theargs.maxmembers,
+                            nesting_depth=theargs.nestingdepth,
+                            duplicate_edge_ratio=theargs.duplicateedgeratio,
+                            invalid_symbol_ratio=theargs.invalidsymbolratio,
+                            num_process_nodes=theargs.processnodes)
+    return 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main(sys.argv))
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""Concurrent upload of CX files to NDEx."""
+
+import io
+import gzip
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ndextcgaloader.cxwriter import GZIP_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_WORKERS = 4
+"""
+Default number of networks uploaded concurrently
+"""
+
+
+class NetworkUploader(object):
+    """
+    Uploads CX files written by :py:mod:`ndextcgaloader.cxwriter` to
+    NDEx through one shared :py:class:`~ndex2.client.Ndex2` client, so
+    credentials and server version are set up once per run rather than
+    once per network. Up to **workers** uploads run at a time, each
+    streaming its CX file from disk
+    """
+
+    def __init__(self, client, workers=DEFAULT_UPLOAD_WORKERS, max_pending=None):
+        """
+        Constructor
+
+        :param client: authenticated NDEx client
+        :type client: :py:class:`~ndex2.client.Ndex2`
+        :param workers: maximum number of concurrent uploads
+        :type workers: int
+        :param max_pending: if set, :py:meth:`submit` blocks while this
+                            many uploads are queued or running
+        :type max_pending: int
+        """
+        self._client = client
+        if workers is None or workers < 1:
+            workers = DEFAULT_UPLOAD_WORKERS
+        self._workers = workers
+        self._executor = None
+        self._uploads = []
+        self._pending_slots = None
+        if max_pending is not None:
+            self._pending_slots = threading.BoundedSemaphore(max(max_pending, workers))
+        self._pending_count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _open_cx(path):
+        """
+        Opens CX file **path** for reading as bytes. Gzip compressed
+        files are decompressed first, since NDEx expects plain CX
+        :return: binary stream
+        """
+        if path.endswith(GZIP_SUFFIX):
+            with gzip.open(path, 'rb') as f:
+                return io.BytesIO(f.read())
+        return open(path, 'rb')
+
+    def _upload(self, network_name, path, network_id, latency):
+        """
+        Uploads CX file **path** as a new network, or replacing
+        network **network_id** if set, appending the seconds it
+        took to **latency**
+        :return: response of NDEx
+        """
+        logger.debug('Uploading ' + network_name + ' from ' + path)
+        start = time.perf_counter()
+        try:
+            with NetworkUploader._open_cx(path) as cx_stream:
+                if network_id is None:
+                    return self._client.save_cx_stream_as_new_network(cx_stream)
+                return self._client.update_cx_network(cx_stream, network_id)
+        finally:
+            latency.append(time.perf_counter() - start)
+
+    def submit(self, network_name, path, network_id=None):
+        """
+        Queues upload of CX file **path** of network **network_name**
+
+        :param network_name: name of network
+        :param path: path to CX file, optionally gzip compressed
+        :param network_id: UUID of network on NDEx to replace
+                           or ``None`` to upload a new network
+        :return: future holding the response of NDEx
+        :rtype: :py:class:`concurrent.futures.Future`
+        """
+        if self._pending_slots is not None:
+            self._pending_slots.acquire()
+        with self._lock:
+            self._pending_count += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers)
+        latency = []
+        future = self._executor.submit(self._upload, network_name, path, network_id, latency)
+        future.add_done_callback(self._release_slot)
+        self._uploads.append((network_name, future, latency))
+        return future
+
+    def _release_slot(self, future):
+        """
+        Frees the slot of a finished upload
+        """
+        with self._lock:
+            self._pending_count -= 1
+        if self._pending_slots is not None:
+            self._pending_slots.release()
+
+    def get_pending_count(self):
+        """
+        Gets number of uploads queued or running
+        :return: number of unfinished uploads
+        :rtype: int
+        """
+        with self._lock:
+            return self._pending_count
+
+    def wait(self):
+        """
+        Waits for all queued uploads to finish
+
+        :return: tuples (network name, response of NDEx or ``None``,
+                 exception raised or ``None``, seconds from opening
+                 the CX file to the response of NDEx or ``None``)
+                 in the order uploads were queued
+        :rtype: list
+        """
+        results = []
+        try:
+            for network_name, future, latency in self._uploads:
+                try:
+                    response = future.result()
+                    error = None
+                except Exception as e:
+                    logger.error('Unable to upload ' + network_name + ' : ' + str(e))
+                    response = None
+                    error = e
+                results.append((network_name, response, error, latency[0] if latency else None))
+        finally:
+            self._uploads = []
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        return results
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""Content hashes of uploaded networks used to skip unchanged uploads."""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+from ndextcgaloader.cxwriter import COMPACT_SEPARATORS
+from ndextcgaloader.cxbuilder import CARTESIANLAYOUT_ASPECT_NAME
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STATE_FILE = '.upload_state.json'
+"""
+Name of upload state file written to the data directory
+"""
+
+NETWORK_ID = 'uuid'
+SHA256 = 'sha256'
+
+
+def _dumps(value):
+    """
+    Serializes **value** with sorted keys and no whitespace
+    :rtype: string
+    """
+    return json.dumps(value, sort_keys=True, separators=COMPACT_SEPARATORS)
+
+
+def _get_attributes_key(attributes):
+    """
+    Gets canonical form of node or edge **attributes**, leaving
+    out the id of the element they belong to
+    :rtype: list
+    """
+    if not attributes:
+        return []
+    return sorted(_dumps([a.get('n'), a.get('v'), a.get('d')]) for a in attributes)
+
+
+def get_network_hash(network):
+    """
+    Gets sha256 of the content of **network** independent of the order
+    of its elements and of the ids the elements were given. Nodes
+    are identified by their name, represents and attributes, edges
+    by their nodes, interaction and attributes; network attributes
+    and opaque aspects, such as visual properties and layout, are
+    included while metadata, which is derived from the rest, is not
+
+    :param network: network
+    :type network: :py:class:`~ndex2.nice_cx_network.NiceCXNetwork`
+    :return: hex digest
+    :rtype: string
+    """
+    node_keys = {}
+    for node_id, node in network.nodes.items():
+        node_keys[node_id] = _dumps([node.get('n'), node.get('r'),
+                                     _get_attributes_key(network.nodeAttributes.get(node_id))])
+
+    aspects = {'nodes': node_keys.values(),
+               'edges': [_dumps([node_keys.get(edge.get('s')), node_keys.get(edge.get('t')),
+                                 edge.get('i'),
+                                 _get_attributes_key(network.edgeAttributes.get(edge_id))])
+                         for edge_id, edge in network.edges.items()],
+               'networkAttributes': [_dumps(a) for a in network.networkAttributes]}
+
+    for aspect_name, elements in network.opaqueAspects.items():
+        if aspect_name == CARTESIANLAYOUT_ASPECT_NAME:
+            aspects[aspect_name] = [_dumps([node_keys.get(e.get('node')), e.get('x'), e.get('y')])
+                                    for e in elements]
+        else:
+            aspects[aspect_name] = [_dumps(e) for e in elements]
+
+    sha256 = hashlib.sha256()
+    for aspect_name in sorted(aspects.keys()):
+        sha256.update(_dumps(aspect_name).encode('utf-8'))
+        for element in sorted(aspects[aspect_name]):
+            sha256.update(b'\n')
+            sha256.update(element.encode('utf-8'))
+        sha256.update(b'\n\n')
+    return sha256.hexdigest()
+
+
+def get_network_id_from_url(url):
+    """
+    Gets UUID of network from URL NDEx returns for a new network
+    :param url: URL ending in ``/network/<UUID>``
+    :return: UUID or None
+    :rtype: string
+    """
+    if not url:
+        return None
+    return url.rstrip('/').rsplit('/', 1)[-1]
+
+
+class UploadState(object):
+    """
+    Keeps the NDEx UUID and content hash of every network uploaded
+    from a directory, so later runs can skip uploading networks
+    that still have the same content on the same NDEx network
+    """
+
+    def __init__(self, directory):
+        """
+        Constructor
+
+        :param directory: data directory the uploaded CX files are in
+        :type directory: string
+        """
+        self._path = os.path.join(directory, UPLOAD_STATE_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_path(self):
+        """
+        Gets path to upload state file
+        :return: path to upload state file
+        :rtype: string
+        """
+        return self._path
+
+    def load(self):
+        """
+        Loads upload state from disk. A missing or unreadable
+        file results in an empty state
+        :return: None
+        """
+        self._entries = {}
+        if not os.path.isfile(self._path):
+            return
+        try:
+            with open(self._path, 'r') as f:
+                self._entries = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning('Ignoring unreadable upload state ' +
+                           self._path + ' : ' + str(e))
+
+    def save(self):
+        """
+        Writes upload state to disk, replacing the previous
+        copy atomically
+        :return: None
+        """
+        tmp_path = self._path + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    def get_entry(self, network_name):
+        """
+        Gets upload state entry for **network_name**
+        :param network_name: name of network
+        :return: dict with uuid and sha256 keys or None
+        :rtype: dict
+        """
+        with self._lock:
+            return self._entries.get(network_name)
+
+    def is_unchanged(self, network_name, network_id, network_hash):
+        """
+        Checks whether network **network_name** was last uploaded to
+        NDEx network **network_id** with content hash **network_hash**
+        :param network_name: name of network
+        :param network_id: UUID of network on NDEx or None
+        :param network_hash: hash from :py:func:`get_network_hash`
+        :return: True if upload can be skipped
+        :rtype: bool
+        """
+        if network_id is None:
+            return False
+        entry = self.get_entry(network_name)
+        if entry is None:
+            return False
+        return entry.get(NETWORK_ID) == network_id and entry.get(SHA256) == network_hash
+
+    def update_entry(self, network_name, network_id, network_hash):
+        """
+        Records that network **network_name** with content hash
+        **network_hash** was uploaded to NDEx network **network_id**
+        :param network_name: name of network
+        :param network_id: UUID of network on NDEx
+        :param network_hash: hash from :py:func:`get_network_hash`
+        :return: None
+        """
+        with self._lock:
+            self._entries[network_name] = {NETWORK_ID: network_id,
+                                           SHA256: network_hash}
+
+    def remove_entry(self, network_name):
+        """
+        Removes upload state entry for **network_name** if it exists
+        :param network_name: name of network
+        :return: None
+        """
+        with self._lock:
+            self._entries.pop(network_name, None)
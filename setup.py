@@ -47,7 +47,8 @@ setup(
     name='ndextcgaloader',
     packages=find_packages(include=['ndextcgaloader']),
     package_dir={'ndextcgaloader': 'ndextcgaloader'},
-    package_data={'ndextcgaloader': [ 'loadplan.json', 'networks.txt', 'style.cx']},
+    package_data={'ndextcgaloader': [ 'loadplan.json', 'networks.txt', 'style.cx',
+                                        'style_dark.cx']},
     scripts=[ 'ndextcgaloader/ndexloadtcga.py'],
     setup_requires=setup_requirements,
     test_suite='tests',
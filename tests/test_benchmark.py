@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.benchmark` module."""
+
+import io
+import os
+import json
+import shutil
+import tempfile
+import argparse
+import contextlib
+
+import unittest
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import benchmark
+from ndextcgaloader import synthetic
+from ndextcgaloader import metrics
+
+
+class TestBenchmark(unittest.TestCase):
+    """Tests for `ndextcgaloader.benchmark` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cwd = os.getcwd()
+        os.chdir(self._temp_dir)
+        self._args = argparse.Namespace(tcgaversion='1.0', networklistfile=None,
+                                        loadplan=ndexloadtcga.get_load_plan(), engine=None,
+                                        repeat=1)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._temp_dir)
+
+    def test_engines_agree_on_synthetic_pathway(self):
+        synthetic.write_synthetic_pathway(os.path.join(self._temp_dir, 'Synthetic-500.txt'), 500)
+        cx = []
+        for engine in ndexloadtcga.ENGINES:
+            loader = benchmark.get_loader(self._args, engine, self._temp_dir)
+            loader.prepare_report_directory()
+            with contextlib.redirect_stdout(io.StringIO()):
+                network = loader._generate_network('Synthetic-500.txt')
+                cx.append(json.dumps(network.to_cx()))
+        self.assertEqual(cx[0], cx[1])
+
+    def test_run_scaling_benchmark(self):
+        out = io.StringIO()
+        results = benchmark.run_scaling_benchmark(self._args, [10, 20], out=out)
+        self.assertEqual(set([(e, s) for e in ndexloadtcga.ENGINES for s in [10, 20]]),
+                         set(results.keys()))
+        self.assertEqual(4, len(out.getvalue().splitlines()))
+
+    def test_run_stage_benchmark(self):
+        stagesdir = os.path.join(self._temp_dir, 'stages')
+        os.makedirs(stagesdir)
+        for network_file in ('HIPPO.txt', 'BRCA-2012-Cell-cycle-signaling-pathway.txt'):
+            shutil.copy(os.path.join(benchmark.get_sample_networks_dir(), network_file), stagesdir)
+        self._args.stages = stagesdir
+        self._args.repeat = 2
+
+        out = io.StringIO()
+        results = benchmark.run_stage_benchmark(self._args, out=out)
+        self.assertEqual(['BRCA-2012-Cell-cycle-signaling-pathway.txt', 'HIPPO.txt'],
+                         sorted(results['networks'].keys()))
+        for times in results['networks'].values():
+            self.assertEqual(set(metrics.CONVERSION_STAGES), set(times.keys()))
+            self.assertGreater(times[metrics.PARSE_STAGE], 0)
+            self.assertGreater(times[metrics.MEMBERS_STAGE], 0)
+        self.assertGreater(results['networks']['BRCA-2012-Cell-cycle-signaling-pathway.txt']
+                           [metrics.NESTED_NODES_STAGE], 0)
+        self.assertEqual(len(metrics.CONVERSION_STAGES), len(out.getvalue().splitlines()))
+        self.assertEqual(['stages'], os.listdir(self._temp_dir))
+
+    def test_compare_stage_results(self):
+        baseline = {'stages': {metrics.PARSE_STAGE: 1.0, metrics.STYLE_STAGE: 0.001,
+                               metrics.CX_BUILD_STAGE: 1.0}}
+        results = {'stages': dict((stage, 0.0) for stage in metrics.CONVERSION_STAGES)}
+        results['stages'].update({metrics.PARSE_STAGE: 1.3, metrics.STYLE_STAGE: 0.002,
+                                  metrics.CX_BUILD_STAGE: 1.1})
+        out = io.StringIO()
+        self.assertEqual([metrics.PARSE_STAGE],
+                         benchmark.compare_stage_results(results, baseline, out=out))
+        self.assertEqual(3, len(out.getvalue().splitlines()))
+        self.assertEqual([], benchmark.compare_stage_results(results, baseline, threshold=0.5,
+                                                             out=io.StringIO()))
+
+    def test_main_fails_on_regression(self):
+        stagesdir = os.path.join(self._temp_dir, 'stages')
+        os.makedirs(stagesdir)
+        shutil.copy(os.path.join(benchmark.get_sample_networks_dir(), 'HIPPO.txt'), stagesdir)
+        output = os.path.join(self._temp_dir, 'stages.json')
+        args = ['benchmark.py', '--stages', stagesdir, '--repeat', '1']
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(0, benchmark.main(args + ['--output', output]))
+            self.assertEqual(0, benchmark.main(args + ['--baseline', output,
+                                                       '--threshold', '1000']))
+            with open(output, 'r') as f:
+                baseline = json.load(f)
+            baseline['stages'][metrics.PARSE_STAGE] = 0.0
+            with open(output, 'w') as f:
+                json.dump(baseline, f)
+            self.assertEqual(1, benchmark.main(args + ['--baseline', output]))
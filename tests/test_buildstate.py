@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.buildstate` module."""
+
+import os
+import json
+import tempfile
+import shutil
+
+import unittest
+from ndextcgaloader import buildstate
+from ndextcgaloader.buildstate import BuildState
+from ndextcgaloader.reports import NESTED_NODES
+
+
+class TestBuildState(unittest.TestCase):
+    """Tests for `ndextcgaloader.buildstate` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def test_get_fingerprint(self):
+        fingerprint = buildstate.get_fingerprint('in', 'plan', 'style', '1.0', '0.1.0',
+                                                 options={'gzipcx': False})
+        self.assertEqual(fingerprint, buildstate.get_fingerprint('in', 'plan', 'style', '1.0',
+                                                                 '0.1.0', options={'gzipcx': False}))
+        for changed in (('in2', 'plan', 'style', '1.0', '0.1.0'),
+                        ('in', 'plan2', 'style', '1.0', '0.1.0'),
+                        ('in', 'plan', 'style2', '1.0', '0.1.0'),
+                        ('in', 'plan', 'style', '1.1', '0.1.0'),
+                        ('in', 'plan', 'style', '1.0', '0.2.0')):
+            self.assertNotEqual(fingerprint,
+                                buildstate.get_fingerprint(*changed, options={'gzipcx': False}))
+        self.assertNotEqual(fingerprint, buildstate.get_fingerprint('in', 'plan', 'style', '1.0',
+                                                                    '0.1.0', options={'gzipcx': True}))
+
+    def test_get_file_sha256(self):
+        path = os.path.join(self._temp_dir, 'foo.txt')
+        with open(path, 'wb') as f:
+            f.write(b'foo')
+        self.assertEqual('2c26b46b68ffc68ff99b453c1d30413413422d706483bfa0f98a5e886266e7ae',
+                         buildstate.get_file_sha256(path))
+
+    def test_save_and_load(self):
+        state = BuildState(self._temp_dir)
+        state.load()
+        self.assertEqual(None, state.get_entry('net.txt', 'abc'))
+
+        reports = [(NESTED_NODES, 'net', [('a', 'COMPLEX', 'b', 'FAMILY')])]
+        state.update_entry('net.txt', 'abc', ('net', '/tmp/net.cx', 'def'), reports)
+        state.save()
+        self.assertTrue(os.path.isfile(state.get_path()))
+
+        state = BuildState(self._temp_dir)
+        state.load()
+        self.assertEqual(None, state.get_entry('net.txt', 'xyz'))
+        entry = state.get_entry('net.txt', 'abc')
+        self.assertEqual(['net', '/tmp/net.cx', 'def'], entry[buildstate.CONVERTED])
+        self.assertEqual([(NESTED_NODES, 'net', [('a', 'COMPLEX', 'b', 'FAMILY')])],
+                         entry[buildstate.REPORTS])
+
+        state.remove_entry('net.txt')
+        self.assertEqual(None, state.get_entry('net.txt', 'abc'))
+
+    def test_load_corrupt_state(self):
+        with open(os.path.join(self._temp_dir, buildstate.BUILD_STATE_FILE), 'w') as f:
+            f.write('{not json')
+        state = BuildState(self._temp_dir)
+        state.load()
+        self.assertEqual(None, state.get_entry('net.txt', 'abc'))
+
+    def test_load_state_of_other_version(self):
+        entry = {buildstate.FINGERPRINT: 'abc', buildstate.CONVERTED: None,
+                 buildstate.REPORTS: []}
+        path = os.path.join(self._temp_dir, buildstate.BUILD_STATE_FILE)
+        for state in ({'net.txt': entry},
+                      {buildstate.VERSION: buildstate.BUILD_STATE_VERSION - 1,
+                       buildstate.ENTRIES: {'net.txt': entry}}):
+            with open(path, 'w') as f:
+                json.dump(state, f)
+            state = BuildState(self._temp_dir)
+            state.load()
+            self.assertEqual(None, state.get_entry('net.txt', 'abc'))
+
+    def test_get_entry_with_invalid_reports(self):
+        state = BuildState(self._temp_dir)
+        for reports in ([('_write_nested_nodes', ([('a', 'COMPLEX', 'b', 'FAMILY')], 'net'))],
+                        [('os.system', 'net', [('echo',)])],
+                        [(NESTED_NODES, 'net', [('a', 'COMPLEX', 'b')])],
+                        [(NESTED_NODES, 'net', [('a', 'COMPLEX', 'b', 1)])],
+                        {NESTED_NODES: []}):
+            state.update_entry('net.txt', 'abc', None, reports)
+            self.assertEqual(None, state.get_entry('net.txt', 'abc'))
+        state.update_entry('net.txt', 'abc', None, [])
+        self.assertEqual([], state.get_entry('net.txt', 'abc')[buildstate.REPORTS])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.cache` module."""
+
+import os
+import json
+import tempfile
+import shutil
+
+import unittest
+from ndextcgaloader import cache
+from ndextcgaloader.cache import ConversionCache
+from ndextcgaloader.reports import NESTED_NODES
+
+
+class TestConversionCache(unittest.TestCase):
+    """Tests for `ConversionCache` class."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cachedir = os.path.join(self._temp_dir, 'cache')
+        self._datadir = os.path.join(self._temp_dir, 'data')
+        os.makedirs(self._datadir)
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _write_outputs(self, name, size=10):
+        tsv_path = os.path.join(self._datadir, name + '.tsv')
+        cx_path = os.path.join(self._datadir, name + '.cx')
+        for path in (tsv_path, cx_path):
+            with open(path, 'w') as f:
+                f.write(name[0] * size)
+        return tsv_path, cx_path
+
+    def test_get_cache_key(self):
+        key = cache.get_cache_key('net.txt', 'abc')
+        self.assertEqual(key, cache.get_cache_key('/data/net.txt', 'abc'))
+        self.assertNotEqual(key, cache.get_cache_key('other.txt', 'abc'))
+        self.assertNotEqual(key, cache.get_cache_key('net.txt', 'abd'))
+
+    def test_put_and_get(self):
+        conversion_cache = ConversionCache(self._cachedir)
+        key = cache.get_cache_key('net.txt', 'abc')
+        outdir = os.path.join(self._temp_dir, 'other')
+        os.makedirs(outdir)
+        self.assertEqual(None, conversion_cache.get(key, outdir, 'net.tsv'))
+
+        tsv_path, cx_path = self._write_outputs('net')
+        reports = [(NESTED_NODES, 'net', [('a', 'COMPLEX', 'b', 'FAMILY')])]
+        conversion_cache.put(key, ('net', cx_path, 'def'), tsv_path, reports)
+
+        converted, cached_reports = conversion_cache.get(key, outdir, 'net.tsv')
+        self.assertEqual(('net', os.path.join(outdir, 'net.cx'), 'def'), converted)
+        self.assertEqual(reports, cached_reports)
+        for name in ('net.tsv', 'net.cx'):
+            with open(os.path.join(outdir, name), 'r') as f:
+                self.assertEqual('n' * 10, f.read())
+
+        # adding an existing entry leaves it alone
+        with open(cx_path, 'w') as f:
+            f.write('changed')
+        conversion_cache.put(key, ('net', cx_path, 'def'), tsv_path, reports)
+        conversion_cache.get(key, outdir, 'net.tsv')
+        with open(os.path.join(outdir, 'net.cx'), 'r') as f:
+            self.assertEqual('n' * 10, f.read())
+
+    def test_invalid_entry_is_a_miss(self):
+        conversion_cache = ConversionCache(self._cachedir)
+        key = cache.get_cache_key('net.txt', 'abc')
+        outdir = os.path.join(self._temp_dir, 'other')
+        os.makedirs(outdir)
+        tsv_path, cx_path = self._write_outputs('net')
+        conversion_cache.put(key, ('net', cx_path, 'def'), tsv_path, [])
+        entry_path = os.path.join(self._cachedir, key[:2], key, cache.ENTRY_FILE)
+        with open(entry_path, 'r') as f:
+            entry = json.load(f)
+
+        for name, value in ((cache.REPORTS, [['_write_nested_nodes', [[], 'net']]]),
+                            (cache.REPORTS, [['__class__', 'net', []]]),
+                            (cache.REPORTS, [[NESTED_NODES, 'net', [['a', 'COMPLEX']]]]),
+                            (cache.REPORTS, [[NESTED_NODES, None, []]]),
+                            (cache.CX_NAME, '../net.cx'),
+                            (cache.NETWORK_HASH, 1)):
+            invalid_entry = dict(entry)
+            invalid_entry[name] = value
+            with open(entry_path, 'w') as f:
+                json.dump(invalid_entry, f)
+            self.assertEqual(None, conversion_cache.get(key, outdir, 'net.tsv'))
+        self.assertEqual([], os.listdir(outdir))
+
+    def test_evicts_least_recently_used(self):
+        conversion_cache = ConversionCache(self._cachedir, max_size=13000)
+        keys = {}
+        for age, name in enumerate(['a', 'b', 'c']):
+            keys[name] = cache.get_cache_key(name + '.txt', 'abc')
+            tsv_path, cx_path = self._write_outputs(name, size=2000)
+            conversion_cache.put(keys[name], (name, cx_path, 'def'), tsv_path, [])
+            entry_file = os.path.join(self._cachedir, keys[name][:2], keys[name], cache.ENTRY_FILE)
+            os.utime(entry_file, (1000 + age, 1000 + age))
+
+        # using a makes b the least recently used entry
+        self.assertTrue(conversion_cache.get(keys['a'], self._datadir, 'a.tsv') is not None)
+
+        tsv_path, cx_path = self._write_outputs('d', size=2000)
+        conversion_cache.put(cache.get_cache_key('d.txt', 'abc'), ('d', cx_path, 'def'),
+                             tsv_path, [])
+        self.assertEqual(None, conversion_cache.get(keys['b'], self._datadir, 'b.tsv'))
+        self.assertTrue(conversion_cache.get(keys['a'], self._datadir, 'a.tsv') is not None)
+        self.assertTrue(conversion_cache.get(keys['c'], self._datadir, 'c.tsv') is not None)
+        self.assertTrue(conversion_cache.get_size() <= 13000)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.cxbuilder` module."""
+
+import json
+
+import unittest
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import cxbuilder
+from ndextcgaloader.cxbuilder import LoadPlanNetworkBuilder
+
+
+def _row(source_id, target_id, **kwargs):
+    row = {'NODE_ID': source_id, 'NODE_ID_B': target_id, 'EDGE_TYPE': 'activates',
+           'NODE_TYPE': 'gene', 'POSX': '1', 'POSY': '2',
+           'NODE_TYPE_B': 'gene', 'POSX_B': '3', 'POSY_B': '4'}
+    row.update(kwargs)
+    return row
+
+
+class TestLoadPlanNetworkBuilder(unittest.TestCase):
+    """Tests for `LoadPlanNetworkBuilder` class."""
+
+    def setUp(self):
+        with open(ndexloadtcga.get_load_plan(), 'r') as f:
+            self._loadplan = json.load(f)
+        self._builder = LoadPlanNetworkBuilder(self._loadplan)
+
+    def test_data_to_type(self):
+        self.assertEqual(5, cxbuilder.data_to_type('[5]', 'integer'))
+        self.assertEqual(None, cxbuilder.data_to_type('nan', 'integer'))
+        self.assertEqual(['a', 'b'], cxbuilder.data_to_type('a,b', 'list_of_string'))
+        self.assertEqual(1.5, cxbuilder.data_to_type('1.5', 'double'))
+        self.assertEqual(True, cxbuilder.data_to_type('True', 'boolean'))
+
+    def test_unsupported_edge_plan(self):
+        self._loadplan['edge_plan']['citation_id_column'] = 'PUBMED'
+        self.assertRaises(ValueError, LoadPlanNetworkBuilder, self._loadplan)
+
+    def test_build(self):
+        id_to_gene_dict = {'a': 'WNT1', 'b': 'bad name', 'c': 'FAM'}
+        rows = [_row('a', 'b'),
+                _row('c', 'a', EDGE_TYPE='', NODE_TYPE='proteinfamily', MEMBER='hgnc.symbol:WNT1'),
+                _row('a', '', POSX='')]
+        network = self._builder.build(rows, id_to_gene_dict)
+
+        self.assertEqual({0: {'@id': 0, 'n': 'WNT1', 'r': 'hgnc.symbol:WNT1'},
+                          1: {'@id': 1, 'n': 'bad name'},
+                          2: {'@id': 2, 'n': 'FAM'}}, network.nodes)
+        self.assertEqual({0: {'@id': 0, 's': 0, 't': 1, 'i': 'activates'},
+                          1: {'@id': 1, 's': 2, 't': 0, 'i': 'unknown'}}, network.edges)
+        self.assertEqual([{'po': 2, 'n': 'type', 'v': 'proteinfamily', 'd': 'string'},
+                          {'po': 2, 'n': 'POSX', 'v': 1, 'd': 'integer'},
+                          {'po': 2, 'n': 'POSY', 'v': 2, 'd': 'integer'},
+                          {'po': 2, 'n': 'member', 'v': ['hgnc.symbol:WNT1'],
+                           'd': 'list_of_string'}],
+                         network.nodeAttributes[2])
+        self.assertEqual(json.dumps(self._loadplan['context']),
+                         network.get_network_attribute('@context')['v'])
+
+    def test_build_conversion_failure_skips_remaining_attributes(self):
+        network = self._builder.build([_row('a', '', POSX='nan')], {'a': 'A'})
+        self.assertEqual([{'po': 0, 'n': 'type', 'v': 'gene', 'd': 'string'}],
+                         network.nodeAttributes[0])
+        self.assertEqual({}, network.edges)
+
+    def test_build_with_layout(self):
+        builder = LoadPlanNetworkBuilder(self._loadplan, layout_attributes=('POSX', 'POSY'))
+        id_to_gene_dict = {'a': 'WNT1', 'b': 'B', 'c': 'C'}
+        rows = [_row('a', 'b', POSY='nan'),
+                _row('c', 'b', NODE_TYPE='', POSX='5', POSY='6')]
+        network = builder.build(rows, id_to_gene_dict)
+
+        # a lost its y coordinate to the conversion failure so it has no layout
+        self.assertEqual([{'node': 1, 'x': 3.0, 'y': 4.0}, {'node': 2, 'x': 5.0, 'y': 6.0}],
+                         network.get_opaque_aspect(cxbuilder.CARTESIANLAYOUT_ASPECT_NAME))
+        self.assertEqual([{'po': 0, 'n': 'type', 'v': 'gene', 'd': 'string'}],
+                         network.nodeAttributes[0])
+        self.assertNotIn(2, network.nodeAttributes)
+
+        # c only has coordinates, which still drop its represents
+        self.assertEqual({'@id': 2, 'n': 'C'}, network.nodes[2])
+
+    def test_cartesian_layout(self):
+        layout = cxbuilder.CartesianLayout()
+        self.assertFalse(layout.has_node(0))
+        layout.set_y(2, 1.5)
+        layout.set_x(0, 3.0)
+        layout.set_y(0, 4.0)
+        self.assertTrue(layout.has_node(2))
+        self.assertFalse(layout.has_node(1))
+        self.assertEqual([{'node': 0, 'x': 3.0, 'y': 4.0}], layout.to_aspect())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.cxwriter` module."""
+
+import io
+import os
+import copy
+import gzip
+import json
+import shutil
+import tempfile
+
+import unittest
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader import cxwriter
+from ndextcgaloader.cxwriter import CXWriter
+
+
+def _get_network():
+    network = NiceCXNetwork()
+    network.set_name('net')
+    a = network.create_node('A', node_represents='hgnc.symbol:A')
+    b = network.create_node('B')
+    network.create_edge(edge_source=a, edge_target=b, edge_interaction='activates')
+    network.set_node_attribute(a, 'member', ['X', 'Y'], type='list_of_string')
+    network.set_node_attribute(b, 'type', 'gene')
+    network.set_opaque_aspect('cartesianLayout', [{'node': a, 'x': 1.0, 'y': 2.0}])
+    network.set_opaque_aspect('empty', [])
+    network.opaqueAspects['cyVisualProperties'] = ({'properties_of': 'network'},)
+    return network
+
+
+class TestCXWriter(unittest.TestCase):
+    """Tests for `ndextcgaloader.cxwriter` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def test_pretty_output_matches_json_dump(self):
+        expected = json.dumps(_get_network().to_cx(log_to_stdout=False), indent=4)
+        out = io.StringIO()
+        CXWriter(out, pretty=True).write_network(_get_network())
+        self.assertEqual(expected, out.getvalue())
+
+    def test_compact_output(self):
+        network = _get_network()
+        expected = json.loads(json.dumps(copy.deepcopy(network).to_cx(log_to_stdout=False)))
+        out = io.StringIO()
+        CXWriter(out).write_network(network)
+        self.assertEqual(expected, json.loads(out.getvalue()))
+        self.assertNotIn('\n', out.getvalue())
+        self.assertNotIn(': ', out.getvalue())
+
+    def test_preserialized_aspect(self):
+        out = io.StringIO()
+        CXWriter(out).write_network(_get_network(),
+                                    preserialized={'cyVisualProperties': '[{"spliced":1}]'})
+        self.assertTrue('{"cyVisualProperties":[{"spliced":1}]}' in out.getvalue())
+
+        # pretty output is always serialized from the elements
+        out = io.StringIO()
+        CXWriter(out, pretty=True).write_network(_get_network(),
+                                                 preserialized={'cyVisualProperties': '[{"spliced":1}]'})
+        self.assertNotIn('spliced', out.getvalue())
+        self.assertEqual([{'properties_of': 'network'}], json.loads(out.getvalue())[-2]['cyVisualProperties'])
+
+    def test_empty_network(self):
+        out = io.StringIO()
+        CXWriter(out).write_network(NiceCXNetwork())
+        self.assertEqual(NiceCXNetwork().to_cx(log_to_stdout=False), json.loads(out.getvalue()))
+
+    def test_save_cx(self):
+        path = cxwriter.get_cx_path(self._temp_dir, 'net')
+        self.assertEqual(os.path.join(self._temp_dir, 'net.cx'), path)
+        self.assertEqual(path, cxwriter.save_cx(_get_network(), path))
+        with open(path, 'r') as f:
+            cx = json.load(f)
+        self.assertEqual(['net.cx'], os.listdir(self._temp_dir))
+
+        gzip_path = cxwriter.get_cx_path(self._temp_dir, 'net', gzip_output=True)
+        self.assertEqual(path + '.gz', gzip_path)
+        cxwriter.save_cx(_get_network(), gzip_path, gzip_output=True)
+        with gzip.open(gzip_path, 'rt') as f:
+            self.assertEqual(cx, json.load(f))
+
+    def test_save_cx_failure_keeps_previous_file(self):
+        path = cxwriter.get_cx_path(self._temp_dir, 'net')
+        with open(path, 'w') as f:
+            f.write('previous')
+        network = _get_network()
+        network.set_opaque_aspect('bad', [{'value': object()}])
+        self.assertRaises(TypeError, cxwriter.save_cx, network, path)
+        with open(path, 'r') as f:
+            self.assertEqual('previous', f.read())
+        self.assertEqual(['net.cx'], os.listdir(self._temp_dir))
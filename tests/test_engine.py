@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.engine` module."""
+
+import io
+
+import unittest
+from ndextcgaloader import engine
+from ndextcgaloader.engine import NetworkTable
+from ndextcgaloader.engine import TableEngine
+from ndextcgaloader.parser import PathwayMapperParser
+
+
+NESTED_NETWORK = """nested-pathway
+--NODE_NAME\tNODE_ID\tNODE_TYPE\tPARENT_ID\tPOSX\tPOSY--
+CTNNB1\tn1\tGENE\t-1\t396\t371\t
+\tn2\tFAMILY\t-1\t396\t183\t
+WNT1\tn3\tGENE\tn2\t380\t180\t
+FZD\tn4\tFAMILY\tn2\t10\t20\t
+FZD1\tn5\tGENE\tn4\t11\t21\t
+bad name\tn6\tGENE\t-1\t1\t2\t
+p53/p21\tn7\tPROCESS\t-1\t5\t6\t
+
+--EDGE_ID\tSOURCE\tTARGET\tEDGE_TYPE
+e1\tn2\tn1\tINHIBITS
+e2\tn6\tn1\tACTIVATES
+e3\tn2\tn1\tINHIBITS
+"""
+
+
+def _node(node_id, parent_id, node_type='FAMILY'):
+    return {'NODE': node_id.upper(), 'NODE_ID': node_id, 'NODE_TYPE': node_type,
+            'PARENT_ID': parent_id, 'POSX': '1', 'POSY': '2'}
+
+
+class TestEngine(unittest.TestCase):
+    """Tests for `ndextcgaloader.engine` module."""
+
+    def test_get_edge_rank_groups_edges_by_source(self):
+        edges = [('e1', 'a', 'x'), ('e2', 'b', 'x'), ('e3', 'a', 'y'),
+                 ('e4', 'missing', 'y'), ('e5', 'b', 'missing'), ('e6', 'missing', 'x')]
+        rank = engine.get_edge_rank(edges, {'a', 'b', 'x', 'y'})
+        self.assertEqual(['e1', 'e3', 'e2', 'e5', 'e6', 'e4'],
+                         sorted(rank.keys(), key=lambda e: rank[e]))
+
+    def test_get_edge_rank_no_nodes(self):
+        self.assertEqual({}, engine.get_edge_rank([('e1', 'a', 'b')], set()))
+
+    def test_get_name_for_unnamed_node(self):
+        self.assertEqual('family [ A B ]',
+                         engine.get_name_for_unnamed_node('proteinfamily',
+                                                          'hgnc.symbol:B|hgnc.symbol:A'))
+        self.assertEqual('complex [ A B C D ... ]',
+                         engine.get_name_for_unnamed_node('complex', 'E|D|C|B|A'))
+
+    def test_network_table_to_tsv(self):
+        table = NetworkTable(['A', 'B'], [{'A': '1', 'B': 'x\ty'}, {'A': '2', 'B': ''}])
+        self.assertEqual('\tA\tB\n0\t1\t"x\ty"\n1\t2\t\n', table.to_tsv())
+        self.assertEqual('""\n', NetworkTable([], []).to_tsv())
+
+    def test_get_top_level_parents(self):
+        self.assertEqual({'b': 'a', 'c': 'a', 'd': 'a'},
+                         engine.get_top_level_parents({'b': 'a', 'c': 'b', 'd': 'c'}))
+        self.assertEqual({'d': 'a', 'c': 'a', 'b': 'a'},
+                         engine.get_top_level_parents({'d': 'c', 'c': 'b', 'b': 'a'}))
+        self.assertEqual({}, engine.get_top_level_parents({}))
+
+    def test_get_top_level_parents_cycle(self):
+        top_level_parents = engine.get_top_level_parents({'a': 'b', 'b': 'a', 'c': 'a'})
+        self.assertEqual(set(['a', 'b', 'c']), set(top_level_parents.keys()))
+        self.assertTrue(top_level_parents['c'] in ('a', 'b'))
+
+    def test_normalize_nodes_collapses_any_depth(self):
+        nodes = [_node('a', '-1'), _node('b', 'a'), _node('c', 'b'), _node('d', 'c', 'GENE')]
+        for nested_nodes_map in ({'b': 'a', 'c': 'b'}, {'c': 'b', 'b': 'a'}):
+            normalized = TableEngine().normalize_nodes(nodes, nested_nodes_map)
+            self.assertEqual([('a', '-1'), ('d', 'a')],
+                             [(n['NODE_ID'], n['PARENT_ID']) for n in normalized])
+        self.assertEqual('c', nodes[3]['PARENT_ID'])
+
+    def test_convert(self):
+        pathway = PathwayMapperParser().parse(io.StringIO(NESTED_NETWORK))
+        table, id_to_gene_dict, invalid_names, nested_nodes = TableEngine().convert(pathway)
+
+        self.assertEqual(['bad name'], invalid_names)
+        self.assertEqual([('FZD', 'FAMILY', '', 'FAMILY')], nested_nodes)
+
+        self.assertEqual(engine.NETWORK_TABLE_COLUMNS + ['MEMBER'], table.columns)
+
+        # duplicate edge e3 dropped, process without edges kept
+        self.assertEqual(['e1', 'e2', ''], [r['EDGE_ID'] for r in table.rows])
+        family = table.rows[0]
+        self.assertEqual('n2', family['NODE_ID'])
+        self.assertEqual('proteinfamily', family['NODE_TYPE'])
+        self.assertEqual('inhibits', family['EDGE_TYPE'])
+        self.assertEqual('hgnc.symbol:FZD1|hgnc.symbol:WNT1', family['MEMBER'])
+        self.assertEqual('gene', family['NODE_TYPE_B'])
+        self.assertEqual('CTNNB1', family['TARGET'])
+
+        process = table.rows[2]
+        self.assertEqual('p53/p21', process['SOURCE'])
+        self.assertEqual('biologicalprocess', process['NODE_TYPE'])
+
+        self.assertEqual('family [ FZD1 WNT1 ]', id_to_gene_dict['n2'])
+        self.assertEqual('FZD', id_to_gene_dict['n4'])
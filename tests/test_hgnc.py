@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.hgnc` module."""
+
+import unittest
+
+import pandas as pd
+
+from ndextcgaloader.hgnc import HGNCSymbolValidator
+
+
+class TestHgnc(unittest.TestCase):
+    """Tests for `ndextcgaloader.hgnc` module."""
+
+    def test_is_valid(self):
+        validator = HGNCSymbolValidator()
+        self.assertTrue(validator.is_valid('WNT1'))
+        self.assertTrue(validator.is_valid('HLA-A'))
+        self.assertTrue(validator.is_valid('CDKN2A@'))
+        self.assertFalse(validator.is_valid('bad name'))
+        self.assertFalse(validator.is_valid('p53/p21'))
+        self.assertFalse(validator.is_valid(''))
+
+    def test_is_valid_remembers_symbols(self):
+        validator = HGNCSymbolValidator()
+        for symbol in ('WNT1', 'bad name', 'WNT1', 'bad name', 'WNT1'):
+            validator.is_valid(symbol)
+        self.assertEqual({'hits': 3, 'misses': 2, 'size': 2, 'maxsize': 8192},
+                         validator.get_cache_info())
+
+    def test_cache_is_bounded(self):
+        validator = HGNCSymbolValidator(cache_size=2)
+        validator.is_valid('A')
+        validator.is_valid('B')
+        validator.is_valid('A')
+        validator.is_valid('C')
+        self.assertEqual(2, validator.get_cache_info()['size'])
+
+        # B was least recently used so it was dropped, A was kept
+        validator.is_valid('A')
+        self.assertEqual(2, validator.get_cache_info()['hits'])
+        validator.is_valid('B')
+        self.assertEqual(2, validator.get_cache_info()['hits'])
+
+    def test_get_valid_mask(self):
+        validator = HGNCSymbolValidator()
+        validator.is_valid('WNT1')
+        symbols = pd.Series(['WNT1', 'bad name', None, 'TP53', 'WNT1'], index=[4, 3, 2, 1, 0])
+        mask = validator.get_valid_mask(symbols)
+        self.assertEqual([True, False, False, True, True], mask.tolist())
+        self.assertEqual([4, 3, 2, 1, 0], mask.index.tolist())
+        self.assertEqual({'hits': 1, 'misses': 3, 'size': 3, 'maxsize': 8192},
+                         validator.get_cache_info())
+
+        self.assertEqual([], validator.get_valid_mask(pd.Series([], dtype=object)).tolist())
+
+    def test_prefix_symbol(self):
+        validator = HGNCSymbolValidator()
+        self.assertEqual('hgnc.symbol:WNT1', validator.prefix_symbol('WNT1'))
+        self.assertEqual('bad name', validator.prefix_symbol('bad name'))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.manifest` module."""
+
+import os
+import tempfile
+import shutil
+
+import unittest
+from ndextcgaloader import manifest
+from ndextcgaloader.manifest import DownloadManifest
+
+
+class TestDownloadManifest(unittest.TestCase):
+    """Tests for `DownloadManifest` class."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+        self._data = b'ACC-2016-WNT-signaling-pathway\n'
+        with open(os.path.join(self._temp_dir, 'foo.txt'), 'wb') as f:
+            f.write(self._data)
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_load_missing_manifest(self):
+        dm = DownloadManifest(self._temp_dir)
+        dm.load()
+        self.assertEqual(None, dm.get_entry('foo.txt'))
+        self.assertEqual({}, dm.get_conditional_headers('foo.txt'))
+
+    def test_load_corrupt_manifest(self):
+        with open(os.path.join(self._temp_dir, manifest.MANIFEST_FILE), 'w') as f:
+            f.write('{not json')
+        dm = DownloadManifest(self._temp_dir)
+        dm.load()
+        self.assertEqual(None, dm.get_entry('foo.txt'))
+
+    def test_save_and_load(self):
+        dm = DownloadManifest(self._temp_dir)
+        dm.update_entry('foo.txt', {'ETag': '"abc"',
+                                    'Last-Modified': 'Tue, 26 Mar 2019 00:00:00 GMT'},
+                        self._data)
+        dm.save()
+        self.assertTrue(os.path.isfile(dm.get_path()))
+
+        dm = DownloadManifest(self._temp_dir)
+        dm.load()
+        entry = dm.get_entry('foo.txt')
+        self.assertEqual('"abc"', entry[manifest.ETAG])
+        self.assertEqual(len(self._data), entry[manifest.SIZE])
+        self.assertEqual(manifest.get_sha256(self._data), entry[manifest.SHA256])
+        self.assertEqual({'If-None-Match': '"abc"',
+                          'If-Modified-Since': 'Tue, 26 Mar 2019 00:00:00 GMT'},
+                         dm.get_conditional_headers('foo.txt'))
+
+    def test_conditional_headers_only_sent_validators(self):
+        dm = DownloadManifest(self._temp_dir)
+        dm.update_entry('foo.txt', {'ETag': '"abc"'}, self._data)
+        self.assertEqual({'If-None-Match': '"abc"'},
+                         dm.get_conditional_headers('foo.txt'))
+
+    def test_conditional_headers_local_copy_changed(self):
+        dm = DownloadManifest(self._temp_dir)
+        dm.update_entry('foo.txt', {'ETag': '"abc"'}, self._data)
+        with open(os.path.join(self._temp_dir, 'foo.txt'), 'wb') as f:
+            f.write(self._data.upper())
+        self.assertEqual({}, dm.get_conditional_headers('foo.txt'))
+
+        os.remove(os.path.join(self._temp_dir, 'foo.txt'))
+        self.assertEqual({}, dm.get_conditional_headers('foo.txt'))
+
+    def test_remove_entry(self):
+        dm = DownloadManifest(self._temp_dir)
+        dm.update_entry('foo.txt', {}, self._data)
+        dm.remove_entry('foo.txt')
+        dm.remove_entry('foo.txt')
+        self.assertEqual(None, dm.get_entry('foo.txt'))
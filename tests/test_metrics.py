@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `metrics` module."""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader import metrics
+from ndextcgaloader.metrics import MetricsRecorder
+from ndextcgaloader.metrics import StageTimer
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests for `metrics` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_stage_timer_excludes_inner_stages(self):
+        timer = StageTimer()
+        with timer.time('outer'):
+            time.sleep(0.02)
+            with timer.time('inner'):
+                time.sleep(0.05)
+                # busy loop so the inner stage uses CPU time
+                end = time.perf_counter() + 0.02
+                while time.perf_counter() < end:
+                    pass
+        times = timer.get_times()
+        self.assertGreaterEqual(times['inner'], 0.07)
+        self.assertGreaterEqual(times['outer'], 0.02)
+        self.assertLess(times['outer'], 0.05)
+
+        cpu_times = timer.get_cpu_times()
+        self.assertGreater(cpu_times['inner'], cpu_times['outer'])
+        self.assertLess(cpu_times['inner'], times['inner'])
+
+        with timer.time('inner'):
+            pass
+        self.assertGreaterEqual(timer.get_times()['inner'], times['inner'])
+
+        timer.reset()
+        self.assertEqual({}, timer.get_times())
+        self.assertEqual({}, timer.get_cpu_times())
+
+    def test_get_network_counts(self):
+        network = NiceCXNetwork()
+        family = network.create_node('family')
+        network.set_node_attribute(family, 'member', ['A', 'B', 'C'], type='list_of_string')
+        gene = network.create_node('D')
+        network.set_node_attribute(gene, 'type', 'protein')
+        network.create_edge(edge_source=family, edge_target=gene)
+        self.assertEqual({metrics.NODES: 2, metrics.EDGES: 1, metrics.MEMBERS: 3},
+                         metrics.get_network_counts(network))
+
+    def test_get_conversion_records(self):
+        timer = StageTimer()
+        for stage in (metrics.PARSE_STAGE, metrics.CX_BUILD_STAGE, metrics.SERIALIZATION_STAGE):
+            with timer.time(stage):
+                pass
+        counts = {metrics.NODES: 2, metrics.EDGES: 1, metrics.MEMBERS: 0}
+        records = metrics.get_conversion_records('net', timer, counts=counts, bytes_written=10)
+        self.assertEqual([metrics.PARSE_STAGE, metrics.CX_BUILD_STAGE, metrics.SERIALIZATION_STAGE],
+                         [r[metrics.STAGE] for r in records])
+        for record in records:
+            self.assertEqual('net', record[metrics.NETWORK])
+            self.assertGreaterEqual(record[metrics.WALL_TIME], 0)
+            self.assertGreaterEqual(record[metrics.CPU_TIME], 0)
+        self.assertEqual(2, records[1][metrics.NODES])
+        self.assertNotIn(metrics.NODES, records[0])
+        self.assertEqual(10, records[2][metrics.BYTES_WRITTEN])
+
+    def test_write_and_summary(self):
+        recorder = MetricsRecorder()
+        recorder.add_records([metrics.get_record('a', metrics.DOWNLOAD_STAGE, 0.5,
+                                                 **{metrics.BYTES_DOWNLOADED: 100}),
+                              metrics.get_record('a', metrics.PARSE_STAGE, 1.0, 0.75),
+                              metrics.get_record('b', metrics.PARSE_STAGE, 3.0, 2.5)])
+        recorder.add_records([metrics.get_record('b', metrics.UPLOAD_STAGE, 0.25,
+                                                 **{metrics.LATENCY: 0.25,
+                                                    metrics.FAILED: False})])
+
+        path = os.path.join(self._temp_dir, 'metrics.jsonl')
+        recorder.write(path)
+        with open(path, 'r') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(recorder.get_records(), records)
+        self.assertEqual(['metrics.jsonl'], os.listdir(self._temp_dir))
+
+        lines = recorder.format_summary(num_networks=1)
+        self.assertEqual(7, len(lines))
+        self.assertTrue(lines[1].startswith(metrics.DOWNLOAD_STAGE))
+        self.assertIn(' 100 ', lines[1])
+        self.assertTrue(lines[2].startswith(metrics.PARSE_STAGE))
+        self.assertIn('b (3.00s)', lines[2])
+        self.assertTrue(lines[3].startswith(metrics.UPLOAD_STAGE))
+        self.assertEqual('3.25       b', lines[6])
+
+        self.assertEqual(1, len(MetricsRecorder().format_summary()))
@@ -4,16 +4,31 @@
 """Tests for `ndextcgaloader` package."""
 
 import os
+import hashlib
 import tempfile
 import shutil
+import threading
+from functools import partial
+from http.server import HTTPServer, SimpleHTTPRequestHandler
 
 import unittest
 from ndexutil.config import NDExUtilConfig
 from ndextcgaloader import ndexloadtcga
 from ndextcgaloader.ndexloadtcga import NDExNdextcgaloaderLoader
+from ndextcgaloader.manifest import DownloadManifest
+from ndextcgaloader import buildstate
+from ndextcgaloader import cache
+from ndextcgaloader import metrics
+from ndextcgaloader import reports
+from ndextcgaloader import resolver
+from ndextcgaloader import sources
+from ndextcgaloader import uploader
+from ndextcgaloader import uploadstate
+from tests.test_uploader import StandInNDExServer
 
 import json
 import ndex2
+import pandas as pd
 
 
 class dotdict(dict):
@@ -23,6 +38,67 @@ class dotdict(dict):
     __delattr__ = dict.__delitem__
 
 
+class QuietHTTPRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files from a directory without logging every request"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ETagHTTPRequestHandler(QuietHTTPRequestHandler):
+    """Adds ETag validators to files served, counting the full (200) responses sent"""
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return QuietHTTPRequestHandler.do_GET(self)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.full_responses += 1
+
+
+class LocalHTTPServer(object):
+    """Stand-in for the PathwayMapper server that serves files from a local directory"""
+
+    def __init__(self, directory, handler_class=QuietHTTPRequestHandler):
+        self._server = HTTPServer(('127.0.0.1', 0),
+                                  partial(handler_class, directory=directory))
+        self._server.full_responses = 0
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+
+    @property
+    def full_responses(self):
+        return self._server.full_responses
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._server.server_port)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
 class TestNdextcgaloader(unittest.TestCase):
     """Tests for `ndextcgaloader` package."""
 
@@ -44,7 +120,8 @@ class TestNdextcgaloader(unittest.TestCase):
             'dataurl': None,
             'loadplan': self._loadplan_path,
             'logconf':  None,
-            'networklistfile': self._networklistfile
+            'networklistfile': self._networklistfile,
+            'downloadworkers': 4
         }
 
         self._the_args = dotdict(self._the_args)
@@ -122,6 +199,66 @@ format=%(asctime)s %(name)-12s %(levelname)-8s %(message)s""")
             shutil.rmtree(temp_dir)
 
 
+    def test_download_data_files(self):
+        """Tests concurrent download of network files over a shared session"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            networks = ['ACC-2016-WNT-signaling-pathway.txt',
+                        'does-not-exist.txt',
+                        'Cell-Cycle.txt',
+                        'HIPPO.txt']
+
+            with LocalHTTPServer(self._sample_networks_in_tests_dir) as server:
+                self.NDExTCGALoader._download_data_files(server.url, networks, temp_dir)
+
+            self.assertEqual(['does-not-exist.txt'], self.NDExTCGALoader._failed_networks)
+            for network in ['ACC-2016-WNT-signaling-pathway.txt', 'Cell-Cycle.txt', 'HIPPO.txt']:
+                with open(os.path.join(temp_dir, network), 'r') as f:
+                    downloaded = f.read()
+                with open(os.path.join(self._sample_networks_in_tests_dir, network), 'r') as f:
+                    self.assertEqual(f.read(), downloaded)
+
+            records = self.NDExTCGALoader._metrics.get_records()
+            self.assertEqual(['ACC-2016-WNT-signaling-pathway', 'Cell-Cycle', 'HIPPO'],
+                             [r[metrics.NETWORK] for r in records])
+            self.assertEqual(os.path.getsize(os.path.join(temp_dir, 'HIPPO.txt')),
+                             records[2][metrics.BYTES_DOWNLOADED])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_download_data_files_skips_unchanged_files(self):
+        """Tests that a second download relies on conditional requests"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            networks = ['ACC-2016-WNT-signaling-pathway.txt', 'Cell-Cycle.txt']
+
+            with LocalHTTPServer(self._sample_networks_in_tests_dir,
+                                 handler_class=ETagHTTPRequestHandler) as server:
+                self.NDExTCGALoader._download_data_files(server.url, networks, temp_dir)
+                self.assertEqual(2, server.full_responses)
+
+                manifest = DownloadManifest(temp_dir)
+                manifest.load()
+                entry = manifest.get_entry('Cell-Cycle.txt')
+                self.assertTrue(entry['etag'].startswith('"'))
+                self.assertEqual(os.path.getsize(os.path.join(temp_dir, 'Cell-Cycle.txt')), entry['size'])
+
+                # nothing changed upstream, so nothing should be transferred
+                self.NDExTCGALoader._download_data_files(server.url, networks, temp_dir)
+                self.assertEqual(2, server.full_responses)
+
+                # a local copy that no longer matches the manifest is fetched again
+                with open(os.path.join(temp_dir, 'Cell-Cycle.txt'), 'a') as f:
+                    f.write('edited locally\n')
+                self.NDExTCGALoader._download_data_files(server.url, networks, temp_dir)
+                self.assertEqual(3, server.full_responses)
+
+            self.assertEqual([], self.NDExTCGALoader._failed_networks)
+            with open(os.path.join(temp_dir, 'Cell-Cycle.txt'), 'r') as f:
+                self.assertFalse(f.read().endswith('edited locally\n'))
+        finally:
+            shutil.rmtree(temp_dir)
+
     def validate_network(self, network, sample_network, file_name):
 
         edges, nodes, node_attributes = network.edges, network.nodes, network.nodeAttributes
@@ -147,10 +284,384 @@ format=%(asctime)s %(name)-12s %(levelname)-8s %(message)s""")
 
 
 
+    def test_add_member_properties(self):
+        nan = float('nan')
+        df = pd.DataFrame({'SOURCE': ['FAM', 'WNT1', 'bad name', 'CTNNB1'],
+                           'TARGET': ['CTNNB1', nan, nan, 'FAM'],
+                           'NODE_ID': ['f', 'w', 'b', 'c'],
+                           'NODE_TYPE': ['proteinfamily', 'gene', 'gene', 'gene'],
+                           'PARENT_ID': ['-1', 'f', 'f', '-1'],
+                           'NODE_ID_B': ['c', nan, nan, 'f'],
+                           'NODE_TYPE_B': ['gene', nan, nan, 'proteinfamily'],
+                           'PARENT_ID_B': ['f', nan, nan, '-1']})
+        self.assertEqual((True, True), self.NDExTCGALoader._add_member_properties(df))
+        self.assertEqual(['bad name|hgnc.symbol:CTNNB1|hgnc.symbol:WNT1', '', '', ''],
+                         df['MEMBER'].tolist())
+        self.assertEqual(['', '', '', 'bad name|hgnc.symbol:CTNNB1|hgnc.symbol:WNT1'],
+                         df['MEMBER_B'].tolist())
+
+        df = df[df['NODE_TYPE'] == 'gene'].drop(columns=['MEMBER', 'MEMBER_B'])
+        df['NODE_TYPE_B'] = 'gene'
+        self.assertEqual((False, False), self.NDExTCGALoader._add_member_properties(df))
+        self.assertNotIn('MEMBER', df.columns)
+
+    def test_create_names_for_unnamed_nodes(self):
+        df = pd.DataFrame({'SOURCE': ['', '', 'Named', 'undefined', 'CTNNB1'],
+                           'TARGET': ['CTNNB1', 'AXIN1', 'CTNNB1', '', ''],
+                           'NODE_ID': ['f', 'f', 'n', 'c', 'g'],
+                           'NODE_TYPE': ['proteinfamily', 'proteinfamily', 'complex', 'complex', 'gene'],
+                           'MEMBER': ['hgnc.symbol:E|D|hgnc.symbol:C|B|A', 'hgnc.symbol:E|D|hgnc.symbol:C|B|A',
+                                      'hgnc.symbol:X', 'hgnc.symbol:Y', ''],
+                           'NODE_ID_B': ['g', 'a', 'g', '', ''],
+                           'NODE_TYPE_B': ['gene', 'gene', 'gene', '', ''],
+                           'MEMBER_B': ['', '', '', '', '']})
+        id_to_gene_dict = {'f': '', 'n': 'Named', 'c': 'undefined', 'g': 'CTNNB1'}
+        self.NDExTCGALoader._create_names_for_unnamed_nodes(df, id_to_gene_dict)
+        self.assertEqual({'f': 'family [ A B C D ... ]', 'n': 'Named',
+                          'c': 'complex [ Y ]', 'g': 'CTNNB1'}, id_to_gene_dict)
+
+        id_to_gene_dict = {}
+        self.NDExTCGALoader._create_names_for_unnamed_nodes(df.drop(columns=['MEMBER', 'MEMBER_B']),
+                                                            id_to_gene_dict)
+        self.assertEqual({}, id_to_gene_dict)
+
+    def test_normalize_nodes_collapses_any_depth(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.NDExTCGALoader._reportdir = temp_dir
+            self.NDExTCGALoader._report_sink = reports.ReportSink(temp_dir)
+            self.NDExTCGALoader._nested_nodes_file_path = \
+                self.NDExTCGALoader._report_sink.get_path(reports.NESTED_NODES)
+            node_df = pd.DataFrame({'NODE': ['A', 'B', 'C', 'G'],
+                                    'NODE_ID': ['a', 'b', 'c', 'g'],
+                                    'NODE_TYPE': ['FAMILY', 'FAMILY', 'COMPLEX', 'GENE'],
+                                    'PARENT_ID': ['-1', 'a', 'b', 'c']})
+
+            nested_nodes_map = self.NDExTCGALoader._report_nested_nodes(node_df, 'net')
+            self.assertEqual({'b': 'a', 'c': 'b'}, nested_nodes_map)
+            self.NDExTCGALoader._report_sink.write()
+            with open(self.NDExTCGALoader._nested_nodes_file_path, 'r') as f:
+                self.assertEqual('nested_node_name\tnested_node_type\tparent_node_name\t'
+                                 'parent_node_type\tnetwork\n\n'
+                                 'B\tFAMILY\tA\tFAMILY\tnet\n'
+                                 'C\tCOMPLEX\tB\tFAMILY\tnet\n', f.read())
+
+            normalized = self.NDExTCGALoader._normalize_nodes(node_df, nested_nodes_map)
+            self.assertEqual(['a', 'g'], normalized['NODE_ID'].tolist())
+            self.assertEqual(['-1', 'a'], normalized['PARENT_ID'].tolist())
+            self.assertEqual({}, self.NDExTCGALoader._report_nested_nodes(normalized, 'net'))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_queue_upload_skips_unchanged_uploads(self):
+        """Tests networks whose content did not change are not uploaded again"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_file = 'ACC-2016-WNT-signaling-pathway.txt'
+            shutil.copy(os.path.join(self._sample_networks_in_tests_dir, network_file), temp_dir)
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+
+            with StandInNDExServer() as server:
+                for run in range(3):
+                    loader = NDExNdextcgaloaderLoader(self._the_args)
+                    loader.parse_load_plan()
+                    loader.prepare_report_directory()
+                    loader._load_style_template()
+                    loader._upload_state = uploadstate.UploadState(temp_dir)
+                    loader._upload_state.load()
+                    loader._uploader = uploader.NetworkUploader(server.get_client())
+                    loader._name_resolver = resolver.NetworkNameResolver(server.get_client(), 'bob')
+                    if run == 2:
+                        loader._force_upload = True
+                    for converted in loader._convert_files([network_file]):
+                        loader._queue_upload(*converted)
+                    self.assertEqual(0, loader._wait_for_uploads())
+                    self.assertEqual(1 if run == 1 else 0, len(loader._skipped_uploads))
+                    entry = loader._upload_state.get_entry('ACC-2016-WNT-signaling-pathway')
+
+            self.assertEqual(['POST', 'PUT'], [r[0] for r in server.requests])
+            self.assertEqual('/v2/network/' + entry[uploadstate.NETWORK_ID], server.requests[1][1])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_worker_processes_are_not_forked(self):
+        """Tests workers do not inherit locks held by download and upload threads"""
+        self.assertIn(ndexloadtcga._get_worker_context().get_start_method(),
+                      ndexloadtcga.WORKER_START_METHODS)
+
+    def test_convert_files_in_worker_processes(self):
+        """Tests converting in worker processes gives the same files and reports"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_files = ['BRCA-2012-Cell-cycle-signaling-pathway.txt',
+                             'ACC-2016-WNT-signaling-pathway.txt',
+                             'GBM-2013-TP53-pathway.txt',
+                             'HNSC-2015-Notch-signaling-pathway.txt']
+            for network_file in network_files:
+                shutil.copy(os.path.join(self._sample_networks_in_tests_dir, network_file), temp_dir)
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+
+            outputs = []
+            for workers in (1, 2):
+                self._the_args['workers'] = workers
+                loader = NDExNdextcgaloaderLoader(self._the_args)
+                loader.parse_load_plan()
+                loader.prepare_report_directory()
+                loader._load_style_template()
+                converted = list(loader._convert_files(network_files))
+                loader._report_sink.write()
+
+                files = {}
+                for network_name, path, network_hash in converted:
+                    with open(path, 'r') as f:
+                        files[path] = f.read()
+                for path in (loader._invalid_protein_names_file_path,
+                             loader._nested_nodes_file_path):
+                    if os.path.isfile(path):
+                        with open(path, 'r') as f:
+                            files[path] = f.read()
+                outputs.append((converted, files))
+
+            self.assertEqual([network_file.replace('.txt', '') for network_file in network_files],
+                             [c[0] for c in outputs[1][0]])
+            self.assertIn(loader._nested_nodes_file_path, outputs[1][1])
+            self.assertEqual(outputs[0], outputs[1])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_run_pipeline(self):
+        """Tests networks are fetched, converted and uploaded in overlapping stages"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_files = ['ACC-2016-WNT-signaling-pathway.txt', 'does-not-exist.txt',
+                             'HIPPO.txt', 'GBM-2013-TP53-pathway.txt']
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+
+            with StandInNDExServer() as server:
+                loader = NDExNdextcgaloaderLoader(self._the_args)
+                loader.parse_load_plan()
+                loader.prepare_report_directory()
+                loader._load_style_template()
+                loader._name_resolver = resolver.NetworkNameResolver(server.get_client(), 'bob')
+                loader._upload_state = uploadstate.UploadState(temp_dir)
+                loader._uploader = uploader.NetworkUploader(server.get_client(), workers=1,
+                                                            max_pending=2)
+                mirror = sources.FileMirrorInputSource('file://' +
+                                                       self._sample_networks_in_tests_dir)
+                loader_pipeline = loader._run_pipeline(mirror, network_files)
+                self.assertEqual(0, loader._wait_for_uploads())
+
+            self.assertEqual(['does-not-exist.txt'], loader._failed_networks)
+            self.assertEqual(['ACC-2016-WNT-signaling-pathway', 'HIPPO', 'GBM-2013-TP53-pathway'],
+                             [r[2] for r in server.requests])
+            for stage in (ndexloadtcga.DOWNLOAD_STAGE, ndexloadtcga.CONVERT_STAGE,
+                          ndexloadtcga.UPLOAD_STAGE):
+                self.assertEqual(3, loader_pipeline.get_stats(stage).get_items())
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_metrics_cover_every_stage(self):
+        """Tests metrics are recorded for every stage, also from worker processes"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_files = ['BRCA-2012-Cell-cycle-signaling-pathway.txt', 'HIPPO.txt']
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+            self._the_args['workers'] = 2
+
+            with StandInNDExServer(fail_names=['HIPPO']) as server:
+                loader = NDExNdextcgaloaderLoader(self._the_args)
+                loader.parse_load_plan()
+                loader.prepare_report_directory()
+                loader._load_style_template()
+                loader._name_resolver = resolver.NetworkNameResolver(server.get_client(), 'bob')
+                loader._upload_state = uploadstate.UploadState(temp_dir)
+                loader._uploader = uploader.NetworkUploader(server.get_client(), workers=1)
+                mirror = sources.FileMirrorInputSource('file://' +
+                                                       self._sample_networks_in_tests_dir)
+                loader._fetch_data_files(mirror, network_files, temp_dir)
+                for converted in loader._convert_files(network_files):
+                    loader._queue_upload(*converted)
+                self.assertEqual(1, loader._wait_for_uploads())
+
+            records = dict(((r[metrics.NETWORK], r[metrics.STAGE]), r)
+                           for r in loader._metrics.get_records())
+            for network_file in network_files:
+                network_name = network_file.replace('.txt', '')
+                for stage in metrics.STAGES:
+                    self.assertGreater(records[(network_name, stage)][metrics.WALL_TIME], 0)
+                for stage in metrics.CONVERSION_STAGES:
+                    self.assertGreaterEqual(records[(network_name, stage)][metrics.CPU_TIME], 0)
+                self.assertEqual(os.path.getsize(os.path.join(temp_dir, network_file)),
+                                 records[(network_name, metrics.DOWNLOAD_STAGE)]
+                                 [metrics.BYTES_DOWNLOADED])
+                self.assertEqual(os.path.getsize(os.path.join(temp_dir, network_name + '.cx')) +
+                                 os.path.getsize(os.path.join(temp_dir, network_name + '.tsv')),
+                                 records[(network_name, metrics.SERIALIZATION_STAGE)]
+                                 [metrics.BYTES_WRITTEN])
+                network = ndex2.create_nice_cx_from_file(os.path.join(temp_dir, network_name + '.cx'))
+                self.assertEqual(metrics.get_network_counts(network),
+                                 dict((key, records[(network_name, metrics.CX_BUILD_STAGE)][key])
+                                      for key in (metrics.NODES, metrics.EDGES, metrics.MEMBERS)))
+            self.assertGreater(records[('BRCA-2012-Cell-cycle-signaling-pathway',
+                                        metrics.CX_BUILD_STAGE)][metrics.MEMBERS], 0)
+            self.assertFalse(records[('BRCA-2012-Cell-cycle-signaling-pathway',
+                                      metrics.UPLOAD_STAGE)][metrics.FAILED])
+            self.assertTrue(records[('HIPPO', metrics.UPLOAD_STAGE)][metrics.FAILED])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_conversion_only_collects_rows_and_metrics_of_its_thread(self):
+        """Tests rows and metrics added by other threads during a conversion are not collected"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+            loader = NDExNdextcgaloaderLoader(self._the_args)
+            loader.parse_load_plan()
+            loader.prepare_report_directory()
+            loader._load_style_template()
+            mirror = sources.FileMirrorInputSource('file://' + self._sample_networks_in_tests_dir)
+            network_file = 'BRCA-2012-Cell-cycle-signaling-pathway.txt'
+            network_name = network_file.replace('.txt', '')
+            loader._fetch_data_files(mirror, [network_file], temp_dir)
+
+            generate_network = loader._generate_network
+
+            def add_from_other_thread():
+                loader._record_fetch_metrics(mirror, network_file)
+                loader._add_report_rows(reports.INVALID_PROTEIN_NAMES, 'other', [('FOO',)])
+                loader._record_conversion_metrics([metrics.get_record('other', metrics.PARSE_STAGE)])
+
+            def generate_network_alongside_other_thread(file_name):
+                thread = threading.Thread(target=add_from_other_thread)
+                thread.start()
+                thread.join()
+                return generate_network(file_name)
+
+            loader._generate_network = generate_network_alongside_other_thread
+            converted, collected_reports, collected_metrics = \
+                loader._convert_file_with_reports(network_file)
+
+            self.assertEqual(network_name, converted[0])
+            self.assertIn(reports.NESTED_NODES, [r[0] for r in collected_reports])
+            self.assertEqual([network_name], list(set(r[1] for r in collected_reports)))
+            self.assertEqual([network_name],
+                             list(set(r[metrics.NETWORK] for r in collected_metrics)))
+            self.assertEqual([('FOO', 'other')],
+                             loader._report_sink.get_rows(reports.INVALID_PROTEIN_NAMES))
+            self.assertEqual([(network_name, metrics.DOWNLOAD_STAGE),
+                              (network_name, metrics.DOWNLOAD_STAGE),
+                              ('other', metrics.PARSE_STAGE)],
+                             [(r[metrics.NETWORK], r[metrics.STAGE])
+                              for r in loader._metrics.get_records()])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_convert_files_skips_unchanged_builds(self):
+        """Tests files are only converted again when their fingerprint changes"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_files = ['BRCA-2012-Cell-cycle-signaling-pathway.txt', 'HIPPO.txt']
+            for network_file in network_files:
+                shutil.copy(os.path.join(self._sample_networks_in_tests_dir, network_file), temp_dir)
+            self._the_args['datadir'] = temp_dir
+            self._the_args['style'] = ndexloadtcga.get_style()
+            self._the_args['tcgaversion'] = '1.0'
+
+            outputs = []
+            for run in range(4):
+                if run == 2:
+                    self._the_args['tcgaversion'] = '1.1'
+                self._the_args['force'] = run == 3
+                loader = NDExNdextcgaloaderLoader(self._the_args)
+                loader.parse_load_plan()
+                loader.prepare_report_directory()
+                loader._load_style_template()
+                loader._build_state = buildstate.BuildState(temp_dir)
+                loader._build_state.load()
+                converted = list(loader._convert_files(network_files))
+                loader._report_sink.write()
+                with open(loader._nested_nodes_file_path, 'r') as f:
+                    outputs.append((converted, f.read()))
+                self.assertEqual([[], network_files, [], []][run], loader._skipped_builds)
+
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(outputs[0][1], outputs[3][1])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_convert_files_shares_cache(self):
+        """Tests data directories sharing --cachedir convert each network once"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            network_files = ['BRCA-2012-Cell-cycle-signaling-pathway.txt', 'HIPPO.txt']
+            self._the_args['style'] = ndexloadtcga.get_style()
+            self._the_args['cachedir'] = os.path.join(temp_dir, 'cache')
+
+            outputs = []
+            for datadir in ('prod', 'dev'):
+                datadir = os.path.join(temp_dir, datadir)
+                os.makedirs(datadir)
+                for network_file in network_files:
+                    shutil.copy(os.path.join(self._sample_networks_in_tests_dir, network_file),
+                                datadir)
+                self._the_args['datadir'] = datadir
+                loader = NDExNdextcgaloaderLoader(self._the_args)
+                loader.parse_load_plan()
+                loader.prepare_report_directory()
+                loader._load_style_template()
+                loader._cache = cache.ConversionCache(self._the_args['cachedir'])
+                converted = list(loader._convert_files(network_files))
+                loader._report_sink.write()
+
+                files = []
+                for network_name, path, network_hash in converted:
+                    self.assertEqual(datadir, os.path.dirname(path))
+                    with open(path, 'r') as f:
+                        files.append(f.read())
+                    with open(os.path.join(datadir, network_name + '.tsv'), 'r') as f:
+                        files.append(f.read())
+                with open(loader._nested_nodes_file_path, 'r') as f:
+                    files.append(f.read())
+                outputs.append(([c[2] for c in converted], files))
+
+            self.assertEqual(network_files, loader._cached_builds)
+            self.assertEqual(outputs[0], outputs[1])
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_table_engine_matches_pandas_engine(self):
+        """Tests both engines produce identical TSV and CX for all sample networks"""
+        with open(self._networklistfile, 'r') as networks:
+            list_of_network_files = networks.read().splitlines()
+
+        self.NDExTCGALoader.parse_load_plan()
+        self.NDExTCGALoader.prepare_report_directory()
+
+        for network_file in list_of_network_files:
+            df, network_description, id_to_gene_dict = self.NDExTCGALoader.get_pandas_dataframe(network_file)
+            pandas_tsv = df.to_csv(sep='\t')
+            network = self.NDExTCGALoader.generate_nice_cx_from_panda_df(df, network_file,
+                                                                         network_description, id_to_gene_dict)
+            pandas_cx = json.dumps(network.to_cx(), indent=4)
+
+            table, network_description, id_to_gene_dict = self.NDExTCGALoader.get_network_table(network_file)
+            network = self.NDExTCGALoader.generate_nice_cx_from_network_table(table, network_file,
+                                                                              network_description,
+                                                                              id_to_gene_dict)
+            self.assertEqual(pandas_tsv, table.to_tsv(), 'TSV differs for ' + network_file)
+            self.assertEqual(pandas_cx, json.dumps(network.to_cx(), indent=4),
+                             'CX differs for ' + network_file)
+
     def test_main(self):
         """Tests main function"""
 
         # try where loading config is successful
+        temp_dir = tempfile.mkdtemp()
         try:
             #temp_dir = tempfile.mkdtemp()
             #confile = os.path.join(temp_dir, 'some.conf')
@@ -174,6 +685,12 @@ format=%(asctime)s %(name)-12s %(levelname)-8s %(message)s""")
 
             count = 1
 
+            # convert in a copy of the sample networks, leaving tests/ untouched
+            for network_file in list_of_network_files:
+                shutil.copy(os.path.join(self._sample_networks_in_tests_dir, network_file), temp_dir)
+            self._the_args['datadir'] = temp_dir
+            self.NDExTCGALoader = NDExNdextcgaloaderLoader(self._the_args)
+
             self.NDExTCGALoader.parse_load_plan()
             self.NDExTCGALoader.prepare_report_directory()
 
@@ -197,10 +714,5 @@ format=%(asctime)s %(name)-12s %(levelname)-8s %(message)s""")
 
 
         finally:
+            shutil.rmtree(temp_dir)
             print('done')
-
-
-
-
-        #finally:
-        #    shutil.rmtree(temp_dir)
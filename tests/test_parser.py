@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.parser` module."""
+
+import io
+import os
+
+import unittest
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import parser
+from ndextcgaloader.parser import PathwayMapperParser
+
+
+SIMPLE_NETWORK = """simple-pathway
+First line of description
+
+Second line of description
+--NODE_NAME\tNODE_ID\tNODE_TYPE\tPARENT_ID\tPOSX\tPOSY--
+CTNNB1\taS-MtgKvdBTI\tGENE\t-1\t396\t371\t
+WNT\tg2oPjTN1c_MF\tFAMILY\t-1\t396\t183\t
+WNT1\tbaXk0bS_Kp3B\tGENE\tg2oPjTN1c_MF\t380\t180\t
+
+--EDGE_ID\tSOURCE\tTARGET\tEDGE_TYPE
+xhr-qCdhdMnS\tg2oPjTN1c_MF\taS-MtgKvdBTI\tINHIBITS
+"""
+
+
+class TestPathwayMapperParser(unittest.TestCase):
+    """Tests for `PathwayMapperParser` class."""
+
+    def test_iter_records(self):
+        records = list(PathwayMapperParser().iter_records(io.StringIO(SIMPLE_NETWORK)))
+        self.assertEqual([parser.NAME, parser.DESCRIPTION, parser.DESCRIPTION,
+                          parser.NODE_HEADER, parser.NODE, parser.NODE, parser.NODE,
+                          parser.EDGE_HEADER, parser.EDGE],
+                         [r[0] for r in records])
+        self.assertEqual('simple-pathway', records[0][1])
+        self.assertEqual(['NODE_NAME', 'NODE_ID', 'NODE_TYPE', 'PARENT_ID', 'POSX', 'POSY'],
+                         records[3][1])
+        self.assertEqual(('WNT', 'g2oPjTN1c_MF', 'FAMILY', '-1', '396', '183'), records[5][1])
+        self.assertEqual(['EDGE_ID', 'SOURCE', 'TARGET', 'EDGE_TYPE'], records[7][1])
+
+    def test_iter_records_is_lazy(self):
+        records = PathwayMapperParser().iter_records(io.StringIO(SIMPLE_NETWORK))
+        self.assertEqual((parser.NAME, 'simple-pathway'), next(records))
+
+    def test_parse(self):
+        res = PathwayMapperParser().parse(io.StringIO(SIMPLE_NETWORK))
+        self.assertEqual('simple-pathway', res.name)
+        self.assertEqual('First line of description\nSecond line of description\n',
+                         res.description)
+        self.assertEqual(3, res.get_node_count())
+        self.assertEqual(1, res.get_edge_count())
+        self.assertEqual(['aS-MtgKvdBTI', 'g2oPjTN1c_MF', 'baXk0bS_Kp3B'],
+                         res.get_node_column('NODE_ID'))
+        self.assertEqual(['g2oPjTN1c_MF'], res.get_edge_column('SOURCE'))
+        self.assertEqual(['EDGE_ID', 'SOURCE', 'TARGET', 'EDGE_TYPE'],
+                         list(res.get_edge_table().keys()))
+        self.assertEqual(('CTNNB1', 'aS-MtgKvdBTI', 'GENE', '-1', '396', '371'),
+                         next(iter(res.iter_nodes())))
+        self.assertEqual([('xhr-qCdhdMnS', 'g2oPjTN1c_MF', 'aS-MtgKvdBTI', 'INHIBITS')],
+                         list(res.iter_edges()))
+
+    def test_parse_without_edges_or_description(self):
+        res = PathwayMapperParser().parse(io.StringIO('foo\n--NODE_NAME\tNODE_ID--\nA\t1\n'))
+        self.assertEqual('', res.description)
+        self.assertEqual(1, res.get_node_count())
+        self.assertEqual(0, res.get_edge_count())
+        self.assertEqual([], res.edge_fields)
+
+    def test_parse_short_and_long_rows(self):
+        res = PathwayMapperParser().parse(io.StringIO('foo\n--NODE_NAME\tNODE_ID\tNODE_TYPE--\nA\t1\n'))
+        self.assertEqual([None], res.get_node_column('NODE_TYPE'))
+
+        try:
+            PathwayMapperParser().parse(io.StringIO('foo\n--NODE_NAME\tNODE_ID--\nA\t1\tGENE\n'))
+            self.fail('Expected ValueError')
+        except ValueError as ve:
+            self.assertTrue('has 3 fields' in str(ve))
+
+    def test_parse_file(self):
+        path = os.path.join(ndexloadtcga.get_testsdir(), 'sample_networks', 'Cell-Cycle.txt')
+        res = PathwayMapperParser().parse_file(path)
+        self.assertEqual('Cell Cycle', res.name)
+        self.assertTrue(res.description.startswith('Regulation of mitotic cell cycle'))
+        self.assertEqual(['EDGE_ID', 'SOURCE', 'TARGET', 'EDGE_TYPEINTERACTION_PUBMED_ID'],
+                         res.edge_fields)
+        with open(path, 'r') as f:
+            lines = f.read().splitlines()
+        node_header = [i for i, l in enumerate(lines) if l.startswith('--NODE_NAME')][0]
+        edge_header = [i for i, l in enumerate(lines) if l.startswith('--EDGE_ID')][0]
+        self.assertEqual(edge_header - node_header - 2, res.get_node_count())
+        self.assertEqual(len(lines) - edge_header - 1, res.get_edge_count())
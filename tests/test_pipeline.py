@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.pipeline` module."""
+
+import time
+
+import unittest
+from ndextcgaloader.pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests for `Pipeline` class."""
+
+    def test_stages_keep_order(self):
+        loader_pipeline = Pipeline(queue_size=2)
+        numbers = loader_pipeline.add_stage('numbers', iter(range(20)))
+        squares = loader_pipeline.add_stage('squares', (n * n for n in numbers))
+        self.assertEqual([n * n for n in range(20)], list(squares))
+
+        self.assertEqual(20, loader_pipeline.get_stats('numbers').get_items())
+        self.assertEqual(20, loader_pipeline.get_stats('squares').get_items())
+        self.assertTrue(loader_pipeline.get_stats('numbers').get_max_queue_depth() <= 2)
+        lines = loader_pipeline.format_stats()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[1].startswith('numbers'))
+
+    def test_queue_is_bounded(self):
+        produced = []
+
+        def _produce():
+            for n in range(10):
+                produced.append(n)
+                yield n
+
+        loader_pipeline = Pipeline(queue_size=3)
+        numbers = loader_pipeline.add_stage('numbers', _produce())
+        self.assertEqual(0, next(numbers))
+
+        # producer stops once the queue is full, until items are taken
+        time.sleep(0.2)
+        self.assertTrue(len(produced) <= 5)
+        self.assertEqual(list(range(1, 10)), list(numbers))
+
+    def test_error_is_raised_downstream(self):
+        def _produce():
+            yield 1
+            raise ValueError('bad input')
+
+        loader_pipeline = Pipeline()
+        numbers = loader_pipeline.add_stage('numbers', _produce())
+        self.assertEqual(1, next(numbers))
+        self.assertRaises(ValueError, next, numbers)
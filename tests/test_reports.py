@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `reports` module."""
+
+import os
+import shutil
+import tempfile
+import threading
+import importlib.util
+import unittest
+
+from ndextcgaloader import reports
+from ndextcgaloader.reports import ReportSink
+
+
+class TestReports(unittest.TestCase):
+    """Tests for `reports` module."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_unsupported_format(self):
+        """Tests unknown report formats are rejected"""
+        with self.assertRaises(ValueError):
+            ReportSink(self._temp_dir, report_format='csv')
+
+    @unittest.skipIf(any(importlib.util.find_spec(engine) is not None
+                         for engine in reports.PARQUET_ENGINES),
+                     'parquet engine installed')
+    def test_parquet_without_engine(self):
+        """Tests parquet reports need a parquet engine"""
+        with self.assertRaises(ImportError):
+            ReportSink(self._temp_dir, report_format=reports.PARQUET_FORMAT)
+
+    def test_rows_sorted_by_network(self):
+        """Tests rows are grouped by network no matter the order they were added in"""
+        sink = ReportSink(self._temp_dir)
+        sink.add_rows(reports.INVALID_PROTEIN_NAMES, 'net2', [('X',), ('A',)])
+        sink.add_rows(reports.INVALID_PROTEIN_NAMES, 'net1', [('Y',)])
+        sink.add_rows(reports.INVALID_PROTEIN_NAMES, 'net3', [])
+        self.assertEqual([('Y', 'net1'), ('X', 'net2'), ('A', 'net2')],
+                         sink.get_rows(reports.INVALID_PROTEIN_NAMES))
+        self.assertEqual([], sink.get_rows(reports.NESTED_NODES))
+
+    def test_write_tsv(self):
+        """Tests TSV reports keep the layout of the files appended to per network"""
+        sink = ReportSink(os.path.join(self._temp_dir, 'reports'))
+        sink.add_rows(reports.INVALID_PROTEIN_NAMES, 'net2', [('X',)])
+        sink.add_rows(reports.INVALID_PROTEIN_NAMES, 'net1', [('Y',), ('Z',)])
+        sink.add_rows(reports.NESTED_NODES, 'net2', [('B', 'FAMILY', 'A', 'FAMILY')])
+        sink.add_rows(reports.NESTED_NODES, 'net1', [('C', 'COMPLEX', 'B', 'FAMILY')])
+
+        paths = sink.write()
+        self.assertEqual([sink.get_path(reports.INVALID_PROTEIN_NAMES),
+                          sink.get_path(reports.NESTED_NODES)], paths)
+        with open(paths[0], 'r') as f:
+            self.assertEqual('Y\tnet1\nZ\tnet1\n\nX\tnet2\n\n', f.read())
+        with open(paths[1], 'r') as f:
+            self.assertEqual('nested_node_name\tnested_node_type\tparent_node_name\t'
+                             'parent_node_type\tnetwork\n\n'
+                             'C\tCOMPLEX\tB\tFAMILY\tnet1\n\n'
+                             'B\tFAMILY\tA\tFAMILY\tnet2\n', f.read())
+
+    def test_write_without_rows(self):
+        """Tests reports without rows are not written"""
+        sink = ReportSink(self._temp_dir)
+        sink.add_rows(reports.NESTED_NODES, 'net', [('B', 'FAMILY', 'A', 'FAMILY')])
+        self.assertEqual([sink.get_path(reports.NESTED_NODES)], sink.write())
+        self.assertFalse(os.path.exists(sink.get_path(reports.INVALID_PROTEIN_NAMES)))
+
+    def test_remove_previous(self):
+        """Tests reports of a previous run are removed in every format"""
+        for name in ('nested_nodes.tsv', 'invalid_protein_names.parquet', 'other.tsv'):
+            open(os.path.join(self._temp_dir, name), 'w').close()
+        ReportSink(self._temp_dir).remove_previous()
+        self.assertEqual(['other.tsv'], os.listdir(self._temp_dir))
+
+    def test_add_rows_from_threads(self):
+        """Tests rows added from several threads at once are all kept"""
+        sink = ReportSink(self._temp_dir)
+
+        def add(network_name):
+            for i in range(100):
+                sink.add_rows(reports.INVALID_PROTEIN_NAMES, network_name, [(str(i),)])
+
+        threads = [threading.Thread(target=add, args=('net' + str(t),)) for t in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        rows = sink.get_rows(reports.INVALID_PROTEIN_NAMES)
+        self.assertEqual(400, len(rows))
+        for t in range(4):
+            self.assertEqual([(str(i), 'net' + str(t)) for i in range(100)],
+                             rows[t * 100:(t + 1) * 100])
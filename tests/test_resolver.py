@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.resolver` module."""
+
+import os
+import tempfile
+import shutil
+
+import unittest
+from ndextcgaloader.resolver import NetworkNameResolver
+
+from tests.test_uploader import StandInNDExServer
+
+
+class TestNetworkNameResolver(unittest.TestCase):
+    """Tests for `NetworkNameResolver` class."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cachefile = os.path.join(self._temp_dir, 'names.json')
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _add_networks(self, server):
+        names = ['GBM-2008-TP53-pathway-old', 'GBM-2008-TP53-pathway', 'HIPPO',
+                 'gbm-2008-tp53-pathway', 'GBM-2008-TP53-pathway (copy)']
+        for i, name in enumerate(names):
+            server.networks['uuid-' + str(i)] = name
+
+    def test_resolve_searches_page_by_page(self):
+        with StandInNDExServer() as server:
+            self._add_networks(server)
+            name_resolver = NetworkNameResolver(server.get_client(), 'bob', page_size=2)
+
+            # most recently modified of the exact, case insensitive, matches wins
+            self.assertEqual('uuid-3', name_resolver.resolve('GBM-2008-TP53-pathway'))
+            self.assertEqual([('search', 0), ('search', 1)], server.lookups)
+
+            self.assertEqual(None, name_resolver.resolve('TP53'))
+            self.assertEqual('uuid-3', name_resolver.resolve('gbm-2008-TP53-PATHWAY'))
+            self.assertEqual(4, len(server.lookups))
+
+            # names with no network are searched for again
+            self.assertEqual(None, name_resolver.resolve('TP53'))
+            self.assertEqual(6, len(server.lookups))
+
+    def test_cache_on_disk(self):
+        with StandInNDExServer() as server:
+            self._add_networks(server)
+            name_resolver = NetworkNameResolver(server.get_client(), 'bob',
+                                                cachefile=self._cachefile, server='a')
+            name_resolver.load()
+            self.assertEqual('uuid-2', name_resolver.resolve('HIPPO'))
+            self.assertEqual(None, name_resolver.resolve('Cell-Cycle'))
+            name_resolver.record('Cell-Cycle', 'uuid-9')
+            self.assertEqual(None, name_resolver.resolve('Mismatch-Repair'))
+            name_resolver.save()
+            with open(self._cachefile, 'r') as f:
+                self.assertNotIn('MISMATCH-REPAIR', f.read())
+
+            name_resolver = NetworkNameResolver(server.get_client(), 'bob',
+                                                cachefile=self._cachefile, server='a')
+            name_resolver.load()
+            self.assertEqual('uuid-2', name_resolver.resolve('HIPPO'))
+            self.assertEqual('uuid-9', name_resolver.resolve('Cell-Cycle'))
+            self.assertEqual(3, len(server.lookups))
+
+            # invalidated names are looked up again
+            name_resolver.invalidate('HIPPO')
+            self.assertEqual('uuid-2', name_resolver.resolve('HIPPO'))
+            self.assertEqual(4, len(server.lookups))
+
+            # as are those of another server or past their TTL
+            other_server = NetworkNameResolver(server.get_client(), 'bob',
+                                               cachefile=self._cachefile, server='b')
+            other_server.load()
+            self.assertEqual('uuid-2', other_server.resolve('HIPPO'))
+            expired = NetworkNameResolver(server.get_client(), 'bob', ttl=-1,
+                                          cachefile=self._cachefile, server='a')
+            expired.load()
+            self.assertEqual(None, expired.resolve('Cell-Cycle'))
+            self.assertEqual(6, len(server.lookups))
+
+    def test_lists_all_networks_if_search_fails(self):
+        with StandInNDExServer() as server:
+            self._add_networks(server)
+            server.search_enabled = False
+            name_resolver = NetworkNameResolver(server.get_client(), 'bob', page_size=2)
+            self.assertEqual('uuid-3', name_resolver.resolve('GBM-2008-TP53-pathway'))
+            self.assertEqual('uuid-2', name_resolver.resolve('HIPPO'))
+            self.assertEqual(None, name_resolver.resolve('TP53'))
+            self.assertEqual([('list', 0), ('list', 2), ('list', 4)], server.lookups)
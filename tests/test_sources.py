@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.sources` module."""
+
+import os
+import tempfile
+import shutil
+
+import unittest
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import sources
+from ndextcgaloader.sources import FileMirrorInputSource
+from ndextcgaloader.sources import HttpInputSource
+from ndextcgaloader.sources import LocalDirectoryInputSource
+
+
+class TestSources(unittest.TestCase):
+    """Tests for input sources."""
+
+    def setUp(self):
+        """Set up test fixtures, if any."""
+        self._temp_dir = tempfile.mkdtemp()
+        self._sample_networks_dir = os.path.join(ndexloadtcga.get_testsdir(), 'sample_networks')
+        self._networks = ['ACC-2016-WNT-signaling-pathway.txt', 'HIPPO.txt']
+
+    def tearDown(self):
+        """Tear down test fixtures, if any."""
+        shutil.rmtree(self._temp_dir)
+
+    def test_get_input_source(self):
+        self.assertTrue(isinstance(sources.get_input_source(ndexloadtcga.DEFAULT_URL),
+                                   HttpInputSource))
+        self.assertTrue(isinstance(sources.get_input_source(ndexloadtcga.DEFAULT_URL, offline=True),
+                                   LocalDirectoryInputSource))
+        res = sources.get_input_source('file:///tmp/mirror')
+        self.assertTrue(isinstance(res, FileMirrorInputSource))
+        self.assertEqual('/tmp/mirror', res.get_mirror_directory())
+
+    def test_local_directory_source(self):
+        res = LocalDirectoryInputSource().fetch(self._networks + ['does-not-exist.txt'],
+                                                self._sample_networks_dir)
+        self.assertEqual(['does-not-exist.txt'], res)
+
+    def test_file_mirror_source(self):
+        mirror = FileMirrorInputSource('file://' + self._sample_networks_dir)
+        outdir = os.path.join(self._temp_dir, 'data')
+        res = mirror.fetch(self._networks + ['does-not-exist.txt'], outdir)
+        self.assertEqual(['does-not-exist.txt'], res)
+
+        for network in self._networks:
+            with open(os.path.join(self._sample_networks_dir, network), 'r') as f:
+                expected = f.read()
+            with open(os.path.join(outdir, network), 'r') as f:
+                self.assertEqual(expected, f.read())
+
+        # files that are already identical are not rewritten
+        copied = os.path.join(outdir, 'HIPPO.txt')
+        os.utime(copied, (0, 0))
+        self.assertEqual([], mirror.fetch(self._networks, outdir))
+        self.assertEqual(0, os.path.getmtime(copied))
+
+        # while files that differ are
+        with open(copied, 'a') as f:
+            f.write('edited locally\n')
+        self.assertEqual([], mirror.fetch(self._networks, outdir))
+        self.assertNotEqual(0, os.path.getmtime(copied))
+
+    def test_file_mirror_source_strips_byte_order_mark(self):
+        mirror_dir = os.path.join(self._temp_dir, 'mirror')
+        os.makedirs(mirror_dir)
+        with open(os.path.join(mirror_dir, 'foo.txt'), 'wb') as f:
+            f.write(b'\xef\xbb\xbffoo\n')
+        outdir = os.path.join(self._temp_dir, 'data')
+        self.assertEqual([], FileMirrorInputSource('file://' + mirror_dir).fetch(['foo.txt'], outdir))
+        with open(os.path.join(outdir, 'foo.txt'), 'rb') as f:
+            self.assertEqual(b'foo\n', f.read())
+
+    def test_file_mirror_source_same_directory(self):
+        mirror = FileMirrorInputSource('file://' + self._sample_networks_dir)
+        self.assertEqual([], mirror.fetch(self._networks, self._sample_networks_dir))
+
+    def test_iter_fetch_reports_files_in_order(self):
+        mirror = FileMirrorInputSource('file://' + self._sample_networks_dir)
+        outdir = os.path.join(self._temp_dir, 'data')
+        res = list(mirror.iter_fetch(['does-not-exist.txt'] + self._networks, outdir))
+        self.assertEqual([('does-not-exist.txt', False),
+                          (self._networks[0], True),
+                          (self._networks[1], True)], res)
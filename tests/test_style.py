@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.style` module."""
+
+import os
+import pickle
+import json
+import shutil
+import tempfile
+
+import unittest
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import style
+from ndextcgaloader.style import StyleMap
+from ndextcgaloader.style import StyleTemplate
+
+
+def _get_style_cx(background):
+    return [{'numberVerification': [{'longNumber': 281474976710655}]},
+            {'cyVisualProperties': [{'properties_of': 'network',
+                                     'properties': {'NETWORK_BACKGROUND_PAINT': background}},
+                                    {'properties_of': 'nodes', 'applies_to': 0,
+                                     'properties': {'NODE_X_LOCATION': '1.0'}}]},
+            {'cyVisualProperties': [{'properties_of': 'nodes:default',
+                                     'properties': {'NODE_SHAPE': 'ELLIPSE'}}]}]
+
+
+class TestStyle(unittest.TestCase):
+    """Tests for `ndextcgaloader.style` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _write_style(self, file_name, background):
+        path = os.path.join(self._temp_dir, file_name)
+        with open(path, 'w') as f:
+            json.dump(_get_style_cx(background), f)
+        return path
+
+    def test_get_visual_properties(self):
+        elements = style.get_visual_properties(_get_style_cx('#FFFFFF'))
+        self.assertEqual(['network', 'nodes:default'], [e['properties_of'] for e in elements])
+
+        self.assertRaises(ValueError, style.get_visual_properties,
+                          [{'nodes': [{'@id': 0}]}])
+
+    def test_apply(self):
+        template = StyleTemplate.from_file(self._write_style('s.cx', '#FFFFFF'))
+        self.assertEqual(list(template.get_elements()), json.loads(template.get_blob()))
+
+        networks = [NiceCXNetwork(), NiceCXNetwork()]
+        networks[0].set_opaque_aspect(NiceCXNetwork.VISUAL_PROPERTIES, [{'properties_of': 'x'}])
+        for network in networks:
+            template.apply(network)
+            self.assertEqual([NiceCXNetwork.CY_VISUAL_PROPERTIES],
+                             list(network.get_opaque_aspect_names()))
+            self.assertEqual(2, network.metadata[NiceCXNetwork.CY_VISUAL_PROPERTIES]['elementCount'])
+        self.assertIs(networks[0].get_opaque_aspect(NiceCXNetwork.CY_VISUAL_PROPERTIES),
+                      networks[1].get_opaque_aspect(NiceCXNetwork.CY_VISUAL_PROPERTIES))
+
+    def test_apply_matches_apply_style_from_network(self):
+        template_network = NiceCXNetwork()
+        template_network.set_opaque_aspect(NiceCXNetwork.CY_VISUAL_PROPERTIES,
+                                           _get_style_cx('#FFFFFF')[1]['cyVisualProperties'])
+        expected = NiceCXNetwork()
+        expected.create_node('a')
+        expected.apply_style_from_network(template_network)
+
+        network = NiceCXNetwork()
+        network.create_node('a')
+        StyleTemplate(style.get_visual_properties(_get_style_cx('#FFFFFF')[:2])).apply(network)
+        self.assertEqual(json.dumps(expected.to_cx(log_to_stdout=False)),
+                         json.dumps(network.to_cx(log_to_stdout=False)))
+
+    def test_from_file_with_cache(self):
+        cachedir = os.path.join(self._temp_dir, 'cache')
+        path = self._write_style('s.cx', '#FFFFFF')
+        template = StyleTemplate.from_file(path, cachedir=cachedir)
+        cached = os.listdir(cachedir)
+        self.assertEqual(1, len(cached))
+        self.assertTrue(cached[0].endswith(style.STYLE_CACHE_SUFFIX))
+
+        # cached copy is used, even if it differs from what parsing would give
+        with open(os.path.join(cachedir, cached[0]), 'w') as f:
+            f.write('[{"properties_of": "network"}]')
+        self.assertEqual(({'properties_of': 'network'},),
+                         StyleTemplate.from_file(path, cachedir=cachedir).get_elements())
+
+        # a changed style file gets a cache entry of its own
+        self._write_style('s.cx', '#000000')
+        changed = StyleTemplate.from_file(path, cachedir=cachedir)
+        self.assertNotEqual(template.get_blob(), changed.get_blob())
+        self.assertEqual(2, len(os.listdir(cachedir)))
+
+    def test_style_map(self):
+        default_style = self._write_style('default.cx', '#FFFFFF')
+        dark_style = self._write_style('dark.cx', '#000000')
+        stylemap = os.path.join(self._temp_dir, 'stylemap.txt')
+        with open(stylemap, 'w') as f:
+            f.write('# network name pattern\tstyle\n\n'
+                    'GBM-*\tdark.cx\n'
+                    '*-TP53-*\t' + ndexloadtcga.STYLE_DARK + '\n')
+        style_map = StyleMap(default_style, stylemap=stylemap,
+                             packagedir=ndexloadtcga.get_package_dir())
+
+        self.assertEqual(dark_style, style_map.get_style_path('GBM-2008-TP53-pathway'))
+        self.assertEqual(os.path.join(ndexloadtcga.get_package_dir(), ndexloadtcga.STYLE_DARK),
+                         style_map.get_style_path('BRCA-2012-TP53-pathway'))
+        self.assertEqual(default_style, style_map.get_style_path('HIPPO'))
+
+        template = style_map.get_template('GBM-2008-TP53-pathway')
+        self.assertIs(template, style_map.get_template('GBM-2013-TP53-pathway'))
+        self.assertEqual('#000000', template.get_elements()[0]['properties']['NETWORK_BACKGROUND_PAINT'])
+
+        # a copy made after load_all() keeps the parsed templates
+        style_map.load_all()
+        copied_map = pickle.loads(pickle.dumps(style_map))
+        self.assertEqual(template.get_blob(),
+                         copied_map._templates[dark_style].get_blob())
+        self.assertEqual(3, len(copied_map._templates))
+
+    def test_style_map_invalid_line(self):
+        stylemap = os.path.join(self._temp_dir, 'stylemap.txt')
+        with open(stylemap, 'w') as f:
+            f.write('GBM-* dark.cx\n')
+        self.assertRaises(ValueError, StyleMap, 'default.cx', stylemap=stylemap)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.synthetic` module."""
+
+import io
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import unittest
+from ndextcgaloader import ndexloadtcga
+from ndextcgaloader import benchmark
+from ndextcgaloader import hgnc
+from ndextcgaloader import reports
+from ndextcgaloader import synthetic
+from ndextcgaloader.parser import PathwayMapperParser
+
+
+class TestSynthetic(unittest.TestCase):
+    """Tests for `ndextcgaloader.synthetic` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+        self._cwd = os.getcwd()
+        os.chdir(self._temp_dir)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._temp_dir)
+
+    def _parse(self, path):
+        return PathwayMapperParser().parse_file(path)
+
+    def test_write_synthetic_pathway(self):
+        path = os.path.join(self._temp_dir, 'Synthetic-200.txt')
+        synthetic.write_synthetic_pathway(path, 200, seed=1)
+        pathway = self._parse(path)
+        self.assertEqual('Synthetic-200', pathway.name)
+        self.assertEqual(200, pathway.get_edge_count())
+        self.assertEqual(['EDGE_ID', 'SOURCE', 'TARGET', 'EDGE_TYPE'], pathway.edge_fields)
+        self.assertEqual(100, pathway.get_node_column('PARENT_ID').count('-1'))
+        node_types = pathway.get_node_column('NODE_TYPE')
+        self.assertTrue('FAMILY' in node_types or 'COMPLEX' in node_types)
+
+        with open(path, 'r') as f:
+            first = f.read()
+        synthetic.write_synthetic_pathway(path, 200, seed=1)
+        with open(path, 'r') as f:
+            self.assertEqual(first, f.read())
+        synthetic.write_synthetic_pathway(path, 200, seed=2)
+        with open(path, 'r') as f:
+            self.assertNotEqual(first, f.read())
+
+    def test_knobs(self):
+        path = os.path.join(self._temp_dir, 'Synthetic-1000.txt')
+        synthetic.write_synthetic_pathway(path, 1000, num_nodes=300, compound_fraction=0.5,
+                                          max_members=3, nesting_depth=3,
+                                          duplicate_edge_ratio=0.25, invalid_symbol_ratio=0.1,
+                                          num_process_nodes=7)
+        pathway = self._parse(path)
+        nodes = list(zip(pathway.get_node_column('NODE_ID'), pathway.get_node_column('NODE_TYPE'),
+                         pathway.get_node_column('PARENT_ID'), pathway.node_columns[0]))
+
+        top_level = [n for n in nodes if n[2] == '-1']
+        self.assertEqual(307, len(top_level))
+        self.assertEqual(7, len([n for n in top_level if n[1] == 'PROCESS']))
+        compounds = [n for n in top_level if n[1] in synthetic.COMPOUND_NODE_TYPES]
+        self.assertTrue(100 < len(compounds) < 200)
+
+        # every top level family or complex holds two more levels
+        nested = [n for n in nodes if n[1] in synthetic.COMPOUND_NODE_TYPES and n[2] != '-1']
+        self.assertEqual(2 * len(compounds), len(nested))
+        compound_ids = set(n[0] for n in compounds)
+        self.assertEqual(set(node_id + '_c' for node_id in compound_ids),
+                         set(n[0] for n in nested if n[2] in compound_ids))
+        self.assertTrue(all(n[3] == '' for n in compounds + nested))
+
+        genes = [n for n in nodes if n[1] == 'GENE']
+        validator = hgnc.HGNCSymbolValidator()
+        invalid = [n for n in genes if not validator.is_valid(n[3])]
+        self.assertTrue(0 < len(invalid) < len(genes) / 5)
+
+        edges = list(zip(pathway.get_edge_column('SOURCE'), pathway.get_edge_column('TARGET'),
+                         pathway.get_edge_column('EDGE_TYPE')))
+        self.assertEqual(1000, len(edges))
+        self.assertTrue(150 < len(edges) - len(set(edges)) < 350)
+        process_ids = set(n[0] for n in top_level if n[1] == 'PROCESS')
+        self.assertFalse(process_ids & (set(e[0] for e in edges) | set(e[1] for e in edges)))
+
+    def test_engines_agree_on_knobs(self):
+        synthetic.write_synthetic_pathway(os.path.join(self._temp_dir, 'Synthetic-300.txt'), 300,
+                                          compound_fraction=0.3, nesting_depth=3,
+                                          duplicate_edge_ratio=0.2, invalid_symbol_ratio=0.1,
+                                          num_process_nodes=3)
+        args = argparse.Namespace(tcgaversion='1.0', networklistfile=None,
+                                  loadplan=ndexloadtcga.get_load_plan())
+        cx = []
+        for engine in ndexloadtcga.ENGINES:
+            loader = benchmark.get_loader(args, engine, self._temp_dir)
+            loader.prepare_report_directory()
+            with contextlib.redirect_stdout(io.StringIO()):
+                network = loader._generate_network('Synthetic-300.txt')
+                cx.append(json.dumps(network.to_cx()))
+            node_names = [node['n'] for node_id, node in network.get_nodes()]
+            self.assertEqual(3, len([name for name in node_names if name.startswith('Process ')]))
+            self.assertTrue(loader._report_sink.get_rows(reports.NESTED_NODES))
+            self.assertTrue(loader._report_sink.get_rows(reports.INVALID_PROTEIN_NAMES))
+        self.assertEqual(cx[0], cx[1])
+
+    def test_main(self):
+        path = os.path.join(self._temp_dir, 'pathway.txt')
+        self.assertEqual(0, synthetic.main(['synthetic.py', path, '--edges', '50',
+                                            '--nodes', '10', '--processnodes', '2',
+                                            '--seed', '3']))
+        pathway = self._parse(path)
+        self.assertEqual(50, pathway.get_edge_count())
+        self.assertEqual(12, pathway.get_node_column('PARENT_ID').count('-1'))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.uploader` module."""
+
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import unittest
+from ndex2.client import Ndex2
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader import cxwriter
+from ndextcgaloader.uploader import NetworkUploader
+
+
+class StandInNDExServer(object):
+    """
+    Local HTTP server mimicking the NDEx v2 endpoints used to create
+    (POST /v2/network), update (PUT /v2/network/<UUID>), search
+    (POST /v2/search/network) and list (GET /v2/user/<UUID>/networksummary)
+    networks
+    """
+
+    def __init__(self, delay=0.0, fail_names=()):
+        self.requests = []
+        self.networks = {}
+        self.lookups = []
+        self.search_enabled = True
+        self.max_concurrent = 0
+        self._concurrent = 0
+        self._lock = threading.Lock()
+        self._delay = delay
+        self._fail_names = fail_names
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _read_cx(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                part = body.split(b'\r\n\r\n', 1)[1].rsplit(b'\r\n--', 1)[0]
+                return json.loads(part.decode('utf-8'))
+
+            def _send_json(self, value):
+                body = json.dumps(value).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _get_summaries(self):
+                return [{'externalId': network_id, 'name': name, 'modificationTime': i}
+                        for i, (network_id, name) in enumerate(server.networks.items())]
+
+            def _search(self):
+                if not server.search_enabled:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                query = urlparse(self.path).query
+                start = int(parse_qs(query)['start'][0])
+                size = int(parse_qs(query)['size'][0])
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                phrase = body['searchString'].split('"')[1].upper()
+                server.lookups.append(('search', start))
+                found = [s for s in self._get_summaries() if phrase in s['name'].upper()]
+                self._send_json({'numFound': len(found), 'start': start,
+                                 'networks': found[start * size:(start + 1) * size]})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/v2/user':
+                    return self._send_json({'externalId': 'user-1'})
+                params = parse_qs(url.query)
+                offset = int(params['offset'][0])
+                limit = int(params['limit'][0])
+                server.lookups.append(('list', offset))
+                self._send_json(self._get_summaries()[offset:offset + limit])
+
+            def _handle(self, method):
+                if self.path.startswith('/v2/search/network'):
+                    return self._search()
+                with server._lock:
+                    server._concurrent += 1
+                    server.max_concurrent = max(server.max_concurrent, server._concurrent)
+                try:
+                    cx = self._read_cx()
+                    time.sleep(server._delay)
+                    name = [a['v'] for f in cx for a in f.get('networkAttributes', [])
+                            if a['n'] == 'name'][0]
+                    with server._lock:
+                        server.requests.append((method, self.path, name,
+                                                self.headers.get('Authorization')))
+                    if name in server._fail_names:
+                        self.send_response(500)
+                        self.end_headers()
+                    elif method == 'POST':
+                        network_id = str(uuid.uuid4())
+                        with server._lock:
+                            server.networks[network_id] = name
+                        body = ('http://127.0.0.1/v2/network/' + network_id).encode()
+                        self.send_response(201)
+                        self.send_header('Content-Type', 'text/plain')
+                        self.send_header('Content-Length', str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                    else:
+                        self.send_response(204)
+                        self.end_headers()
+                finally:
+                    with server._lock:
+                        server._concurrent -= 1
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_PUT(self):
+                self._handle('PUT')
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+
+    def get_host(self):
+        return 'http://127.0.0.1:' + str(self._httpd.server_address[1])
+
+    def get_client(self):
+        return Ndex2(host=self.get_host(), username='bob', password='smith',
+                     skip_version_check=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class TestNetworkUploader(unittest.TestCase):
+    """Tests for `ndextcgaloader.uploader` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def _write_network(self, name, gzip_output=False):
+        network = NiceCXNetwork()
+        network.set_name(name)
+        network.create_node('A')
+        path = cxwriter.get_cx_path(self._temp_dir, name, gzip_output=gzip_output)
+        return cxwriter.save_cx(network, path, gzip_output=gzip_output)
+
+    def test_upload_new_and_updated_networks(self):
+        with StandInNDExServer() as server:
+            net_uploader = NetworkUploader(server.get_client(), workers=2)
+            future = net_uploader.submit('new', self._write_network('new'))
+            net_uploader.submit('zipped', self._write_network('zipped', gzip_output=True),
+                                network_id='1234')
+            results = net_uploader.wait()
+
+        self.assertTrue(future.result().startswith('http://127.0.0.1/v2/network/'))
+        self.assertEqual(['new', 'zipped'], [r[0] for r in results])
+        self.assertEqual([None, None], [r[2] for r in results])
+        self.assertEqual([('POST', '/v2/network', 'new'),
+                          ('PUT', '/v2/network/1234', 'zipped')],
+                         sorted([r[:3] for r in server.requests]))
+        self.assertTrue(all(r[3].startswith('Basic ') for r in server.requests))
+        self.assertTrue(all(r[3] > 0 for r in results))
+
+    def test_latency_of_each_upload(self):
+        with StandInNDExServer(delay=0.05) as server:
+            net_uploader = NetworkUploader(server.get_client(), workers=1)
+            path = self._write_network('same')
+            net_uploader.submit('same', path)
+            net_uploader.submit('same', path)
+            results = net_uploader.wait()
+
+        # uploads of networks sharing a name each keep their own latency
+        self.assertEqual(['same', 'same'], [r[0] for r in results])
+        self.assertTrue(all(r[3] >= 0.05 for r in results))
+        self.assertNotEqual(results[0][3], results[1][3])
+
+    def test_uploads_are_bounded_by_workers(self):
+        names = ['net' + str(i) for i in range(8)]
+        with StandInNDExServer(delay=0.05) as server:
+            net_uploader = NetworkUploader(server.get_client(), workers=3)
+            for name in names:
+                net_uploader.submit(name, self._write_network(name))
+            results = net_uploader.wait()
+
+        self.assertEqual(names, [r[0] for r in results])
+        self.assertEqual(8, len(server.requests))
+        self.assertTrue(1 < server.max_concurrent <= 3)
+
+    def test_failed_upload(self):
+        with StandInNDExServer(fail_names=('bad',)) as server:
+            net_uploader = NetworkUploader(server.get_client())
+            for name in ('good', 'bad'):
+                net_uploader.submit(name, self._write_network(name))
+            results = net_uploader.wait()
+
+        self.assertEqual('good', results[0][0])
+        self.assertEqual(None, results[0][2])
+        self.assertEqual('bad', results[1][0])
+        self.assertTrue(results[1][2] is not None)
+
+    def test_max_pending_blocks_submit(self):
+        names = ['net' + str(i) for i in range(6)]
+        with StandInNDExServer(delay=0.05) as server:
+            net_uploader = NetworkUploader(server.get_client(), workers=1, max_pending=2)
+            for name in names:
+                net_uploader.submit(name, self._write_network(name))
+                self.assertTrue(net_uploader.get_pending_count() <= 2)
+            results = net_uploader.wait()
+
+        self.assertEqual(0, net_uploader.get_pending_count())
+        self.assertEqual(names, [r[0] for r in results])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `ndextcgaloader.uploadstate` module."""
+
+import os
+import tempfile
+import shutil
+
+import unittest
+from ndex2.nice_cx_network import NiceCXNetwork
+
+from ndextcgaloader import uploadstate
+from ndextcgaloader.cxbuilder import CARTESIANLAYOUT_ASPECT_NAME
+from ndextcgaloader.uploadstate import UploadState
+
+
+def _create_network(node_names, reverse=False):
+    network = NiceCXNetwork()
+    network.set_name('net')
+    network.set_network_attribute('description', 'pathway')
+    if reverse:
+        node_names = list(reversed(node_names))
+    node_ids = {}
+    for name in node_names:
+        node_ids[name] = network.create_node(name, node_represents='hgnc.symbol:' + name)
+        network.set_node_attribute(node_ids[name], 'type', 'gene')
+    network.create_edge(node_ids['A'], node_ids['B'], 'activates')
+    network.set_opaque_aspect(CARTESIANLAYOUT_ASPECT_NAME,
+                              [{'node': node_ids[name], 'x': 1.0, 'y': float(len(name))}
+                               for name in node_names])
+    return network
+
+
+class TestUploadState(unittest.TestCase):
+    """Tests for `ndextcgaloader.uploadstate` module."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._temp_dir)
+
+    def test_network_hash_ignores_order_and_ids(self):
+        network = _create_network(['A', 'B', 'CC'])
+        reordered = _create_network(['A', 'B', 'CC'], reverse=True)
+        self.assertNotEqual(network.nodes, reordered.nodes)
+        self.assertEqual(uploadstate.get_network_hash(network),
+                         uploadstate.get_network_hash(reordered))
+
+        # metadata written by to_cx() does not change the hash
+        network_hash = uploadstate.get_network_hash(network)
+        network.to_cx()
+        self.assertEqual(network_hash, uploadstate.get_network_hash(network))
+
+    def test_network_hash_detects_changes(self):
+        network_hash = uploadstate.get_network_hash(_create_network(['A', 'B', 'CC']))
+
+        network = _create_network(['A', 'B', 'CC'])
+        network.set_node_attribute(2, 'type', 'complex', overwrite=True)
+        self.assertNotEqual(network_hash, uploadstate.get_network_hash(network))
+
+        network = _create_network(['A', 'B', 'CC'])
+        network.edges[0]['i'] = 'inhibits'
+        self.assertNotEqual(network_hash, uploadstate.get_network_hash(network))
+
+        network = _create_network(['A', 'B', 'CC'])
+        network.get_opaque_aspect(CARTESIANLAYOUT_ASPECT_NAME)[0]['x'] = 2.0
+        self.assertNotEqual(network_hash, uploadstate.get_network_hash(network))
+
+        network = _create_network(['A', 'B', 'CC'])
+        network.set_network_attribute('description', 'another pathway')
+        self.assertNotEqual(network_hash, uploadstate.get_network_hash(network))
+
+    def test_get_network_id_from_url(self):
+        self.assertEqual('1234', uploadstate.get_network_id_from_url(
+            'https://www.ndexbio.org/v2/network/1234'))
+        self.assertEqual(None, uploadstate.get_network_id_from_url(None))
+
+    def test_save_and_load(self):
+        state = UploadState(self._temp_dir)
+        state.load()
+        self.assertFalse(state.is_unchanged('net', '1234', 'abc'))
+
+        state.update_entry('net', '1234', 'abc')
+        state.save()
+        self.assertTrue(os.path.isfile(state.get_path()))
+
+        state = UploadState(self._temp_dir)
+        state.load()
+        self.assertTrue(state.is_unchanged('net', '1234', 'abc'))
+        self.assertFalse(state.is_unchanged('net', '1234', 'def'))
+        self.assertFalse(state.is_unchanged('net', '5678', 'abc'))
+        self.assertFalse(state.is_unchanged('net', None, 'abc'))
+
+        state.remove_entry('net')
+        self.assertEqual(None, state.get_entry('net'))
+
+    def test_load_corrupt_state(self):
+        with open(os.path.join(self._temp_dir, uploadstate.UPLOAD_STATE_FILE), 'w') as f:
+            f.write('{not json')
+        state = UploadState(self._temp_dir)
+        state.load()
+        self.assertEqual(None, state.get_entry('net'))